@@ -16,7 +16,9 @@ CAN_LOG_DIR = os.path.join(DATA_DIR, "can_logs")
 CSV_EXPORTS_DIR = os.path.join(DATA_DIR, "csv_exports")
 IMU_GPS_LOG_DIR = os.path.join(DATA_DIR, "imu_gps_logs")
 SYSTEM_LOG_DIR = os.path.join(DATA_DIR, "system_logs")
-PROCESSED_FILES_LOG = os.path.join(DATA_DIR, "processed_files.txt")
+PROCESSED_FILES_LOG = os.path.join(DATA_DIR, "processed_files.txt") # Lista antigua, se importa al registro
+PROCESSED_MANIFEST = os.path.join(DATA_DIR, "processed_manifest.sqlite3")
+INCREMENTAL_STATE_FILE = os.path.join(DATA_DIR, "incremental_state.json")
 DEVICE_ID_FILE = os.path.join(SYSTEM_LOG_DIR, "id.txt")
 
 # --- Rutas de Assets ---
@@ -33,9 +35,83 @@ OBD_LOGGER_CONTROL_PIN = 16 # Pin para controlar el logger OBD
 # --- Configuración de Red y Servicios ---
 CAN_INTERFACE = "can0"
 CAN_BITRATE = 500000
+CAN_BUS_BACKEND = "socketcan" # Backend de python-can ('virtual' para pruebas sin hardware)
+CAN_LOG_FORMAT = "text" # "text" (formato candump, .log) o "binary" (registros fijos, .bin)
+# Decodificar las tramas durante la captura y escribir <log>_live.csv en csv_exports
+OBD_LIVE_DECODE = False
+# Tramas en espera de decodificar en vivo; si se llena, se descartan (siguen en el log en bruto)
+LIVE_DECODE_QUEUE_SIZE = 10000
 WEB_SERVER_PORT = 9000
 GPS_IMU_SERIAL_PORT = '/dev/esp32_data'
 GPS_IMU_BAUD_RATE = 115200
+GPS_IMU_SERIAL_FORMAT = "text" # "text" (CSV por línea) o "binary" (tramas con CRC, ver gps_imu_logger.py)
+
+# --- Configuración del Logger GPS/IMU ---
+# Volcado del CSV a disco cada N filas o cada T milisegundos (y siempre al parar o rotar)
+IMU_GPS_FLUSH_ROWS = 200
+IMU_GPS_FLUSH_INTERVAL_MS = 1000
+# Segundos entre fsync del CSV para acotar la pérdida ante un corte (None = sin fsync)
+IMU_GPS_FSYNC_INTERVAL = 30
+# Frecuencia de muestreo del ESP32 (Hz). En formato binario, las tramas de un mismo bloque
+# leído se fechan hacia atrás desde la hora de lectura según su número de secuencia
+IMU_GPS_SAMPLE_RATE_HZ = 100
+
+# --- Configuración del Procesado de Logs ---
+# Número de procesos para convertir logs pendientes en paralelo (1 = secuencial)
+LOG_PROCESSOR_WORKERS = min(4, os.cpu_count() or 1)
+# Tamaño mínimo de un log para dividirlo en trozos y decodificarlo en paralelo
+LOG_CHUNK_MIN_BYTES = 16 * 1024 * 1024
+# Tramas por lote en la decodificación vectorizada con NumPy (0 = trama a trama)
+LOG_BATCH_SIZE = 65536
+# Segundos entre pasadas del procesado incremental de los logs del día
+INCREMENTAL_PROCESS_INTERVAL = 30
+# Exportación columnar adicional al CSV: None, "parquet" o "feather" (requiere pyarrow)
+COLUMNAR_EXPORT_FORMAT = None
+COLUMNAR_COMPRESSION = "zstd"
+# Filas por grupo de filas (Parquet) o por lote (Feather)
+COLUMNAR_ROW_GROUP_SIZE = 65536
+# Fusión CAN + IMU/GPS: tabla sincronizada por sesión al procesar cada log (en la
+# misma pasada que el CSV, solo si hay datos de IMU/GPS del día), frecuencia de la
+# rejilla, método ("linear" o "last") y segundos máximos sin muestras de una señal
+# antes de dejarla vacía
+FUSION_EXPORT = False
+FUSION_RATE_HZ = 10
+FUSION_METHOD = "linear"
+FUSION_MAX_GAP = 2.0
+# Las señales OBD admiten además huecos de hasta FUSION_GAP_PERIODS veces su periodo
+# de solicitud en solicitudes.csv (las que no figuran, el mayor de los periodos)
+FUSION_GAP_PERIODS = 1.5
+
+# --- Control Adaptativo de Solicitudes OBD ---
+# Ajusta el periodo de cada PID del servicio 01 según latencia, pérdidas y soporte de la ECU
+ADAPTIVE_REQUEST_RATE = False
+ADAPTIVE_ADJUST_INTERVAL = 5.0 # Segundos entre revisiones de los periodos
+ADAPTIVE_MIN_PERIOD_MS = 100
+ADAPTIVE_MAX_PERIOD_MS = 60000 # También el periodo de los PIDs no soportados
+ADAPTIVE_RESPONSE_TIMEOUT_MS = 250 # Sin respuesta en este tiempo, la solicitud cuenta como perdida
+ADAPTIVE_LOSS_THRESHOLD = 0.5 # Fracción de pérdidas a partir de la que se duplica el periodo
+ADAPTIVE_MAX_REQUEST_RATE = 25 # Presupuesto de carga del bus: tramas/s entre todas las solicitudes programadas
+
+# --- Solicitudes OBD Agrupadas ---
+# Agrupa las filas de solicitudes.csv de un solo PID del servicio 01 con la misma
+# frecuencia en solicitudes de hasta OBD_BATCH_MAX_PIDS PIDs (máximo 6)
+OBD_BATCH_REQUESTS = False
+OBD_BATCH_MAX_PIDS = 6
+
+# --- Configuración del Servidor Web ---
+# Descargas comprimidas (gzip/zstd) según Accept-Encoding para archivos de al menos este tamaño
+WEB_COMPRESSION_MIN_SIZE = 1024
+WEB_GZIP_LEVEL = 6
+WEB_ZSTD_LEVEL = 3
+
+# --- Telemetría en Vivo ---
+# Clientes simultáneos del canal /live (SSE) y envíos por segundo a cada uno
+TELEMETRY_MAX_SUBSCRIBERS = 8
+TELEMETRY_SSE_RATE_HZ = 5
+# Segundos sin datos tras los que se envía un comentario para mantener viva la conexión
+TELEMETRY_SSE_KEEPALIVE = 15
+# Muestras guardadas en memoria por señal para las consultas recientes (último valor, mín/máx/media)
+SIGNAL_HISTORY_CAPACITY = 8192
 
 # --- Creación de directorios si no existen ---
 def setup_directories():
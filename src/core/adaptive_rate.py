@@ -0,0 +1,207 @@
+# ./src/core/adaptive_rate.py
+import time
+import logging
+import threading
+
+import config
+
+# Solicitudes y respuestas OBD-II del servicio 01 (datos en vivo)
+OBD_REQUEST_ID = 0x7DF
+OBD_RESPONSE_ID = 0x7E8
+LIVE_DATA_SERVICE = 0x01
+LIVE_DATA_RESPONSE = 0x41
+# PIDs 00, 20, 40... de cada servicio 01: mapa de bits de los 32 PIDs siguientes soportados
+SUPPORT_PIDS = (0x00, 0x20, 0x40, 0x60, 0x80, 0xA0, 0xC0)
+
+def parse_pid_request(msg_id, data_hex):
+    """PID de una solicitud de un solo PID del servicio 01 ('7DF', '02010C...') o None."""
+    try:
+        data = bytes.fromhex(data_hex)
+    except ValueError:
+        return None
+    if int(msg_id, 16) != OBD_REQUEST_ID or len(data) < 3 or data[0] != 2 or data[1] != LIVE_DATA_SERVICE:
+        return None
+    return data[2]
+
+def support_request_data(pid):
+    """Datos de la solicitud del mapa de soporte que empieza en `pid` (00, 20, 40...)."""
+    return f"0201{pid:02X}0000000000"
+
+
+class _PIDState:
+    """Periodo actual y contadores de la ventana de ajuste de un PID."""
+    __slots__ = ("pid", "job_name", "base_period", "period", "sent_at", "requests", "responses",
+                 "lost", "changes", "last_payload", "rtt", "supported")
+
+    def __init__(self, pid, job_name, base_period):
+        self.pid = pid
+        self.job_name = job_name
+        self.base_period = base_period
+        self.period = base_period
+        self.sent_at = None      # Instante (monotónico) de la solicitud sin respuesta
+        self.requests = 0
+        self.responses = 0
+        self.lost = 0
+        self.changes = 0         # Respuestas cuyo valor cambió respecto a la anterior
+        self.last_payload = None
+        self.rtt = None          # Media móvil exponencial del tiempo de respuesta (s)
+        self.supported = None    # None mientras no se conozca el mapa de soporte
+
+    def reset_window(self):
+        self.requests = self.responses = self.lost = self.changes = 0
+
+
+class AdaptiveRateController:
+    """
+    Ajusta en marcha el periodo de las solicitudes OBD del servicio 01 según la
+    respuesta de la ECU. Empareja cada solicitud 7DF con su respuesta 7E8 para
+    medir latencia y pérdidas, lee los mapas de PIDs soportados (PID 00, 20...)
+    y, cada ADAPTIVE_ADJUST_INTERVAL segundos:
+      - relega al periodo máximo los PIDs que la ECU no soporta,
+      - duplica el periodo de los PIDs con muchas pérdidas,
+      - reduce a la mitad el de los que cambian en casi cada respuesta (RPM,
+        velocidad...), sin bajar de ADAPTIVE_MIN_PERIOD_MS ni de unas veces la
+        latencia medida y sin que el total de tramas enviadas por el planificador
+        (también solicitudes no adaptativas, agrupadas, de un solo disparo y
+        controles de flujo) supere ADAPTIVE_MAX_REQUEST_RATE por segundo,
+      - y devuelve hacia el periodo de solicitudes.csv los que dejan de cambiar.
+    Los periodos se aplican con RequestScheduler.set_period().
+    """
+    RTT_SMOOTHING = 0.2   # Peso de cada nueva medida en la media de latencia
+    RTT_MARGIN = 4        # El periodo nunca baja de este múltiplo de la latencia
+    MIN_SAMPLES = 3       # Solicitudes mínimas en la ventana para decidir
+
+    def __init__(self, scheduler, clock=time.monotonic):
+        self.scheduler = scheduler
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pids = {}
+        self._support_maps = {} # PID base (00, 20...) -> mapa de 32 bits recibido
+        self.min_period = config.ADAPTIVE_MIN_PERIOD_MS / 1000.0
+        self.max_period = config.ADAPTIVE_MAX_PERIOD_MS / 1000.0
+        self.timeout = config.ADAPTIVE_RESPONSE_TIMEOUT_MS / 1000.0
+        self.max_rate = config.ADAPTIVE_MAX_REQUEST_RATE
+
+    def register(self, pid, job_name, period):
+        """Registra la tarea periódica del planificador que solicita `pid`."""
+        self._pids[pid] = _PIDState(pid, job_name, period)
+
+    def on_request(self, pid):
+        """Llamar justo antes de enviar la solicitud de `pid`."""
+        with self._lock:
+            state = self._pids.get(pid)
+            if state is None:
+                return
+            if state.sent_at is not None:
+                state.lost += 1 # La anterior no tuvo respuesta
+            state.sent_at = self._clock()
+            state.requests += 1
+
+    def on_frame(self, timestamp, can_id, data):
+        """Listener del bus CAN: empareja las respuestas 41 xx con su solicitud."""
+        if can_id != OBD_RESPONSE_ID or len(data) < 3 or data[1] != LIVE_DATA_RESPONSE:
+            return
+        pid = data[2]
+        now = self._clock()
+        with self._lock:
+            if pid in SUPPORT_PIDS and len(data) >= 7:
+                self._support_maps[pid] = int.from_bytes(bytes(data[3:7]), 'big')
+            state = self._pids.get(pid)
+            if state is None or state.sent_at is None:
+                return
+            rtt = now - state.sent_at
+            state.sent_at = None
+            if rtt > self.timeout:
+                state.lost += 1 # Llegó, pero tarde: cuenta como pérdida para el control
+                return
+            state.responses += 1
+            state.rtt = rtt if state.rtt is None else state.rtt + self.RTT_SMOOTHING * (rtt - state.rtt)
+            payload = bytes(data[3:1 + data[0]])
+            if state.last_payload is not None and payload != state.last_payload:
+                state.changes += 1
+            state.last_payload = payload
+
+    def is_supported(self, pid):
+        """
+        Soporte de `pid` según los mapas recibidos: el mapa de su rango (bit más
+        significativo = base+1) o, si la ECU no respondió a ese rango, el bit del
+        rango anterior que indica si existe. None mientras no se sepa.
+        """
+        base = (pid - 1) // 0x20 * 0x20
+        bits = self._support_maps.get(base)
+        if bits is not None:
+            return bool(bits & (1 << (0x1F - (pid - 1 - base))))
+        previous = self._support_maps.get(base - 0x20)
+        if previous is not None and not previous & 1: # Último bit: soporte del PID `base`
+            return False
+        return None
+
+    def _request_rate(self):
+        """Carga del bus de todas las tareas del planificador, no solo de los PIDs registrados."""
+        return self.scheduler.request_rate(config.ADAPTIVE_ADJUST_INTERVAL)
+
+    def adjust(self):
+        """Revisa los periodos con los datos de la última ventana (tarea periódica del planificador)."""
+        with self._lock:
+            now = self._clock()
+            for state in self._pids.values():
+                # Solicitudes pendientes que ya no van a llegar a tiempo
+                if state.sent_at is not None and now - state.sent_at > self.timeout:
+                    state.lost += 1
+                    state.sent_at = None
+
+            candidates = []
+            for state in self._pids.values():
+                supported = self.is_supported(state.pid)
+                if supported is not None:
+                    if supported != state.supported:
+                        state.supported = supported
+                        if not supported:
+                            logging.info(f"PID {state.pid:02X} no soportado por la ECU: periodo {self.max_period:.0f} s.")
+                            self._set_period(state, self.max_period)
+                    if not supported:
+                        state.reset_window()
+                        continue
+
+                if state.requests < self.MIN_SAMPLES:
+                    continue # PID lento: la ventana se acumula hasta tener muestras suficientes
+                if state.lost / state.requests > config.ADAPTIVE_LOSS_THRESHOLD:
+                    self._set_period(state, min(state.period * 2, self.max_period))
+                elif state.lost == 0 and state.period > state.base_period:
+                    # Se recupera de un retroceso por pérdidas
+                    self._set_period(state, max(state.period / 2, state.base_period))
+                elif state.lost == 0 and state.responses:
+                    change_ratio = state.changes / state.responses
+                    if change_ratio >= 0.5:
+                        candidates.append((change_ratio, state))
+                    elif state.changes == 0 and state.period < state.base_period:
+                        self._set_period(state, min(state.period * 2, state.base_period))
+                state.reset_window()
+
+            # Acelerar primero lo que más cambia, dentro del presupuesto de carga del bus
+            rate = self._request_rate()
+            for _, state in sorted(candidates, key=lambda item: item[0], reverse=True):
+                floor = max(self.min_period, self.RTT_MARGIN * (state.rtt or 0.0))
+                new_period = max(state.period / 2, floor)
+                extra = 1.0 / new_period - 1.0 / state.period
+                if new_period < state.period and rate + extra <= self.max_rate:
+                    self._set_period(state, new_period)
+                    rate += extra
+
+    def _set_period(self, state, period):
+        if abs(period - state.period) > 1e-9:
+            state.period = period
+            self.scheduler.set_period(state.job_name, period)
+
+    def stats(self):
+        """Periodo actual, latencia media y soporte de cada PID."""
+        with self._lock:
+            return {
+                f"{pid:02X}": {
+                    "period_ms": state.period * 1000.0,
+                    "base_period_ms": state.base_period * 1000.0,
+                    "rtt_ms": state.rtt * 1000.0 if state.rtt is not None else None,
+                    "supported": state.supported,
+                }
+                for pid, state in self._pids.items()
+            }
@@ -0,0 +1,157 @@
+# ./src/core/binary_can_log.py
+import os
+import mmap
+import struct
+import logging
+
+import numpy as np
+
+# --- Formato binario de log CAN ---
+# Cabecera fija al inicio del archivo:
+#   magic (8s) | versión (H) | tamaño de registro (H) | nº de sesiones (I)
+#   + índice de sesiones: MAX_SESSIONS entradas de (índice de registro (Q), cabecera de sesión (40s))
+# Después, registros de tamaño fijo:
+#   timestamp (d) | can_id (I) | dlc (B) | flags (B) | relleno (2x) | datos (8s)
+MAGIC = b"HUMSCAN\x00"
+VERSION = 1
+MAX_SESSIONS = 256
+SESSION_TEXT_SIZE = 40
+
+_PREAMBLE = struct.Struct("<8sHHI")
+_SESSION_ENTRY = struct.Struct(f"<Q{SESSION_TEXT_SIZE}s")
+RECORD = struct.Struct("<dIBB2x8s")
+HEADER_SIZE = _PREAMBLE.size + MAX_SESSIONS * _SESSION_ENTRY.size
+
+FLAG_EXTENDED_ID = 0x01
+
+# dtype equivalente para leer los registros con NumPy sin copias
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("can_id", "<u4"),
+    ("dlc", "u1"),
+    ("flags", "u1"),
+    ("pad", "V2"),
+    ("data", "u1", (8,)),
+])
+
+BINARY_LOG_EXTENSION = ".bin"
+
+def is_binary_log(path):
+    return path.endswith(BINARY_LOG_EXTENSION)
+
+
+class BinaryCANLogWriter:
+    """
+    Escribe tramas CAN en registros binarios de tamaño fijo (24 bytes frente a
+    los ~55 del texto de candump). Cada sesión se anota en el índice de la cabecera.
+    """
+    def __init__(self, path):
+        self.path = path
+        is_new = not os.path.exists(path) or os.path.getsize(path) < HEADER_SIZE
+        self._file = open(path, "w+b" if is_new else "r+b")
+        if is_new:
+            self._file.write(_PREAMBLE.pack(MAGIC, VERSION, RECORD.size, 0))
+            self._file.write(b"\x00" * (MAX_SESSIONS * _SESSION_ENTRY.size))
+            self._session_count = 0
+            self._record_count = 0
+        else:
+            magic, version, record_size, self._session_count = _PREAMBLE.unpack(self._file.read(_PREAMBLE.size))
+            if magic != MAGIC or record_size != RECORD.size:
+                self._file.close()
+                raise ValueError(f"{path} no es un log CAN binario compatible")
+            # Descartar un posible registro incompleto al final (corte de corriente)
+            self._record_count = (os.path.getsize(path) - HEADER_SIZE) // RECORD.size
+        self._file.seek(HEADER_SIZE + self._record_count * RECORD.size)
+        self._file.truncate()
+
+    def start_session(self, header_text):
+        """Registra el comienzo de una sesión en el índice de la cabecera."""
+        if self._session_count >= MAX_SESSIONS:
+            logging.warning(f"Índice de sesiones lleno en {self.path}; la sesión '{header_text}' no se indexará.")
+            return
+        entry = _SESSION_ENTRY.pack(self._record_count, header_text.encode("utf-8")[:SESSION_TEXT_SIZE])
+        position = self._file.tell()
+        self._file.seek(_PREAMBLE.size + self._session_count * _SESSION_ENTRY.size)
+        self._file.write(entry)
+        self._session_count += 1
+        self._file.seek(0)
+        self._file.write(_PREAMBLE.pack(MAGIC, VERSION, RECORD.size, self._session_count))
+        self._file.seek(position)
+        self._file.flush()
+
+    def write_frame(self, timestamp, can_id, data, is_extended_id=False):
+        flags = FLAG_EXTENDED_ID if is_extended_id else 0
+        self._file.write(RECORD.pack(timestamp, can_id, len(data), flags, bytes(data)))
+        self._record_count += 1
+
+    def write_message(self, message):
+        """Escribe un `can.Message` de python-can."""
+        self.write_frame(message.timestamp, message.arbitration_id, message.data, message.is_extended_id)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BinaryCANLogReader:
+    """
+    Lector de logs binarios mediante mmap. `records` devuelve una vista NumPy
+    estructurada sobre el propio mapa de memoria (sin copias) e `iter_records()`
+    produce los mismos registros que el parseo del texto de candump.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, session_count = _PREAMBLE.unpack_from(self._mm, 0)
+        if magic != MAGIC or record_size != RECORD.size:
+            self.close()
+            raise ValueError(f"{path} no es un log CAN binario compatible")
+        self.record_count = (len(self._mm) - HEADER_SIZE) // RECORD.size
+        self.sessions = []
+        for i in range(session_count):
+            record_index, text = _SESSION_ENTRY.unpack_from(self._mm, _PREAMBLE.size + i * _SESSION_ENTRY.size)
+            self.sessions.append((record_index, text.rstrip(b"\x00").decode("utf-8")))
+
+    @property
+    def records(self):
+        """Array estructurado de NumPy (RECORD_DTYPE) mapeado sobre el archivo."""
+        return np.frombuffer(self._mm, dtype=RECORD_DTYPE, count=self.record_count, offset=HEADER_SIZE)
+
+    def iter_records(self, start_record=0, start_session=0):
+        """
+        Produce ('session', cabecera) y ('raw', (timestamp, id_str, id, datos)) en
+        orden, formateando timestamp e ID igual que `candump -ta`. Con
+        `start_record`/`start_session` se omiten los ya leídos (lectura incremental).
+        """
+        view = memoryview(self._mm)[HEADER_SIZE + start_record * RECORD.size:HEADER_SIZE + self.record_count * RECORD.size]
+        sessions = iter(self.sessions[start_session:])
+        next_session = next(sessions, None)
+        for index, (timestamp, can_id, dlc, flags, data) in enumerate(RECORD.iter_unpack(view), start_record):
+            while next_session is not None and next_session[0] <= index:
+                yield 'session', next_session[1]
+                next_session = next(sessions, None)
+            can_id_str = f"{can_id:08X}" if flags & FLAG_EXTENDED_ID else f"{can_id:03X}"
+            yield 'raw', (f"{timestamp:.6f}", can_id_str, can_id, data[:dlc])
+        # Sesiones sin tramas al final del archivo
+        while next_session is not None:
+            yield 'session', next_session[1]
+            next_session = next(sessions, None)
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
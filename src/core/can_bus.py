@@ -0,0 +1,111 @@
+# ./src/core/can_bus.py
+import time
+import logging
+import threading
+
+import can
+
+import config
+from src.core.binary_can_log import BinaryCANLogWriter
+
+class CANBusEngine:
+    """
+    Motor de captura y envío sobre un socket SocketCAN nativo (python-can).
+    Sustituye a los subprocesos `candump` y `cansend`: la recepción se hace en un
+    hilo propio que escribe cada trama con su timestamp en el mismo formato que
+    `candump -ta`, y los envíos se hacen en el propio proceso, sin lanzar procesos.
+    Con `interface='virtual'` se usa el bus virtual de python-can (pruebas).
+    """
+    RECV_TIMEOUT = 0.5     # Segundos de espera máxima en recv() para poder detener el hilo
+    FLUSH_INTERVAL = 1.0   # Segundos entre volcados del log a disco
+
+    def __init__(self, channel=None, interface=None):
+        self.channel = channel or config.CAN_INTERFACE
+        self.interface = interface or config.CAN_BUS_BACKEND
+        self._bus = None
+        self._log_file = None
+        self._write_frame = None
+        self._thread = None
+        self._running = False
+        self._listeners = []
+
+    def open(self):
+        """Abre el socket CAN. Las tramas propias se reciben también para que queden en el log."""
+        self._bus = can.interface.Bus(channel=self.channel, interface=self.interface, receive_own_messages=True)
+        logging.info(f"Bus CAN abierto en {self.channel} ({self.interface}).")
+
+    def add_listener(self, callback):
+        """Registra una función callback(timestamp, can_id, data) que se llama con cada trama recibida."""
+        self._listeners.append(callback)
+
+    def start_capture(self, log_file):
+        """
+        Inicia el hilo de recepción, que escribe cada trama en `log_file`: un archivo
+        de texto ya abierto (formato candump) o un BinaryCANLogWriter.
+        """
+        if self._bus is None:
+            self.open()
+        self._log_file = log_file
+        if isinstance(log_file, BinaryCANLogWriter):
+            self._write_frame = log_file.write_message
+        else:
+            self._write_frame = lambda message: log_file.write(self.format_frame(message))
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._thread.start()
+
+    def send(self, msg_id, data):
+        """Envía una única trama CAN. `msg_id` y `data` en hexadecimal (p.ej. '7DF', '02010C...')."""
+        try:
+            arbitration_id = int(msg_id, 16)
+            message = can.Message(
+                arbitration_id=arbitration_id,
+                data=bytes.fromhex(data),
+                is_extended_id=arbitration_id > 0x7FF
+            )
+            self._bus.send(message)
+        except (can.CanError, ValueError) as e:
+            logging.error(f"Error al enviar trama CAN '{msg_id}#{data}': {e}")
+
+    def stop(self):
+        """Detiene el hilo de captura y cierra el socket."""
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=self.RECV_TIMEOUT * 4)
+            if self._thread.is_alive():
+                logging.error("El hilo de captura CAN no se detuvo correctamente.")
+            self._thread = None
+        if self._bus:
+            self._bus.shutdown()
+            self._bus = None
+        logging.info("Bus CAN cerrado.")
+
+    def format_frame(self, message):
+        """Formatea una trama igual que `candump -ta` para que log_processor la entienda."""
+        can_id = f"{message.arbitration_id:08X}" if message.is_extended_id else f"{message.arbitration_id:03X}"
+        data = ' '.join(f"{b:02X}" for b in message.data)
+        return f" ({message.timestamp:.6f})  {self.channel}  {can_id}   [{message.dlc}]  {data}\n"
+
+    def _capture_loop(self):
+        last_flush = time.monotonic()
+        while self._running:
+            try:
+                message = self._bus.recv(timeout=self.RECV_TIMEOUT)
+            except can.CanError as e:
+                logging.error(f"Error de recepción en el bus CAN: {e}")
+                time.sleep(0.1)
+                continue
+
+            if message is not None and not message.is_error_frame:
+                self._write_frame(message)
+                for callback in self._listeners:
+                    try:
+                        callback(message.timestamp, message.arbitration_id, bytes(message.data))
+                    except Exception as e:
+                        logging.error(f"Error en un listener de tramas CAN: {e}")
+
+            now = time.monotonic()
+            if message is None or now - last_flush >= self.FLUSH_INTERVAL:
+                self._log_file.flush()
+                last_flush = now
+        self._log_file.flush()
@@ -0,0 +1,185 @@
+# ./src/core/columnar_export.py
+import numpy as np
+
+import config
+
+# --- Carga Condicional de pyarrow ---
+# La exportación columnar es opcional: sin pyarrow solo se genera el CSV.
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+COLUMNAR_EXTENSIONS = {"parquet": ".parquet", "feather": ".feather"}
+
+# Columnas fijas de cada fila y columnas de texto para los datos especiales
+BASE_COLUMNS = ["Timestamp", "CAN ID", "Message Name", "Session"]
+SPECIAL_COLUMNS = {
+    "VIN": "VIN",
+    "CVN": "CVN",
+    "DTC Almacenados": "DTC_Almacenados",
+    "DTC Pendientes": "DTC_Pendientes",
+}
+
+def is_available():
+    return pa is not None
+
+def signal_schema(db):
+    """
+    Esquema Arrow con una columna tipada por señal del DBC: texto para las
+    señales con tabla de valores, entero si la escala y el offset son enteros
+    y float64 en el resto. Si dos mensajes comparten nombre de señal, se usa
+    una sola columna con el tipo de la primera aparición.
+    """
+    fields = [
+        pa.field("Timestamp", pa.float64()),
+        pa.field("CAN ID", pa.string()),
+        pa.field("Message Name", pa.string()),
+        pa.field("Session", pa.string()),
+    ]
+    seen = set(BASE_COLUMNS)
+    for message in db.messages:
+        for signal in message.signals:
+            if signal.name in seen:
+                continue
+            seen.add(signal.name)
+            if signal.choices:
+                arrow_type = pa.string()
+            elif signal.is_float or not (isinstance(signal.scale, int) and isinstance(signal.offset, int)):
+                arrow_type = pa.float64()
+            else:
+                arrow_type = pa.int64()
+            fields.append(pa.field(signal.name, arrow_type))
+    fields += [pa.field(name, pa.string()) for name in SPECIAL_COLUMNS.values()]
+    return pa.schema(fields)
+
+
+class ColumnarWriter:
+    """
+    Escribe las tramas decodificadas en Parquet o Feather (Arrow IPC) con una
+    columna por señal. Las filas se acumulan por columnas como (índices, valores)
+    y cada `row_group_size` filas se vuelcan como un grupo de filas comprimido,
+    de modo que la memoria no depende del tamaño del log.
+    """
+    def __init__(self, db, output_path, fmt=None, compression=None, row_group_size=None):
+        if pa is None:
+            raise RuntimeError("pyarrow no está instalado; no se puede exportar en formato columnar")
+        self.fmt = fmt or config.COLUMNAR_EXPORT_FORMAT
+        if self.fmt not in COLUMNAR_EXTENSIONS:
+            raise ValueError(f"Formato columnar no soportado: {self.fmt}")
+        self.compression = compression or config.COLUMNAR_COMPRESSION
+        self.row_group_size = row_group_size or config.COLUMNAR_ROW_GROUP_SIZE
+        self.output_path = output_path
+        self.schema = signal_schema(db)
+        self._types = {field.name: field.type for field in self.schema}
+        self._signal_names = [name for name in self.schema.names if name not in BASE_COLUMNS]
+
+        if self.fmt == "parquet":
+            self._writer = pq.ParquetWriter(output_path, self.schema, compression=self.compression)
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=self.compression)
+            self._writer = pa.ipc.new_file(output_path, self.schema, options=options)
+        self.rows_written = 0
+        self._session = None
+        self._reset_batch()
+
+    def _reset_batch(self):
+        self._timestamps = []
+        self._can_ids = []
+        self._names = []
+        self._sessions = []
+        self._columns = {name: ([], []) for name in self._signal_names}
+
+    def add_row(self, timestamp, can_id_str, message_name, values, session=None):
+        """
+        Añade una trama. `values` es el diccionario de señales del DBC o el texto
+        extraído (VIN, CVN, DTC) cuando `message_name` es uno de esos.
+        """
+        row = len(self._timestamps)
+        self._timestamps.append(float(timestamp))
+        self._can_ids.append(can_id_str)
+        self._names.append(message_name)
+        self._sessions.append(session)
+
+        columns = self._columns
+        if isinstance(values, dict):
+            for signal_name, value in values.items():
+                column = columns.get(signal_name)
+                if column is not None:
+                    column[0].append(row)
+                    column[1].append(value)
+        else:
+            column = columns.get(SPECIAL_COLUMNS.get(message_name))
+            if column is not None:
+                column[0].append(row)
+                column[1].append(values)
+
+        if row + 1 >= self.row_group_size:
+            self.flush()
+
+    def add_entry(self, entry):
+        """
+        Añade una fila de la decodificación del log (ver log_processor.iter_decoded_entries
+        con `with_values`): las sesiones fijan la columna Session y las tramas sin
+        valores decodificados (IDs desconocidos) se omiten.
+        """
+        if entry['Message Name'] == 'SESIÓN:':
+            self._session = entry['Decoded Data']
+        elif entry.get('Values') is not None:
+            self.add_row(entry['Timestamp'], entry['CAN ID'], entry['Message Name'], entry['Values'], self._session)
+
+    def _build_column(self, name, length):
+        """Construye una columna con nulos en las filas donde la señal no aparece."""
+        arrow_type = self._types[name]
+        indices, values = self._columns[name]
+        if not indices:
+            return pa.nulls(length, type=arrow_type)
+        if arrow_type == pa.string():
+            column = [None] * length
+            for index, value in zip(indices, values):
+                column[index] = str(value)
+            return pa.array(column, type=arrow_type)
+        data = np.zeros(length, dtype=np.int64 if arrow_type == pa.int64() else np.float64)
+        data[indices] = values
+        mask = np.ones(length, dtype=bool)
+        mask[indices] = False
+        return pa.array(data, mask=mask, type=arrow_type)
+
+    def flush(self):
+        """Escribe las filas acumuladas como un grupo de filas (Parquet) o un lote (Feather)."""
+        length = len(self._timestamps)
+        if not length:
+            return
+        arrays = [
+            pa.array(self._timestamps, type=pa.float64()),
+            pa.array(self._can_ids, type=pa.string()),
+            pa.array(self._names, type=pa.string()),
+            pa.array(self._sessions, type=pa.string()),
+        ]
+        arrays += [self._build_column(name, length) for name in self._signal_names]
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        if self.fmt == "parquet":
+            self._writer.write_batch(batch, row_group_size=length)
+        else:
+            self._writer.write_batch(batch)
+        self.rows_written += length
+        self._reset_batch()
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+    def abort(self):
+        """Cierra el archivo sin volcar las filas pendientes (tras un error)."""
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
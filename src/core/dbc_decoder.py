@@ -0,0 +1,322 @@
+# ./src/core/dbc_decoder.py
+import logging
+
+import numpy as np
+import cantools
+from cantools.database.conversion import IdentityConversion, LinearConversion, LinearIntegerConversion
+
+# Posiciones de los bytes que seleccionan el multiplexado en las respuestas OBD-II:
+# byte 1 = servicio de respuesta (0x41, 0x42...), byte 2 = PID.
+SERVICE_BYTE = 1
+PID_BYTE = 2
+
+# Marcador para "cualquier valor" en la clave del plan.
+_ANY = None
+
+# Tipos de extractor precompilado
+_RAW = 0      # Sin escalado (IdentityConversion)
+_LINEAR = 1   # raw * scale + offset
+_GENERIC = 2  # Conversión de cantools (tablas de valores, etc.)
+
+
+class DBCDecoder:
+    """
+    Motor de decodificación construido una única vez a partir de un archivo DBC.
+
+    Para cada mensaje se precalcula un plan que asocia (frame id, byte de servicio,
+    byte de PID) directamente con la lista de extractores de señal (desplazamiento,
+    longitud, signo, escala y offset), evitando resolver el multiplexado de cantools
+    en cada trama. Lo que el plan no cubre se delega en cantools, por lo que el
+    resultado (y las excepciones) son idénticos a `message.decode()`.
+    """
+    def __init__(self, db):
+        self.db = db
+        self._plans = {}
+        self._messages = {}
+        self._batch_plans = []   # Planes indexados para la decodificación por lotes
+        self._batch_tables = {}  # frame id -> tabla 256x256 (servicio, PID) -> índice de plan
+        for message in db.messages:
+            self._messages[message.frame_id] = message
+            try:
+                self._compile_message(message)
+            except Exception as e:
+                logging.warning(f"No se pudo precompilar el mensaje {message.name}, se usará cantools: {e}")
+        logging.info(f"Plan de decodificación precompilado con {len(self._plans)} entradas.")
+
+    @classmethod
+    def from_file(cls, dbc_file):
+        """Carga el archivo DBC y construye el decodificador."""
+        return cls(cantools.database.load_file(dbc_file))
+
+    def decode(self, frame_id, data):
+        """
+        Decodifica una trama. Devuelve (nombre_mensaje, diccionario_de_señales).
+        Lanza KeyError si el ID no está en el DBC y DecodeError si la trama no es válida.
+        """
+        plan = None
+        if len(data) > PID_BYTE:
+            plans = self._plans
+            plan = plans.get((frame_id, data[SERVICE_BYTE], data[PID_BYTE]))
+            if plan is None:
+                plan = plans.get((frame_id, data[SERVICE_BYTE], _ANY)) or plans.get((frame_id, _ANY, _ANY))
+
+        if plan is not None:
+            name, length, needs_le, extractors = plan
+            if len(data) >= length:
+                payload = data[:length]
+                value_be = int.from_bytes(payload, 'big')
+                value_le = int.from_bytes(payload, 'little') if needs_le else 0
+                decoded = {}
+                for signal_name, big_endian, shift, mask, sign_bit, kind, scale, offset, conversion in extractors:
+                    raw = ((value_be if big_endian else value_le) >> shift) & mask
+                    if sign_bit and raw & sign_bit:
+                        raw -= sign_bit << 1
+                    if kind == _RAW:
+                        decoded[signal_name] = raw
+                    elif kind == _LINEAR:
+                        decoded[signal_name] = raw * scale + offset
+                    else:
+                        decoded[signal_name] = conversion.raw_to_scaled(raw)
+                return name, decoded
+
+        # Fallback: decodificación genérica con cantools
+        message = self._messages.get(frame_id) or self.db.get_message_by_frame_id(frame_id)
+        return message.name, message.decode(data)
+
+    def is_known(self, frame_id):
+        """Indica si el frame id tiene un mensaje en el DBC (si no, decode() lanza KeyError)."""
+        if frame_id in self._messages:
+            return True
+        try:
+            self.db.get_message_by_frame_id(frame_id)
+            return True
+        except KeyError:
+            return False
+
+    def numeric_signals(self):
+        """
+        Señales de medida de cada frame id: las numéricas (sin tabla de valores)
+        y, en los mensajes multiplexados, solo las de cada rama (no Length,
+        Service ni PID). Devuelve {frame_id: conjunto de nombres}.
+        """
+        signals = {}
+        for message in self.db.messages:
+            multiplexed = message.is_multiplexed()
+            signals[message.frame_id] = {
+                s.name for s in message.signals
+                if not s.choices and not s.is_multiplexer and (s.multiplexer_ids or not multiplexed)
+            }
+        return signals
+
+    def message_fingerprint(self, frame_id):
+        """
+        Texto que resume la definición del mensaje de un frame id (señales,
+        posiciones, escalas, tablas de valores y multiplexado), o '-' si no está
+        en el DBC. Sirve para saber si un cambio del DBC afecta a un log.
+        """
+        try:
+            message = self._messages.get(frame_id) or self.db.get_message_by_frame_id(frame_id)
+        except KeyError:
+            return '-'
+        signals = [
+            (s.name, s.start, s.length, s.byte_order, s.is_signed, s.is_float, s.scale, s.offset,
+             sorted((int(k), str(v)) for k, v in (s.choices or {}).items()),
+             s.is_multiplexer, s.multiplexer_ids, s.multiplexer_signal)
+            for s in message.signals
+        ]
+        return repr((message.name, message.length, signals))
+
+    def decode_batch(self, frame_ids, data, lengths):
+        """
+        Decodificación vectorizada de un lote de tramas con NumPy.
+
+        `frame_ids` (n,), `data` (n, 8) uint8 y `lengths` (n,) con el número de
+        bytes de cada trama. Las tramas se agrupan por plan (mensaje + servicio +
+        PID) y cada señal se extrae con una única operación por grupo.
+        Devuelve (cubiertas, grupos): una máscara booleana de las tramas resueltas
+        y una lista de (nombre_mensaje, filas, [(señal, valores)]). Las tramas no
+        cubiertas deben decodificarse con `decode()`.
+        """
+        n = len(frame_ids)
+        plan_index = np.full(n, -1, dtype=np.int32)
+        valid = lengths > PID_BYTE
+        for frame_id in np.unique(frame_ids[valid]):
+            table = self._batch_table(int(frame_id))
+            if table is None:
+                continue
+            rows = np.flatnonzero(valid & (frame_ids == frame_id))
+            plan_index[rows] = table[data[rows, SERVICE_BYTE], data[rows, PID_BYTE]]
+
+        covered = plan_index >= 0
+        if covered.any():
+            plan_lengths = np.array([plan[1] for plan in self._batch_plans], dtype=np.int64)
+            covered[covered] = lengths[covered] >= plan_lengths[plan_index[covered]]
+
+        groups = []
+        rows = np.flatnonzero(covered)
+        if not len(rows):
+            return covered, groups
+        rows = rows[np.argsort(plan_index[rows], kind='stable')]
+        sorted_plans = plan_index[rows]
+        splits = np.flatnonzero(np.diff(sorted_plans)) + 1
+        for group_rows in np.split(rows, splits):
+            name, length, needs_le, extractors = self._batch_plans[plan_index[group_rows[0]]]
+            groups.append((name, group_rows, self._extract_batch(data[group_rows], length, needs_le, extractors)))
+        return covered, groups
+
+    def _batch_table(self, frame_id):
+        """Tabla (servicio, PID) -> índice de plan de un frame id, construida una vez."""
+        if frame_id in self._batch_tables:
+            return self._batch_tables[frame_id]
+        table = None
+        if any(key[0] == frame_id for key in self._plans):
+            table = np.full((256, 256), -1, dtype=np.int32)
+            indices = {}
+            plans = self._plans
+            for service in range(256):
+                fallback = plans.get((frame_id, service, _ANY)) or plans.get((frame_id, _ANY, _ANY))
+                for pid in range(256):
+                    plan = plans.get((frame_id, service, pid)) or fallback
+                    if plan is None or not self._is_batchable(plan):
+                        continue
+                    if id(plan) not in indices:
+                        indices[id(plan)] = len(self._batch_plans)
+                        self._batch_plans.append(plan)
+                    table[service, pid] = indices[id(plan)]
+        self._batch_tables[frame_id] = table
+        return table
+
+    @staticmethod
+    def _is_batchable(plan):
+        """Los planes de más de 8 bytes o con señales de 64 bits se decodifican trama a trama."""
+        _, length, _, extractors = plan
+        return length <= 8 and all(e[3] < (1 << 63) for e in extractors)
+
+    @staticmethod
+    def _extract_batch(payloads, length, needs_le, extractors):
+        """Aplica los extractores de un plan a una matriz de tramas (m, 8)."""
+        m = len(payloads)
+        buffer = np.zeros((m, 8), dtype=np.uint8)
+        buffer[:, 8 - length:] = payloads[:, :length]
+        value_be = buffer.view('>u8').ravel()
+        value_le = None
+        if needs_le:
+            buffer = np.zeros((m, 8), dtype=np.uint8)
+            buffer[:, :length] = payloads[:, :length]
+            value_le = buffer.view('<u8').ravel()
+
+        columns = []
+        for signal_name, big_endian, shift, mask, sign_bit, kind, scale, offset, conversion in extractors:
+            value = value_be if big_endian else value_le
+            raw = ((value >> np.uint64(shift)) & np.uint64(mask)).astype(np.int64)
+            if sign_bit:
+                raw = np.where(raw & sign_bit, raw - (sign_bit << 1), raw)
+            if kind == _RAW:
+                values = raw
+            elif kind == _LINEAR:
+                # Mismas operaciones que en decode(): enteros si escala y offset lo son
+                values = raw * scale + offset
+            else:
+                # Conversión de cantools aplicada una sola vez por valor distinto
+                unique, inverse = np.unique(raw, return_inverse=True)
+                converted = np.empty(len(unique), dtype=object)
+                for i, raw_value in enumerate(unique.tolist()):
+                    converted[i] = conversion.raw_to_scaled(raw_value)
+                values = converted[inverse.ravel()]
+            columns.append((signal_name, values))
+        return columns
+
+    def _compile_message(self, message):
+        """Genera las entradas del plan para todas las ramas de multiplexado del mensaje."""
+        if message.is_container:
+            return
+
+        for selectors, signal_names in self._walk_tree(message, message.signal_tree):
+            extractors = [self._build_extractor(message, message.get_signal_by_name(name)) for name in signal_names]
+            if any(e is None for e in extractors):
+                continue
+
+            service_values, pid_values = [_ANY], [_ANY]
+            for selector_name, mux_value in selectors:
+                signal = message.get_signal_by_name(selector_name)
+                byte_index, values = self._selector_byte_values(message, signal, mux_value)
+                if byte_index == SERVICE_BYTE and service_values == [_ANY]:
+                    service_values = values
+                elif byte_index == PID_BYTE and pid_values == [_ANY]:
+                    pid_values = values
+                else:
+                    # Selector fuera de los bytes de servicio/PID: esta rama la resuelve cantools
+                    break
+            else:
+                if pid_values != [_ANY] and service_values == [_ANY]:
+                    continue
+                needs_le = any(not e[1] for e in extractors)
+                plan = (message.name, message.length, needs_le, tuple(extractors))
+                for service_value in service_values:
+                    for pid_value in pid_values:
+                        self._plans[(message.frame_id, service_value, pid_value)] = plan
+
+    def _walk_tree(self, message, nodes, selectors=()):
+        """
+        Recorre el `signal_tree` de cantools y devuelve, por cada rama, los selectores
+        fijados y las señales en el mismo orden en que cantools las decodifica.
+        """
+        names = []
+        muxes = []
+        for node in nodes:
+            if isinstance(node, dict):
+                for mux_name, branches in node.items():
+                    names.append(mux_name)
+                    muxes.append((mux_name, branches))
+            else:
+                names.append(node)
+
+        if not muxes:
+            yield selectors, names
+            return
+
+        # Combinaciones de ramas de todos los multiplexores del nivel actual
+        partial = [(selectors, names)]
+        for mux_name, branches in muxes:
+            expanded = []
+            for current_selectors, current_names in partial:
+                for mux_value, children in branches.items():
+                    for child_selectors, child_names in self._walk_tree(
+                            message, children, current_selectors + ((mux_name, mux_value),)):
+                        expanded.append((child_selectors, current_names + child_names))
+            partial = expanded
+        yield from partial
+
+    @staticmethod
+    def _bit_position(message, signal):
+        """Devuelve (big_endian, shift) del bit menos significativo de la señal."""
+        if signal.byte_order == 'big_endian':
+            msb = 8 * (signal.start // 8) + (7 - signal.start % 8)
+            return True, message.length * 8 - msb - signal.length
+        return False, signal.start
+
+    def _selector_byte_values(self, message, signal, mux_value):
+        """Calcula qué byte ocupa un selector y qué valores de ese byte seleccionan la rama."""
+        big_endian, shift = self._bit_position(message, signal)
+        byte_index = (message.length - 1 - shift // 8) if big_endian else shift // 8
+        bit_in_byte = shift % 8
+        if bit_in_byte + signal.length > 8 or signal.is_signed:
+            return None, []
+        mask = (1 << signal.length) - 1
+        values = [b for b in range(256) if (b >> bit_in_byte) & mask == mux_value]
+        return byte_index, values
+
+    def _build_extractor(self, message, signal):
+        if signal.is_float:
+            return None
+        big_endian, shift = self._bit_position(message, signal)
+        mask = (1 << signal.length) - 1
+        sign_bit = (1 << (signal.length - 1)) if signal.is_signed else 0
+        conversion = signal.conversion
+        if type(conversion) is IdentityConversion:
+            kind, scale, offset = _RAW, 1, 0
+        elif type(conversion) in (LinearConversion, LinearIntegerConversion):
+            kind, scale, offset = _LINEAR, conversion.scale, conversion.offset
+        else:
+            kind, scale, offset = _GENERIC, 1, 0
+        return (signal.name, big_endian, shift, mask, sign_bit, kind, scale, offset, conversion)
@@ -0,0 +1,326 @@
+# ./src/core/fusion.py
+import os
+import re
+import csv
+import math
+import time
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+
+import config
+from src.core.log_processor import iter_log_file_entries, OBDDataExtractor
+from src.core.adaptive_rate import parse_pid_request
+
+# Columnas numéricas del CSV diario de IMU/GPS (todas salvo el timestamp)
+IMU_GPS_COLUMNS = [
+    "accel_x_m_s2", "accel_y_m_s2", "accel_z_m_s2",
+    "gyro_x_rad_s", "gyro_y_rad_s", "gyro_z_rad_s", "latitude", "longitude"
+]
+
+# Orden de los eventos con el mismo timestamp en la mezcla
+_EVENT_END, _EVENT_SESSION, _EVENT_SAMPLE = 0, 1, 2
+
+# PID del servicio 01 en el nombre de las señales del DBC: S01PID0C_EngineRPM
+_SIGNAL_PID_RE = re.compile(r'S01PID([0-9A-Fa-f]{2})_')
+
+
+def _event_key(event):
+    return event[0], event[1]
+
+def _imu_gps_csv_paths(log_date):
+    """CSV diarios de IMU/GPS del día del log y del siguiente (sesiones que cruzan la medianoche)."""
+    paths = []
+    for day in (log_date, log_date + timedelta(days=1)):
+        path = os.path.join(config.IMU_GPS_LOG_DIR, day.strftime('%Y'), day.strftime('%m'),
+                            f"{day.strftime('%Y%m%d')}_IMU_GPS_DATA.csv")
+        if os.path.exists(path):
+            paths.append(path)
+    return paths
+
+def _iter_imu_gps_events(csv_paths):
+    """Muestras de IMU/GPS como eventos (ts, orden, 'sample', valores), en orden de archivo."""
+    cached_prefix, cached_epoch = None, 0.0
+    for path in csv_paths:
+        with open(path, 'r', newline='') as f:
+            for row in csv.reader(f):
+                if len(row) != len(IMU_GPS_COLUMNS) + 1 or row[0].startswith(('=====', 'timestamp')):
+                    continue
+                stamp = row[0]
+                # "YYYY-mm-dd HH:MM:SS.mmm" en hora local: la parte de segundos se convierte una vez
+                prefix = stamp[:19]
+                if prefix != cached_prefix:
+                    try:
+                        cached_epoch = time.mktime(time.strptime(prefix, '%Y-%m-%d %H:%M:%S'))
+                    except ValueError:
+                        continue
+                    cached_prefix = prefix
+                try:
+                    ts = cached_epoch + int(stamp[20:23] or 0) / 1000.0
+                    values = {name: float(value) for name, value in zip(IMU_GPS_COLUMNS, row[1:])}
+                except ValueError:
+                    continue
+                yield ts, _EVENT_SAMPLE, 'sample', values
+
+
+def _request_periods(requests_csv):
+    """
+    Periodo en segundos con el que se solicita cada PID del servicio 01 según
+    solicitudes.csv: {pid: periodo}. Con el control adaptativo un PID puede
+    solicitarse hasta cada ADAPTIVE_MAX_PERIOD_MS.
+    """
+    periods = {}
+    try:
+        with open(requests_csv, mode='r', newline='') as csvfile:
+            for row in csv.DictReader(csvfile):
+                pid = parse_pid_request(row["ID"], row["Datos"])
+                if pid is None or int(row["Disparo Único"]):
+                    continue
+                period = int(row["Frecuencia"]) / 1000.0
+                if config.ADAPTIVE_REQUEST_RATE:
+                    period = max(period, config.ADAPTIVE_MAX_PERIOD_MS / 1000.0)
+                periods[pid] = min(period, periods.get(pid, period))
+    except (OSError, KeyError, ValueError) as e:
+        logging.warning(f"No se pudieron leer los periodos de solicitud de {requests_csv}: {e}")
+    return periods
+
+def _signal_gaps(decoder, max_gap):
+    """
+    Hueco máximo de cada señal OBD: FUSION_GAP_PERIODS veces su periodo de
+    solicitud, sin bajar de `max_gap`. Devuelve ({señal: hueco}, hueco por
+    defecto para las señales sin periodo conocido).
+    """
+    periods = _request_periods(config.OBD_REQUESTS_CSV)
+    default_gap = max([max_gap] + [period * config.FUSION_GAP_PERIODS for period in periods.values()])
+    gaps = {}
+    for names in decoder.numeric_signals().values():
+        for name in names:
+            match = _SIGNAL_PID_RE.match(name)
+            period = periods.get(int(match.group(1), 16)) if match else None
+            gaps[name] = max(max_gap, period * config.FUSION_GAP_PERIODS) if period else default_gap
+    return gaps, default_gap
+
+
+class _GridResampler:
+    """
+    Remuestrea las señales sobre una rejilla fija de `rate_hz` en streaming.
+    Por señal solo se guardan las muestras de la ventana de anticipación
+    (`max_gap`), de modo que la memoria no depende de la duración del log.
+    Con 'linear' se interpola entre la muestra anterior y la siguiente; con
+    'last' se repite el último valor. Una señal sin muestras en su hueco
+    máximo (`gaps`, o `max_gap` si no figura) queda vacía.
+    """
+    def __init__(self, rate_hz, method, max_gap, gaps=None):
+        self.rate_hz = rate_hz
+        self.method = method
+        self.max_gap = max_gap
+        self.gaps = dict(gaps or {})
+        self.lookahead = max([max_gap] + list(self.gaps.values())) if method == 'linear' else 0.0
+        self.columns = []
+        self._samples = {}
+        self._writer = None
+        self._tick = None
+
+    def register(self, names):
+        """Fija el orden de columnas conocidas de antemano (las de IMU/GPS van primero)."""
+        for name in names:
+            if name not in self._samples:
+                self._samples[name] = deque()
+                self.columns.append(name)
+
+    def open(self, writer, start_ts):
+        self._writer = writer
+        self._tick = math.ceil(start_ts * self.rate_hz)
+
+    def close(self, end_ts):
+        """Emite las filas pendientes hasta `end_ts` y deja de escribir."""
+        if self._writer is not None:
+            self._emit_until(end_ts, inclusive=True)
+        self._writer = None
+
+    def add(self, ts, values):
+        samples = self._samples
+        for name, value in values.items():
+            queue = samples.get(name)
+            if queue is None:
+                queue = samples[name] = deque()
+                self.columns.append(name)
+            queue.append((ts, value))
+            if self._writer is None:
+                # Fuera de sesión solo hace falta la última muestra de la ventana
+                gap = self.gaps.get(name, self.max_gap)
+                while len(queue) > 1 and queue[1][0] <= ts - gap:
+                    queue.popleft()
+        if self._writer is not None:
+            self._emit_until(ts - self.lookahead, inclusive=False)
+
+    def _emit_until(self, limit, inclusive):
+        while True:
+            tick_ts = self._tick / self.rate_hz
+            if tick_ts > limit or (tick_ts == limit and not inclusive):
+                break
+            self._writer.writerow([f"{tick_ts:.3f}"] + [self._value_at(name, tick_ts) for name in self.columns])
+            self._tick += 1
+
+    def _value_at(self, name, tick_ts):
+        queue = self._samples[name]
+        while len(queue) > 1 and queue[1][0] <= tick_ts:
+            queue.popleft()
+        if not queue or queue[0][0] > tick_ts:
+            return ''
+        prev_ts, prev_value = queue[0]
+        gap = self.gaps.get(name, self.max_gap)
+        if tick_ts - prev_ts > gap:
+            return ''
+        if self.method == 'linear' and len(queue) > 1:
+            next_ts, next_value = queue[1]
+            if next_ts - prev_ts <= gap:
+                return prev_value + (next_value - prev_value) * (tick_ts - prev_ts) / (next_ts - prev_ts)
+        return prev_value
+
+
+def _finish_session_table(tmp_path, output_path, columns):
+    """
+    Escribe la tabla final con la cabecera completa. Las columnas se descubren
+    sobre la marcha, así que las primeras filas del temporal pueden ser más
+    cortas: se completan con campos vacíos.
+    """
+    header = ["timestamp"] + columns
+    with open(tmp_path, 'r', newline='') as src, open(output_path, 'w', newline='') as dst:
+        writer = csv.writer(dst)
+        writer.writerow(header)
+        for row in csv.reader(src):
+            writer.writerow(row + [''] * (len(header) - len(row)))
+    os.remove(tmp_path)
+
+def imu_gps_paths_for_log(log_file_path):
+    """CSV de IMU/GPS que corresponden a un log CAN por la fecha de su nombre ([] si no hay)."""
+    base_name = os.path.splitext(os.path.basename(log_file_path))[0]
+    try:
+        log_date = datetime.strptime(base_name.split('_')[-1], '%Y%m%d')
+    except ValueError:
+        logging.warning(f"No se pudo deducir la fecha de {log_file_path}; no se fusiona con IMU/GPS.")
+        return []
+    return _imu_gps_csv_paths(log_date)
+
+
+class FusionWriter:
+    """
+    Alinea en el tiempo las señales OBD de un log CAN con los CSV de IMU/GPS:
+    recibe las filas de la decodificación del log (con sus valores, ver
+    log_processor.iter_decoded_entries) y las mezcla por timestamp (k-way
+    merge) con las muestras de IMU/GPS, remuestrea sobre una rejilla de
+    `rate_hz` y escribe una tabla CSV por sesión CAN en CSV_EXPORTS_DIR.
+    Ambos flujos usan el reloj del equipo (epoch de candump y hora local del
+    CSV). `max_gap` se aplica a IMU/GPS; cada señal OBD admite además huecos
+    acordes a su periodo de solicitud (ver _signal_gaps).
+    """
+    def __init__(self, log_file_path, decoder, imu_paths, rate_hz=None, method=None, max_gap=None):
+        rate_hz = rate_hz or config.FUSION_RATE_HZ
+        method = method or config.FUSION_METHOD
+        max_gap = max_gap or config.FUSION_MAX_GAP
+        if method not in ('linear', 'last'):
+            raise ValueError(f"Método de remuestreo no soportado: {method}")
+        gaps, default_gap = _signal_gaps(decoder, max_gap)
+        gaps.update((name, max_gap) for name in IMU_GPS_COLUMNS)
+
+        self.log_file_path = log_file_path
+        self._base_name = os.path.splitext(os.path.basename(log_file_path))[0]
+        self._wanted = set().union(*decoder.numeric_signals().values())
+        self._imu_events = _iter_imu_gps_events(imu_paths)
+        self._next_imu = next(self._imu_events, None)
+        self._resampler = _GridResampler(rate_hz, method, default_gap, gaps)
+        self._resampler.register(IMU_GPS_COLUMNS)
+        self._outputs = []
+        self._table = None # (archivo temporal, ruta final)
+        self._session_index = 0
+        # Cada sesión se abre con el timestamp de su primera trama y se cierra con el de la última
+        self._pending_session = None
+        self._last_ts = None
+
+    def add_entry(self, entry):
+        """Incorpora una fila de la decodificación del log (sesión o trama)."""
+        if entry['Message Name'] == 'SESIÓN:':
+            if self._last_ts is not None and self._pending_session is None:
+                self._merge(self._last_ts, _EVENT_END, 'end', None)
+            self._pending_session = entry['Decoded Data']
+            return
+
+        ts = float(entry['Timestamp'])
+        if self._pending_session is not None:
+            self._merge(ts, _EVENT_SESSION, 'session', self._pending_session)
+            self._pending_session = None
+        self._last_ts = ts
+
+        values = entry.get('Values')
+        if isinstance(values, dict):
+            sample = {name: value for name, value in values.items()
+                      if name in self._wanted and isinstance(value, (int, float))}
+            if sample:
+                self._merge(ts, _EVENT_SAMPLE, 'sample', sample)
+
+    def _merge(self, ts, order, kind, payload):
+        """Aplica antes las muestras de IMU/GPS anteriores; a igual clave, el log CAN va primero."""
+        while self._next_imu is not None and _event_key(self._next_imu) < (ts, order):
+            self._apply(*self._next_imu)
+            self._next_imu = next(self._imu_events, None)
+        self._apply(ts, order, kind, payload)
+
+    def _apply(self, ts, _, kind, payload):
+        resampler = self._resampler
+        if kind == 'sample':
+            resampler.add(ts, payload)
+        elif kind == 'session':
+            self._session_index += 1
+            session_name = payload.split()[0] if payload.split() else str(self._session_index)
+            output_path = os.path.join(config.CSV_EXPORTS_DIR, f"{self._base_name}_{session_name}_fusion.csv")
+            tmp_file = open(output_path + '.tmp', 'w', newline='')
+            self._table = (tmp_file, output_path)
+            resampler.open(csv.writer(tmp_file), ts)
+        elif self._table is not None:
+            resampler.close(ts)
+            tmp_file, output_path = self._table
+            tmp_file.close()
+            _finish_session_table(tmp_file.name, output_path, resampler.columns)
+            self._outputs.append(output_path)
+            self._table = None
+
+    def close(self):
+        """Cierra la última sesión y devuelve las rutas de las tablas generadas."""
+        if self._last_ts is not None and self._pending_session is None:
+            self._merge(self._last_ts, _EVENT_END, 'end', None)
+        logging.info(f"Fusión CAN + IMU/GPS de {os.path.basename(self.log_file_path)}: {len(self._outputs)} tablas.")
+        return self._outputs
+
+    def abort(self):
+        """Descarta la tabla a medio escribir (si falla la decodificación)."""
+        if self._table is not None:
+            self._table[0].close()
+            os.remove(self._table[0].name)
+            self._table = None
+
+
+def open_fusion(log_file_path, decoder, **options):
+    """FusionWriter para un log, o None si no hay datos de IMU/GPS de su día con que fusionarlo."""
+    imu_paths = imu_gps_paths_for_log(log_file_path)
+    if not imu_paths:
+        logging.info(f"Sin datos de IMU/GPS para {os.path.basename(log_file_path)}; no se genera la fusión.")
+        return None
+    return FusionWriter(log_file_path, decoder, imu_paths, **options)
+
+def fuse_log(log_file_path, decoder, rate_hz=None, method=None, max_gap=None):
+    """
+    Fusión de un log ya procesado, con su propia pasada de decodificación (el
+    procesado normal la genera en la misma pasada que el CSV, ver
+    log_processor.process_log_file). Devuelve las rutas generadas.
+    """
+    fusion = open_fusion(log_file_path, decoder, rate_hz=rate_hz, method=method, max_gap=max_gap)
+    if fusion is None:
+        return []
+    try:
+        for entry in iter_log_file_entries(log_file_path, decoder, OBDDataExtractor(), with_values=True):
+            fusion.add_entry(entry)
+    except BaseException:
+        fusion.abort()
+        raise
+    return fusion.close()
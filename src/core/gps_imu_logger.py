@@ -3,28 +3,266 @@ import serial
 import csv
 import os
 import re
+import mmap
 import time
+import struct
+import select
+import binascii
 import logging
 import threading
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import config
+from src.core.telemetry import telemetry_bus
+
+# --- Protocolo binario del ESP32 ---
+# Trama: sync (AA 55) | longitud (B) | carga útil | CRC-16/CCITT-FALSE (<H)
+# El CRC se calcula sobre el byte de longitud y la carga útil. Carga útil:
+#   secuencia (H) | accel x,y,z (3f, m/s2) | gyro x,y,z (3f, rad/s) |
+#   latitud, longitud (2i, en 1e-7 grados, como los receptores GNSS)
+# 39 bytes por muestra frente a ~60 de la línea de texto equivalente.
+FRAME_SYNC = b"\xaa\x55"
+FRAME_PAYLOAD = struct.Struct("<H6f2i")
+COORDINATE_SCALE = 1e-7
+_FRAME_CRC = struct.Struct("<H")
+_FRAME_HEADER_SIZE = len(FRAME_SYNC) + 1
+FRAME_SIZE = _FRAME_HEADER_SIZE + FRAME_PAYLOAD.size + _FRAME_CRC.size
+
+# Columnas de datos del CSV (tras el timestamp); también son los nombres en la telemetría en vivo
+CSV_COLUMNS = [
+    "accel_x_m_s2", "accel_y_m_s2", "accel_z_m_s2",
+    "gyro_x_rad_s", "gyro_y_rad_s", "gyro_z_rad_s", "latitude", "longitude"
+]
+
+
+class BinaryFrameParser:
+    """
+    Extrae tramas binarias del flujo serie sobre un único bytearray reutilizado.
+    Si la longitud o el CRC no cuadran, descarta un byte y busca el siguiente
+    sync, de modo que se resincroniza tras cualquier corrupción.
+    """
+    def __init__(self):
+        self._buffer = bytearray()
+        self.crc_errors = 0
+        self.lost_frames = 0
+        self._last_sequence = None
+
+    def reset(self):
+        self._buffer.clear()
+        self._last_sequence = None
+
+    def feed(self, data):
+        """Añade bytes recibidos y devuelve la lista de muestras completas (tuplas de FRAME_PAYLOAD)."""
+        buffer = self._buffer
+        buffer += data
+        samples = []
+        pos = 0
+        end = len(buffer)
+        while True:
+            pos = buffer.find(FRAME_SYNC, pos)
+            if pos < 0:
+                # Conservar un posible primer byte de sync al final
+                pos = end - 1 if end and buffer[-1] == FRAME_SYNC[0] else end
+                break
+            if end - pos < FRAME_SIZE:
+                break
+            length = buffer[pos + 2]
+            crc_end = _FRAME_HEADER_SIZE + FRAME_PAYLOAD.size
+            if length != FRAME_PAYLOAD.size or \
+                    binascii.crc_hqx(buffer[pos + 2:pos + crc_end], 0xFFFF) != _FRAME_CRC.unpack_from(buffer, pos + crc_end)[0]:
+                self.crc_errors += 1
+                pos += 1
+                continue
+            sample = FRAME_PAYLOAD.unpack_from(buffer, pos + _FRAME_HEADER_SIZE)
+            self._track_sequence(sample[0])
+            samples.append(sample)
+            pos += FRAME_SIZE
+        del buffer[:pos]
+        return samples
+
+    def _track_sequence(self, sequence):
+        if self._last_sequence is not None:
+            self.lost_frames += (sequence - self._last_sequence - 1) & 0xFFFF
+        self._last_sequence = sequence
+
+
+def build_frame(sequence, accel, gyro, latitude, longitude):
+    """Construye una trama binaria (referencia para el firmware y para pruebas)."""
+    payload = FRAME_PAYLOAD.pack(sequence & 0xFFFF, *accel, *gyro,
+                                 round(latitude / COORDINATE_SCALE), round(longitude / COORDINATE_SCALE))
+    body = bytes([FRAME_PAYLOAD.size]) + payload
+    return FRAME_SYNC + body + _FRAME_CRC.pack(binascii.crc_hqx(body, 0xFFFF))
+
+
+# --- Índice de sesiones de los CSV diarios ---
+# Junto a cada CSV diario se guarda `<csv>.idx` con una línea por sesión:
+#   número de sesión,offset en bytes de su cabecera,hora de inicio
+# La entrada se escribe antes que la cabecera en el CSV, así que una entrada
+# sin cabecera en su offset (corte de corriente) delata un índice a reconstruir.
+SESSION_INDEX_SUFFIX = ".idx"
+_SESSION_HEADER_RE = re.compile(r'===== Sesión (\d+) - ([^=\r\n]*?) ====='.encode('utf-8'))
+
+def session_index_path(csv_path):
+    return csv_path + SESSION_INDEX_SUFFIX
+
+def _session_header_prefix(session_num):
+    return f"===== Sesión {session_num} ".encode('utf-8')
+
+def _index_matches_csv(csv_path, entry):
+    """Comprueba que en el offset de la entrada está la cabecera de esa sesión."""
+    session_num, offset, _ = entry
+    prefix = _session_header_prefix(session_num)
+    with open(csv_path, 'rb') as f:
+        f.seek(offset)
+        return f.read(len(prefix)) == prefix
+
+def _scan_sessions(csv_path):
+    """Reconstruye el índice recorriendo el CSV completo (solo si falta o no cuadra)."""
+    if os.path.getsize(csv_path) == 0:
+        return []
+    with open(csv_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return [(int(m.group(1)), m.start(), m.group(2).decode('utf-8', errors='replace'))
+                for m in _SESSION_HEADER_RE.finditer(mm)]
+
+def _write_session_index(csv_path, entries):
+    index_path = session_index_path(csv_path)
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.writelines(f"{n},{offset},{start}\n" for n, offset, start in entries)
+    os.replace(tmp_path, index_path)
+
+def _append_session_index(csv_path, entry):
+    with open(session_index_path(csv_path), 'a') as f:
+        f.write("{},{},{}\n".format(*entry))
+        f.flush()
+        os.fsync(f.fileno())
+
+def read_session_index(csv_path):
+    """
+    Devuelve [(sesión, offset, inicio)] de un CSV diario de IMU/GPS leyendo solo
+    su índice. Si el índice falta o no coincide con el CSV, se reconstruye una vez.
+    """
+    if not os.path.exists(csv_path):
+        return []
+    entries = []
+    index_path = session_index_path(csv_path)
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, 'r') as f:
+                for line in f:
+                    session_num, offset, start = line.rstrip('\n').split(',', 2)
+                    entries.append((int(session_num), int(offset), start))
+            if not entries or _index_matches_csv(csv_path, entries[-1]):
+                return entries
+        except ValueError:
+            pass
+        logging.warning(f"Índice de sesiones inválido para {csv_path}, se reconstruye.")
+    entries = _scan_sessions(csv_path)
+    _write_session_index(csv_path, entries)
+    return entries
+
+def iter_session_rows(csv_path, session_num):
+    """
+    Filas de datos (listas de campos) de una sesión, leyendo el CSV desde el
+    offset de su cabecera sin recorrer las sesiones anteriores.
+    """
+    entries = read_session_index(csv_path)
+    offsets = [offset for n, offset, _ in entries]
+    for i, (n, offset, _) in enumerate(entries):
+        if n != session_num:
+            continue
+        end = offsets[i + 1] if i + 1 < len(offsets) else None
+        with open(csv_path, 'rb') as f:
+            f.seek(offset)
+            lines = (raw_line.decode('utf-8', errors='replace') for raw_line in _iter_until(f, end))
+            next(lines, None) # Cabecera de sesión
+            next(lines, None) # Cabecera de columnas
+            yield from csv.reader(lines)
+        return
+
+def _iter_until(f, end):
+    """Líneas de un archivo binario desde la posición actual hasta el offset `end` (None = final)."""
+    position = f.tell()
+    for raw_line in f:
+        if end is not None and position >= end:
+            break
+        position += len(raw_line)
+        yield raw_line
+
+
+class _BufferedCSVLog:
+    """
+    Escritor CSV con búfer y política de volcado configurable: se vuelca a disco
+    cada `flush_rows` filas, cada `flush_interval` segundos o al cerrar/rotar,
+    y opcionalmente se hace fsync cada `fsync_interval` segundos para acotar
+    lo que se pierde en un corte de corriente sin desgastar la tarjeta SD.
+    """
+    def __init__(self, file_path, flush_rows, flush_interval, fsync_interval=None, buffer_size=64 * 1024):
+        self.file_path = file_path
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self._file = open(file_path, mode='a', newline='', buffering=buffer_size)
+        self._writer = csv.writer(self._file)
+        self._pending_rows = 0
+        self._last_flush = time.monotonic()
+        self._last_fsync = self._last_flush
+
+    def writerow(self, row):
+        self._writer.writerow(row)
+        self._pending_rows += 1
+        if self._pending_rows >= self.flush_rows:
+            self.flush()
+
+    def maybe_flush(self):
+        """Aplica los volcados por tiempo; se llama también cuando no llegan datos."""
+        now = time.monotonic()
+        if self._pending_rows and now - self._last_flush >= self.flush_interval:
+            self.flush()
+        if self.fsync_interval and now - self._last_fsync >= self.fsync_interval:
+            self.flush(fsync=True)
+
+    def flush(self, fsync=False):
+        self._file.flush()
+        self._pending_rows = 0
+        self._last_flush = time.monotonic()
+        if fsync:
+            os.fsync(self._file.fileno())
+            self._last_fsync = self._last_flush
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush(fsync=bool(self.fsync_interval))
+        self._file.close()
+
 
 class GPSIMULogger:
     """
     Gestiona la lectura de datos de un módulo IMU/GPS a través del puerto serie
     y los guarda en archivos CSV organizados por fecha.
     """
+    READ_WAIT = 0.2          # Segundos máximos bloqueado en select() (permite parar y volcar por tiempo)
+    MAX_LINE_LENGTH = 4096   # Bytes máximos de una línea de texto sin fin de línea
+
     def __init__(self):
         self.serial_port = config.GPS_IMU_SERIAL_PORT
         self.baud_rate = config.GPS_IMU_BAUD_RATE
+        self.serial_format = config.GPS_IMU_SERIAL_FORMAT
+        self._frame_parser = BinaryFrameParser()
+        self._line_buffer = bytearray()
         
         self._running = False
         self._thread = None
         self.serial_conn = None
-        self.csv_file = None
-        self.csv_writer = None
+        self.csv_log = None
         self.current_log_date = None
+        self._next_rotation = 0.0 # Epoch de la próxima medianoche (rotación diaria)
+        self._timestamp_second = None
+        self._timestamp_prefix = ""
+        self._sample_period = 1.0 / config.IMU_GPS_SAMPLE_RATE_HZ
+        self._last_sequence = None # Secuencia y epoch de la última muestra binaria
+        self._last_sample_time = 0.0
         
         logging.info("GPS/IMU Logger inicializado.")
 
@@ -52,8 +290,8 @@ class GPSIMULogger:
         
         if self.serial_conn and self.serial_conn.is_open:
             self.serial_conn.close()
-        if self.csv_file:
-            self.csv_file.close()
+        if self.csv_log:
+            self.csv_log.close()
             
         logging.info("Logger GPS/IMU detenido.")
 
@@ -64,6 +302,8 @@ class GPSIMULogger:
         """Prepara el archivo CSV para el día actual, creando directorios si es necesario."""
         now = datetime.now()
         self.current_log_date = now.strftime('%Y%m%d')
+        tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        self._next_rotation = tomorrow.timestamp()
         year_folder = now.strftime('%Y')
         month_folder = now.strftime('%m') # Solo el mes
 
@@ -72,28 +312,30 @@ class GPSIMULogger:
         
         file_path = os.path.join(log_path, f"{self.current_log_date}_IMU_GPS_DATA.csv")
 
-        # Determinar número de sesión
+        # Determinar número de sesión a partir del índice (sin leer el CSV)
         session_num = 1
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r') as f:
-                    content = f.read()
-                    sessions = re.findall(r'===== Sesión (\d+)', content, re.MULTILINE)
-                    if sessions:
-                        session_num = int(sessions[-1]) + 1
-            except Exception as e:
-                logging.error(f"No se pudo leer el archivo de log para determinar la sesión: {e}")
-
-        self.csv_file = open(file_path, mode='a', newline='')
-        self.csv_writer = csv.writer(self.csv_file)
-
-        session_header = f"===== Sesión {session_num} - {now.strftime('%Y-%m-%d %H:%M:%S')} ====="
-        self.csv_writer.writerow([session_header])
-        self.csv_writer.writerow([
-            "timestamp", "accel_x_m_s2", "accel_y_m_s2", "accel_z_m_s2",
-            "gyro_x_rad_s", "gyro_y_rad_s", "gyro_z_rad_s", "latitude", "longitude"
-        ])
-        self.csv_file.flush()
+        try:
+            sessions = read_session_index(file_path)
+            if sessions:
+                session_num = sessions[-1][0] + 1
+        except Exception as e:
+            logging.error(f"No se pudo leer el índice de sesiones del log: {e}")
+
+        session_start = now.strftime('%Y-%m-%d %H:%M:%S')
+        offset = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        _append_session_index(file_path, (session_num, offset, session_start))
+
+        self.csv_log = _BufferedCSVLog(
+            file_path,
+            flush_rows=config.IMU_GPS_FLUSH_ROWS,
+            flush_interval=config.IMU_GPS_FLUSH_INTERVAL_MS / 1000.0,
+            fsync_interval=config.IMU_GPS_FSYNC_INTERVAL
+        )
+
+        session_header = f"===== Sesión {session_num} - {session_start} ====="
+        self.csv_log.writerow([session_header])
+        self.csv_log.writerow(["timestamp"] + CSV_COLUMNS)
+        self.csv_log.flush()
         logging.info(f"Registrando datos de GPS/IMU en {file_path}, Sesión {session_num}")
 
     def _connect_serial(self):
@@ -107,6 +349,9 @@ class GPSIMULogger:
 
                 self.serial_conn = serial.Serial(self.serial_port, self.baud_rate, timeout=1)
                 self.serial_conn.reset_input_buffer()
+                self._frame_parser.reset()
+                self._line_buffer.clear()
+                self._last_sequence = None
                 logging.info(f"Conectado exitosamente a {self.serial_port}.")
                 return True
             except serial.SerialException as e:
@@ -114,6 +359,96 @@ class GPSIMULogger:
                 time.sleep(5)
         return False
 
+    def _format_timestamp(self, now):
+        """
+        Equivale a datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+        pero la parte de fecha y hora solo se formatea una vez por segundo.
+        """
+        millis = int(now * 1000)
+        second = millis // 1000
+        if second != self._timestamp_second:
+            self._timestamp_second = second
+            self._timestamp_prefix = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second))
+        return f"{self._timestamp_prefix}.{millis % 1000:03d}"
+
+    def _binary_sample_times(self, now, sequences):
+        """
+        Epoch de cada trama binaria de un bloque leído a partir de su número de
+        secuencia: la última se fecha con la hora de lectura y el resto hacia
+        atrás, a un periodo de muestreo por secuencia (las tramas perdidas dejan
+        hueco). Si así se solaparía con el bloque anterior, se continúa desde
+        la última trama de aquel, de modo que los timestamps siempre crecen.
+        """
+        period = self._sample_period
+        last = sequences[-1]
+        times = [now - ((last - sequence) & 0xFFFF) * period for sequence in sequences]
+        if self._last_sequence is not None and times[0] <= self._last_sample_time:
+            times = [self._last_sample_time + ((sequence - self._last_sequence) & 0xFFFF) * period
+                     for sequence in sequences]
+        self._last_sequence, self._last_sample_time = last, times[-1]
+        return times
+
+    def _wait_for_data(self, timeout):
+        """Bloquea sobre el descriptor del puerto serie hasta que haya datos o venza `timeout`."""
+        readable, _, _ = select.select([self.serial_conn.fileno()], [], [], timeout)
+        return bool(readable)
+
+    def _handle_text_chunk(self, chunk, now):
+        """Separa las líneas completas del bloque leído; la última, si está incompleta, queda en el búfer."""
+        self._line_buffer += chunk
+        if b'\n' not in chunk:
+            if len(self._line_buffer) > self.MAX_LINE_LENGTH:
+                logging.warning("Línea demasiado larga sin fin de línea, se descarta.")
+                self._line_buffer.clear()
+            return
+        *lines, rest = self._line_buffer.split(b'\n')
+        self._line_buffer = bytearray(rest)
+        rows = []
+        for raw_line in lines:
+            line = raw_line.decode('utf-8', errors='replace').strip()
+            if line:
+                parts = line.split(',')
+                if len(parts) == 8: # 3 accel, 3 gyro, 2 gps
+                    rows.append(parts)
+                else:
+                    logging.warning(f"Trama malformada recibida: {line}")
+        # Las líneas de texto no traen marca de tiempo del dispositivo: se fechan con la hora de lectura
+        timestamp = self._format_timestamp(now)
+        for parts in rows:
+            self.csv_log.writerow([timestamp] + parts)
+        if rows and telemetry_bus.has_listeners():
+            for parts in rows:
+                try:
+                    self._publish_sample(now, [float(value) for value in parts])
+                except ValueError:
+                    pass
+
+    def _handle_binary_chunk(self, chunk, now):
+        """Escribe una fila por cada trama binaria válida del bloque leído."""
+        crc_errors = self._frame_parser.crc_errors
+        samples = self._frame_parser.feed(chunk)
+        if self._frame_parser.crc_errors != crc_errors:
+            logging.warning(f"Datos binarios corruptos descartados ({self._frame_parser.crc_errors} en total).")
+        if not samples:
+            return
+        times = self._binary_sample_times(now, [sample[0] for sample in samples])
+        for sample_time, (_, ax, ay, az, gx, gy, gz, latitude, longitude) in zip(times, samples):
+            self.csv_log.writerow([
+                self._format_timestamp(sample_time), f"{ax:.6g}", f"{ay:.6g}", f"{az:.6g}",
+                f"{gx:.6g}", f"{gy:.6g}", f"{gz:.6g}", f"{latitude * COORDINATE_SCALE:.7f}", f"{longitude * COORDINATE_SCALE:.7f}"
+            ])
+        if telemetry_bus.has_listeners():
+            for sample_time, (_, *values, latitude, longitude) in zip(times, samples):
+                self._publish_sample(sample_time, values + [latitude * COORDINATE_SCALE, longitude * COORDINATE_SCALE])
+
+    def _publish_sample(self, now, values):
+        """
+        Publica una muestra en la telemetría en vivo. Se publican todas: el
+        historial de señales las guarda con su timestamp y cada suscripción
+        (SSE) ya se queda solo con el último valor si el cliente va lento.
+        """
+        telemetry_bus.publish(dict(zip(CSV_COLUMNS, values)), now)
+
     def _logging_loop(self):
         """Bucle principal que lee del puerto serie y escribe en el archivo."""
         if not self._connect_serial():
@@ -125,24 +460,23 @@ class GPSIMULogger:
         while self._running:
             try:
                 # Comprobar si es un nuevo día para rotar el archivo de log
-                if datetime.now().strftime('%Y%m%d') != self.current_log_date:
-                    self.csv_file.close()
+                now = time.time()
+                if now >= self._next_rotation:
+                    self.csv_log.close()
                     self._initialize_log_file()
 
-                if self.serial_conn and self.serial_conn.in_waiting > 0:
-                    line = self.serial_conn.readline().decode('utf-8').strip()
-                    if line:
-                        parts = line.split(',')
-                        if len(parts) == 8: # 3 accel, 3 gyro, 2 gps
-                            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-                            self.csv_writer.writerow([timestamp] + parts)
-                            self.csv_file.flush()
-                        else:
-                            logging.warning(f"Trama malformada recibida: {line}")
-                else:
-                    time.sleep(0.05) # Pequeña pausa si no hay datos
+                # Esperar en el descriptor y vaciar de una vez todo lo recibido
+                if self._wait_for_data(self.READ_WAIT):
+                    chunk = self.serial_conn.read(self.serial_conn.in_waiting or 1)
+                    now = time.time()
+                    if self.serial_format == "binary":
+                        self._handle_binary_chunk(chunk, now)
+                    else:
+                        self._handle_text_chunk(chunk, now)
+                self.csv_log.maybe_flush()
 
-            except serial.SerialException as e:
+            except (serial.SerialException, OSError) as e:
+                # select()/read() sobre el descriptor de un dispositivo desconectado dan OSError
                 logging.error(f"Error de puerto serie: {e}. Intentando reconectar...")
                 if self.serial_conn: self.serial_conn.close()
                 self._connect_serial()
@@ -0,0 +1,126 @@
+# ./src/core/live_decoder.py
+import csv
+import time
+import queue
+import logging
+import threading
+
+import cantools
+
+import config
+from src.core.log_processor import (
+    OBDDataExtractor, decode_can_values, format_csv_entry, CSV_FIELDNAMES, CSV_HEADER
+)
+from src.core.telemetry import telemetry_bus
+
+# Respuesta OBD-II de una sola trama al servicio 01 (datos en vivo): 7E8 [long] 41 PID ...
+OBD_RESPONSE_ID = 0x7E8
+OBD_LIVE_DATA_RESPONSE = 0x41
+
+class LiveDecoder:
+    """
+    Etapa de decodificación en vivo de las tramas capturadas por OBDLogger.
+    El hilo de captura solo encola (submit() nunca bloquea: si la cola de
+    LIVE_DECODE_QUEUE_SIZE tramas está llena, la trama se descarta aquí y sigue
+    en el log en bruto). Un hilo consumidor decodifica con el DBC y con
+    OBDDataExtractor (VIN, CVN, DTC), publica las señales del servicio 01 en el
+    bus de telemetría y, si se indica `csv_path`, anexa las filas a un CSV con
+    el mismo formato que genera log_processor.
+    """
+    FLUSH_INTERVAL = 1.0 # Segundos entre volcados del CSV a disco
+
+    def __init__(self, decoder, csv_path=None, queue_size=None):
+        self.decoder = decoder
+        self.csv_path = csv_path
+        self.extractor = OBDDataExtractor()
+        self._live_signals = decoder.numeric_signals()
+        self._queue = queue.Queue(maxsize=queue_size or config.LIVE_DECODE_QUEUE_SIZE)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._csv_file = None
+        self._writer = None
+        self.decoded = 0
+        self.dropped = 0
+
+    def start(self, session_header):
+        """Abre el CSV (si hay), escribe la fila de sesión y arranca el hilo consumidor."""
+        if self.csv_path:
+            self._csv_file = open(self.csv_path, 'a', newline='')
+            if self._csv_file.tell() == 0:
+                self._csv_file.write(CSV_HEADER)
+            self._writer = csv.DictWriter(self._csv_file, fieldnames=CSV_FIELDNAMES, extrasaction='ignore', delimiter='|')
+            self._csv_file.write(f" | | SESIÓN: | {session_header}\n")
+        self.extractor.reset_session()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._consume_loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, timestamp, can_id, data):
+        """Listener del bus CAN: encola la trama sin bloquear el hilo de captura."""
+        try:
+            self._queue.put_nowait((timestamp, can_id, data))
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logging.warning(f"Cola de decodificación en vivo llena: {self.dropped} tramas sin decodificar.")
+
+    def stop(self):
+        """Decodifica lo que quede en la cola, detiene el hilo y cierra el CSV."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            if self._thread.is_alive():
+                logging.error("El hilo de decodificación en vivo no se detuvo correctamente.")
+            self._thread = None
+        if self._csv_file:
+            self._csv_file.close()
+            self._csv_file = None
+        logging.info(f"Decodificación en vivo detenida: {self.decoded} tramas, {self.dropped} descartadas.")
+
+    def _consume_loop(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                item = None
+                if self._stop_event.is_set():
+                    break
+            if item is not None:
+                try:
+                    self._decode(*item)
+                except Exception as e:
+                    logging.error(f"Error en la decodificación en vivo: {e}")
+
+            now = time.monotonic()
+            if self._csv_file and (item is None or now - last_flush >= self.FLUSH_INTERVAL):
+                self._csv_file.flush()
+                last_flush = now
+
+    def _decode(self, timestamp, can_id, data):
+        try:
+            results = decode_can_values(can_id, data, self.decoder, self.extractor)
+        except (KeyError, cantools.database.errors.DecodeError):
+            results = [('Desconocido', data.hex().upper())]
+        except ValueError:
+            return
+        self.decoded += 1
+
+        # Respuestas del servicio 01: de una sola trama (07 41 ...) o una respuesta
+        # con varios PIDs que el extractor acaba de completar, ya separada por PID
+        single_frame = len(data) > 1 and data[0] <= 7 and data[1] == OBD_LIVE_DATA_RESPONSE
+        if can_id == OBD_RESPONSE_ID and (single_frame or self.extractor.pid_response_complete):
+            wanted = self._live_signals.get(can_id, ())
+            values = {}
+            for _, decoded_data in results:
+                if isinstance(decoded_data, dict):
+                    values.update((name, value) for name, value in decoded_data.items()
+                                  if name in wanted and isinstance(value, (int, float)))
+            if values:
+                telemetry_bus.publish(values, timestamp)
+
+        if self._writer:
+            # Mismo formato que candump -ta (ver CANBusEngine.format_frame)
+            can_id_str = f"{can_id:08X}" if can_id > 0x7FF else f"{can_id:03X}"
+            for message_name, decoded_data in results:
+                self._writer.writerow(format_csv_entry(f"{timestamp:.6f}", can_id_str, message_name, decoded_data))
@@ -1,38 +1,73 @@
 # ./src/core/log_processor.py
 import os
+import re
 import glob
+import json
+import hashlib
+import mmap
+import shutil
 import cantools
 import csv
 import logging
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 
 import config
+from src.core.dbc_decoder import DBCDecoder
+from src.core.binary_can_log import BinaryCANLogReader, BINARY_LOG_EXTENSION, FLAG_EXTENDED_ID, is_binary_log
+from src.core import columnar_export
+from src.core.processed_manifest import ProcessedManifest
+from src.core.obd_batch import split_pid_response, PID_DATA_LENGTHS, LIVE_DATA_RESPONSE
 
 class OBDDataExtractor:
     """
     Una clase para extraer datos OBD especiales (VIN, CVN, DTCs) de tramas CAN,
-    gestionando el estado interno para mensajes multi-trama como el VIN.
+    gestionando el estado interno para mensajes multi-trama como el VIN o las
+    respuestas del servicio 01 con varios PIDs (ver obd_batch).
     """
     def __init__(self):
         self.vin_buffer = []
         self.vin_completed = False
+        self.pid_buffer = bytearray()
+        self.pid_length = 0
+        self.pid_next_seq = 0
+        self.pid_response_complete = False # La última trama completó una respuesta multi-PID
 
     def reset_session(self):
         """Reinicia el estado para una nueva sesión de logging."""
         self.vin_buffer = []
         self.vin_completed = False
+        self.pid_buffer = bytearray()
+
+    def get_state(self):
+        """
+        Copia del estado multi-trama (VIN y respuesta multi-PID en curso) para
+        retomarlo en otro punto del log. Solo contiene listas y números, así que
+        se puede guardar en JSON (estado incremental) o pasar a otro proceso.
+        """
+        return ([list(segment) for segment in self.vin_buffer], self.vin_completed,
+                list(self.pid_buffer), self.pid_length, self.pid_next_seq)
+
+    def set_state(self, state):
+        """Restaura un estado obtenido con get_state() (también leído de JSON)."""
+        vin_buffer, self.vin_completed, pid_buffer, self.pid_length, self.pid_next_seq = state
+        self.vin_buffer = [bytes(segment) for segment in vin_buffer]
+        self.pid_buffer = bytearray(pid_buffer)
 
     def extract(self, can_id, data):
         """
         Intenta extraer datos especiales. Devuelve un diccionario si tiene éxito,
         o None si no es una trama de interés.
         """
+        self.pid_response_complete = False
         if can_id != 0x7E8 or len(data) < 3:
             return None
 
         # --- VIN (modo 09 PID 02) ---
         # Primera trama (First Frame)
-        if data[0] == 0x10 and len(data) > 3 and data[3] == 0x02:
+        if data[0] == 0x10 and len(data) > 3 and data[2] == 0x49 and data[3] == 0x02:
             self.vin_buffer = [data[3:]]
             self.vin_completed = False
             return None
@@ -49,6 +84,12 @@ class OBDDataExtractor:
                 self.vin_buffer = [] # Limpiar para la próxima vez
                 return {'type': 'VIN', 'data': vin}
             return None
+
+        # --- Respuestas del servicio 01 con varios PIDs ---
+        pid_frames = self._extract_pid_response(data)
+        if pid_frames is not None:
+            self.pid_response_complete = bool(pid_frames)
+            return {'type': 'PIDS', 'frames': pid_frames}
         
         # Otros datos, modo y pid están en diferentes posiciones
         mode, pid = data[1], data[2]
@@ -79,18 +120,136 @@ class OBDDataExtractor:
 
         return None
 
+    def _extract_pid_response(self, data):
+        """
+        Reensambla (ISO-TP) las respuestas 41 con varios PIDs y las separa en
+        tramas de un solo PID. Devuelve la lista de tramas (vacía en las tramas
+        intermedias) o None si la trama no forma parte de una respuesta así.
+        """
+        frame_type = data[0] >> 4
+        if frame_type == 1 and data[2] == LIVE_DATA_RESPONSE:
+            # First Frame: 12 bits de longitud y los primeros 6 bytes del mensaje
+            self.pid_length = ((data[0] & 0x0F) << 8) | data[1]
+            self.pid_buffer = bytearray(data[2:])
+            self.pid_next_seq = 1
+            self.vin_buffer = [] # Una nueva respuesta de la ECU aborta la anterior
+            return []
+        if frame_type == 2 and self.pid_buffer:
+            if data[0] & 0x0F != self.pid_next_seq:
+                # Falta una trama consecutiva: la respuesta se descarta
+                self.pid_buffer = bytearray()
+                return []
+            self.pid_buffer += data[1:]
+            self.pid_next_seq = (self.pid_next_seq + 1) & 0x0F
+            if len(self.pid_buffer) < self.pid_length:
+                return []
+            payload, self.pid_buffer = bytes(self.pid_buffer[:self.pid_length]), bytearray()
+            return split_pid_response(payload)
+        if data[0] <= 7 and data[1] == LIVE_DATA_RESPONSE:
+            # Trama única: solo interesa si lleva más de un PID
+            frames = split_pid_response(data[1:1 + data[0]])
+            if len(frames) > 1:
+                return frames
+        return None
+
+
+# --- Registro de archivos procesados ---
+# Solo se leen las líneas de trama que pueden contener un ID (candump -ta)
+_FRAME_ID_RE = re.compile(rb'^[ \t]*\([^)\n]*\)[ \t]+\S+[ \t]+([0-9A-Fa-f]+)', re.MULTILINE)
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+def _file_hash(path):
+    """Hash BLAKE2b del contenido de un archivo, leído por bloques."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
 
-def _get_processed_files():
-    """Lee la lista de archivos ya procesados."""
-    if os.path.exists(config.PROCESSED_FILES_LOG):
-        with open(config.PROCESSED_FILES_LOG, 'r') as f:
-            return set(f.read().splitlines())
-    return set()
+def _scan_frame_ids(log_file_path):
+    """Conjunto de frame ids presentes en un log (texto o binario)."""
+    if is_binary_log(log_file_path):
+        with BinaryCANLogReader(log_file_path) as reader:
+            return set(np.unique(reader.records['can_id']).tolist())
+    if os.path.getsize(log_file_path) == 0:
+        return set()
+    with open(log_file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return {int(can_id, 16) for can_id in set(_FRAME_ID_RE.findall(mm))}
 
-def _mark_file_as_processed(filename):
-    """Añade un archivo a la lista de procesados."""
-    with open(config.PROCESSED_FILES_LOG, 'a') as f:
-        f.write(f"{os.path.basename(filename)}\n")
+def _describe_log(log_file_path):
+    """Tamaño, mtime, hash e IDs presentes de un log, tomados antes de procesarlo."""
+    stat = os.stat(log_file_path)
+    return {
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'content_hash': _file_hash(log_file_path),
+        'frame_ids': _scan_frame_ids(log_file_path),
+    }
+
+def _dbc_fingerprint(decoder, frame_ids):
+    """Huella de las definiciones del DBC que afectan a los IDs de un log."""
+    digest = hashlib.blake2b(digest_size=20)
+    for frame_id in sorted(frame_ids):
+        digest.update(f"{frame_id}:{decoder.message_fingerprint(frame_id)}\n".encode())
+    return digest.hexdigest()
+
+def _needs_processing(manifest, log_file, dbc_version, decoder):
+    """
+    Decide si un log debe (re)procesarse según el registro:
+    - sin entrada: sí;
+    - entrada importada de processed_files.txt (sin metadatos): en su primer uso
+      se completa con el hash, los IDs y la huella del DBC con que se procesó, y
+      a partir de ahí se compara como cualquier otra;
+    - tamaño o mtime distintos: solo si el hash del contenido ha cambiado;
+    - otro DBC: solo si cambia alguno de los mensajes de los IDs del log.
+    """
+    entry = manifest.get(log_file)
+    if entry is None:
+        return True
+    if entry['content_hash'] is None:
+        return _complete_legacy_entry(manifest, log_file, entry, dbc_version, decoder)
+
+    stat = os.stat(log_file)
+    if stat.st_size != entry['size'] or stat.st_mtime != entry['mtime']:
+        if stat.st_size != entry['size'] or _file_hash(log_file) != entry['content_hash']:
+            return True
+        manifest.update(log_file, mtime=stat.st_mtime)
+
+    if entry['dbc_version'] != dbc_version:
+        frame_ids = json.loads(entry['frame_ids'])
+        if _dbc_fingerprint(decoder, frame_ids) != entry['dbc_fingerprint']:
+            logging.info(f"El cambio de DBC afecta a {os.path.basename(log_file)}, se reprocesará.")
+            return True
+        manifest.update(log_file, dbc_version=dbc_version)
+    return False
+
+def _complete_legacy_entry(manifest, log_file, entry, dbc_version, decoder):
+    """
+    Completa una entrada importada de processed_files.txt con los metadatos del
+    log actual. La huella solo se puede calcular con el DBC con que se procesó:
+    si la entrada no tiene versión (importada por versiones anteriores) o es la
+    actual, se toma el DBC cargado; si el DBC ya cambió, no hay con qué comparar
+    y el log se reprocesa.
+    """
+    if entry['dbc_version'] not in (None, dbc_version):
+        logging.info(f"{os.path.basename(log_file)} se procesó antes del registro y el DBC ha cambiado, se reprocesará.")
+        return True
+    description = _describe_log(log_file)
+    manifest.record(
+        log_file, description['size'], description['mtime'], description['content_hash'],
+        dbc_version, _dbc_fingerprint(decoder, description['frame_ids']),
+        description['frame_ids'], json.loads(entry['outputs'] or 'null')
+    )
+    return False
+
+def _record_processed(manifest, log_file, description, dbc_version, decoder, outputs):
+    """Registra un log procesado y descarta su estado incremental (el CSV completo lo sustituye)."""
+    manifest.record(
+        log_file, description['size'], description['mtime'], description['content_hash'],
+        dbc_version, _dbc_fingerprint(decoder, description['frame_ids']),
+        description['frame_ids'], outputs
+    )
+    _forget_incremental_state(log_file)
 
 def _transform_log_line(line):
     """Transforma el formato de log de candump al formato (timestamp, id, data)."""
@@ -105,114 +264,806 @@ def _transform_log_line(line):
     except (IndexError, ValueError):
         return None
 
-def process_log_file(log_file_path, db, extractor):
-    """Procesa un único archivo de log y lo convierte a CSV."""
-    log_filename = os.path.basename(log_file_path)
-    csv_filename = log_filename.replace('.log', '.csv')
-    output_csv_path = os.path.join(config.CSV_EXPORTS_DIR, csv_filename)
+CSV_FIELDNAMES = ['Timestamp', 'CAN ID', 'Message Name', 'Decoded Data']
+CSV_HEADER = "Timestamp | CAN ID | Message Name | Decoded Data\n"
+
+def _iter_log_records(lines):
+    """
+    Etapa de parseo: recorre las líneas del log y produce tuplas
+    ('session', cabecera) o ('frame', (timestamp, id, data_hex)).
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        # Detectar cabecera de sesión
+        if " " in line and not line.startswith("("):
+            yield 'session', line
+            continue
+
+        # Procesar línea de datos CAN
+        transformed = _transform_log_line(line)
+        if transformed:
+            yield 'frame', transformed
+
+def _decode_frame(timestamp, can_id_str, data_hex, decoder, extractor, with_values=False):
+    """
+    Etapas de extracción y decodificación de una trama de texto. Devuelve las
+    filas del CSV (ninguna si la línea tiene un formato inválido).
+    """
+    try:
+        can_id_int = int(can_id_str, 16)
+        data_bytes = bytes.fromhex(data_hex)
+    except ValueError:
+        # Error de formato en ID o datos
+        return []
+    return _decode_can_frame(timestamp, can_id_str, can_id_int, data_bytes, decoder, extractor, with_values)
+
+def decode_can_values(can_id_int, data_bytes, decoder, extractor):
+    """
+    Extracción y decodificación de una trama ya convertida a enteros/bytes.
+    Devuelve una lista de (nombre_mensaje, valores), con un diccionario de
+    señales para los mensajes del DBC o el texto extraído para VIN, CVN y DTC.
+    Normalmente tiene un elemento; las respuestas con varios PIDs dan uno por
+    PID al completarse y ninguno en sus tramas intermedias.
+    Lanza KeyError/DecodeError si la trama no se puede decodificar.
+    """
+    # Intentar extraer datos especiales (VIN, CVN, DTC, respuestas multi-PID)
+    special_data = extractor.extract(can_id_int, data_bytes)
+    if special_data:
+        if special_data['type'] == 'PIDS':
+            return _decode_pid_frames(can_id_int, special_data['frames'], decoder)
+        if special_data['type'] == 'DTC':
+            dtc_type = "Almacenados" if special_data['mode'] == 0x43 else "Pendientes"
+            return [(f'DTC {dtc_type}', special_data['data'])]
+        return [(special_data['type'], special_data['data'])]
+
+    # Decodificar con el plan precompilado del DBC (fallback a cantools)
+    return [decoder.decode(can_id_int, data_bytes)]
 
-    decoded_entries = []
+def _decode_pid_frames(can_id_int, frames, decoder):
+    """Decodifica con el DBC las tramas de un solo PID separadas de una respuesta multi-PID."""
+    results = []
+    for frame in frames:
+        try:
+            results.append(decoder.decode(can_id_int, frame))
+        except (KeyError, ValueError, cantools.database.errors.DecodeError):
+            continue # PID sin definir en el DBC: queda solo en el log en bruto
+    return results
 
+def _decode_can_frame(timestamp, can_id_str, can_id_int, data_bytes, decoder, extractor, with_values=False):
+    """
+    Filas del CSV para una trama ya convertida a enteros/bytes. Con `with_values`
+    cada fila decodificada lleva además en 'Values' el resultado sin formatear
+    (diccionario de señales o texto de VIN/CVN/DTC).
+    """
+    try:
+        results = decode_can_values(can_id_int, data_bytes, decoder, extractor)
+    except (KeyError, cantools.database.errors.DecodeError):
+        # ID no encontrado en DBC o error de decodificación
+        return [{
+            'Timestamp': timestamp,
+            'CAN ID': can_id_str,
+            'Message Name': 'Desconocido',
+            'Decoded Data': data_bytes.hex().upper()
+        }]
+    except ValueError:
+        # Error de formato en ID o datos
+        return []
+    entries = [format_csv_entry(timestamp, can_id_str, message_name, decoded_data)
+               for message_name, decoded_data in results]
+    if with_values:
+        for entry, (_, decoded_data) in zip(entries, results):
+            entry['Values'] = decoded_data
+    return entries
+
+def format_csv_entry(timestamp, can_id_str, message_name, decoded_data):
+    """Fila del CSV a partir de un resultado de decode_can_values()."""
+    if isinstance(decoded_data, dict):
+        decoded_data = ", ".join([f"{key}: {value}" for key, value in decoded_data.items()])
+    return {
+        'Timestamp': timestamp,
+        'CAN ID': can_id_str,
+        'Message Name': message_name,
+        'Decoded Data': decoded_data
+    }
+
+def iter_decoded_entries(lines, decoder, extractor, with_values=False):
+    """
+    Generador que encadena parseo -> extracción -> decodificación y produce
+    las filas del CSV a medida que se leen las líneas, sin acumularlas en memoria.
+    Con `with_values` las filas decodificadas llevan también los valores sin
+    formatear en 'Values' (ver _decode_can_frame), que el CSV ignora.
+    """
+    if config.LOG_BATCH_SIZE > 0:
+        return iter_decoded_batches(_iter_text_batches(lines, config.LOG_BATCH_SIZE), decoder, extractor, with_values)
+    return iter_decoded_records(_iter_log_records(lines), decoder, extractor, with_values)
+
+def iter_decoded_records(records, decoder, extractor, with_values=False):
+    """
+    Como iter_decoded_entries, pero a partir de registros ya parseados:
+    ('session', cabecera), ('frame', (timestamp, id_str, data_hex)) del texto de
+    candump o ('raw', (timestamp, id_str, id, datos)) del log binario.
+    """
+    if config.LOG_BATCH_SIZE > 0:
+        batches = _iter_record_batches(records, config.LOG_BATCH_SIZE)
+        yield from iter_decoded_batches(batches, decoder, extractor, with_values)
+        return
+
+    for kind, payload in records:
+        if kind == 'session':
+            extractor.reset_session()
+            yield {'Message Name': 'SESIÓN:', 'Decoded Data': payload}
+            continue
+
+        if kind == 'raw':
+            yield from _decode_can_frame(*payload, decoder, extractor, with_values)
+        else:
+            yield from _decode_frame(*payload, decoder, extractor, with_values)
+
+def iter_log_file_entries(log_file_path, decoder, extractor, with_values=False):
+    """Filas decodificadas de un log completo, de texto o binario."""
+    if is_binary_log(log_file_path):
+        with BinaryCANLogReader(log_file_path) as reader:
+            yield from _iter_binary_entries(reader, decoder, extractor, with_values=with_values)
+        return
     with open(log_file_path, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
+        yield from iter_decoded_entries(f, decoder, extractor, with_values)
 
-            # Detectar cabecera de sesión
-            if " " in line and not line.startswith("("):
-                extractor.reset_session()
-                decoded_entries.append({'Message Name': 'SESIÓN:', 'Decoded Data': line})
-                continue
-            
-            # Procesar línea de datos CAN
-            transformed = _transform_log_line(line)
-            if not transformed:
-                continue
-            
-            timestamp, can_id_str, data_hex = transformed
-            
+# --- Decodificación por lotes (NumPy) ---
+# Un lote es una tupla (sesiones, timestamps, ids_str, tramas, ids, datos, longitudes):
+# `sesiones` es una lista de (fila, cabecera) con las sesiones que empiezan antes
+# de esa fila del lote, `tramas` los bytes originales de cada trama (o None si
+# pueden reconstruirse de `datos`), `ids` un array (n,), `datos` una matriz
+# (n, 8) uint8 y `longitudes` el número de bytes de cada trama.
+
+def _iter_record_batches(records, batch_size):
+    """Agrupa los registros parseados en lotes de hasta `batch_size` tramas."""
+    sessions, timestamps, id_strs, frames, frame_ids = [], [], [], [], []
+    for kind, payload in records:
+        if kind == 'session':
+            sessions.append((len(frames), payload))
+            continue
+        if kind == 'raw':
+            timestamp, can_id_str, can_id_int, data_bytes = payload
+        else:
+            timestamp, can_id_str, data_hex = payload
             try:
                 can_id_int = int(can_id_str, 16)
                 data_bytes = bytes.fromhex(data_hex)
-                
-                # Intentar extraer datos especiales (VIN, CVN, DTC)
-                special_data = extractor.extract(can_id_int, data_bytes)
-                if special_data:
-                    entry = {'Timestamp': timestamp, 'CAN ID': can_id_str}
-                    if special_data['type'] == 'VIN':
-                        entry.update({'Message Name': 'VIN', 'Decoded Data': special_data['data']})
-                    elif special_data['type'] == 'CVN':
-                        entry.update({'Message Name': 'CVN', 'Decoded Data': special_data['data']})
-                    elif special_data['type'] == 'DTC':
-                        dtc_type = "Almacenados" if special_data['mode'] == 0x43 else "Pendientes"
-                        entry.update({'Message Name': f'DTC {dtc_type}', 'Decoded Data': special_data['data']})
-                    decoded_entries.append(entry)
-                    continue
-
-                # Decodificar con DBC
-                message = db.get_message_by_frame_id(can_id_int)
-                decoded_data = message.decode(data_bytes)
-                
-                pretty_data = ", ".join([f"{key}: {value}" for key, value in decoded_data.items()])
-                decoded_entries.append({
-                    'Timestamp': timestamp,
-                    'CAN ID': can_id_str,
-                    'Message Name': message.name,
-                    'Decoded Data': pretty_data
-                })
-
-            except (KeyError, cantools.database.errors.DecodeError):
-                # ID no encontrado en DBC o error de decodificación
-                decoded_entries.append({
-                    'Timestamp': timestamp,
-                    'CAN ID': can_id_str,
-                    'Message Name': 'Desconocido',
-                    'Decoded Data': data_hex.upper()
-                })
             except ValueError:
                 # Error de formato en ID o datos
                 continue
-    
-    # Escribir el archivo CSV
-    with open(output_csv_path, 'w', newline='') as csvfile:
-        fieldnames = ['Timestamp', 'CAN ID', 'Message Name', 'Decoded Data']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore', delimiter='|')
-        
-        # Escribir un encabezado simple
-        csvfile.write("Timestamp | CAN ID | Message Name | Decoded Data\n")
-        
-        for entry in decoded_entries:
-            # Manejo especial para la línea de sesión
-            if entry.get('Message Name') == 'SESIÓN:':
-                csvfile.write(f" | | {entry['Message Name']} | {entry['Decoded Data']}\n")
+        timestamps.append(timestamp)
+        id_strs.append(can_id_str)
+        frames.append(data_bytes)
+        frame_ids.append(can_id_int)
+        if len(frames) >= batch_size:
+            yield _build_batch(sessions, timestamps, id_strs, frames, frame_ids)
+            sessions, timestamps, id_strs, frames, frame_ids = [], [], [], [], []
+    if frames or sessions:
+        yield _build_batch(sessions, timestamps, id_strs, frames, frame_ids)
+
+def _iter_text_batches(lines, batch_size):
+    """
+    Equivalente a _iter_record_batches(_iter_log_records(lines)) con el parseo
+    de cada línea reducido a un único split().
+    """
+    sessions, timestamps, id_strs, frames, frame_ids = [], [], [], [], []
+    for line in lines:
+        parts = line.split()
+        if not parts:
+            continue
+        if not parts[0].startswith('('):
+            line = line.strip()
+            if " " in line:
+                sessions.append((len(frames), line))
+            continue
+        if len(parts) < 4:
+            continue
+        try:
+            can_id_int = int(parts[2], 16)
+            data_bytes = bytes.fromhex(''.join(parts[4:]))
+        except ValueError:
+            continue
+        timestamps.append(parts[0].strip('()'))
+        id_strs.append(parts[2])
+        frames.append(data_bytes)
+        frame_ids.append(can_id_int)
+        if len(frames) >= batch_size:
+            yield _build_batch(sessions, timestamps, id_strs, frames, frame_ids)
+            sessions, timestamps, id_strs, frames, frame_ids = [], [], [], [], []
+    if frames or sessions:
+        yield _build_batch(sessions, timestamps, id_strs, frames, frame_ids)
+
+def _build_batch(sessions, timestamps, id_strs, frames, frame_ids):
+    lengths = np.fromiter((len(d) for d in frames), dtype=np.int64, count=len(frames))
+    padded = b''.join(d[:8].ljust(8, b'\x00') for d in frames)
+    data = np.frombuffer(padded, dtype=np.uint8).reshape(-1, 8)
+    return sessions, timestamps, id_strs, frames, np.array(frame_ids, dtype=np.int64), data, lengths
+
+def _iter_binary_batches(reader, batch_size, start_record=0, start_session=0):
+    """Lotes tomados directamente del array de registros del log binario, sin desempaquetar."""
+    records = reader.records
+    sessions = list(reader.sessions[start_session:])
+    for start in range(start_record, max(reader.record_count, start_record + 1), batch_size):
+        end = min(start + batch_size, reader.record_count)
+        if end == reader.record_count:
+            # Las sesiones sin tramas al final del archivo van en el último lote
+            end_sessions, sessions = sessions, []
+        else:
+            end_sessions = [s for s in sessions if s[0] < end]
+            sessions = sessions[len(end_sessions):]
+        chunk = records[start:end]
+        extended = (chunk['flags'] & FLAG_EXTENDED_ID).astype(bool).tolist()
+        frame_ids = chunk['can_id'].astype(np.int64)
+        yield (
+            [(index - start, text) for index, text in end_sessions],
+            [f"{t:.6f}" for t in chunk['timestamp'].tolist()],
+            [f"{i:08X}" if ext else f"{i:03X}" for i, ext in zip(frame_ids.tolist(), extended)],
+            None,
+            frame_ids,
+            np.ascontiguousarray(chunk['data']),
+            chunk['dlc'].astype(np.int64),
+        )
+
+# Bytes de datos por PID del servicio 01 (255 si se desconoce) para detectar
+# respuestas de una sola trama con varios PIDs
+_PID_DATA_LENGTH_TABLE = np.full(256, 0xFF, dtype=np.int64)
+_PID_DATA_LENGTH_TABLE[list(PID_DATA_LENGTHS)] = list(PID_DATA_LENGTHS.values())
+
+def _may_be_special(frame_ids, data, lengths):
+    """
+    Máscara de las tramas que OBDDataExtractor podría consumir (VIN, CVN, DTC y
+    respuestas multi-PID: tramas ISO-TP o tramas únicas con más de un PID).
+    El resto devuelve None en extract() sin modificar su estado.
+    """
+    multi_pid = ((data[:, 1] == LIVE_DATA_RESPONSE) & (data[:, 0] <= 7) &
+                 (data[:, 0] > _PID_DATA_LENGTH_TABLE[data[:, 2]] + 2))
+    return ((frame_ids == 0x7E8) & (lengths >= 3) &
+            ((data[:, 0] >> 4 == 1) | (data[:, 0] >> 4 == 2) | multi_pid |
+             np.isin(data[:, 1], (0x43, 0x47, 0x49))))
+
+def iter_decoded_batches(batches, decoder, extractor, with_values=False):
+    """
+    Decodifica lotes de tramas con DBCDecoder.decode_batch (una operación
+    vectorizada por PID y señal) y produce las mismas filas del CSV, en el mismo
+    orden, que la decodificación trama a trama. Las tramas de VIN/CVN/DTC y las
+    que el plan no cubre pasan por OBDDataExtractor y decode() como siempre.
+    """
+    for sessions, timestamps, id_strs, frames, frame_ids, data, lengths in batches:
+        n = len(timestamps)
+        names = [None] * n
+        pretty = [None] * n
+        row_values = [None] * n if with_values else None
+        if n:
+            covered, groups = decoder.decode_batch(frame_ids, data, lengths)
+            for message_name, rows, columns in groups:
+                # Texto "señal: valor" de cada columna y unión por filas
+                signal_names = [signal for signal, _ in columns]
+                value_lists = [values.tolist() for _, values in columns]
+                parts = [[f"{signal}: {value}" for value in values] for signal, values in zip(signal_names, value_lists)]
+                row_list = rows.tolist()
+                for row, text in zip(row_list, map(", ".join, zip(*parts))):
+                    names[row] = message_name
+                    pretty[row] = text
+                if with_values:
+                    for row, values in zip(row_list, zip(*value_lists)):
+                        row_values[row] = dict(zip(signal_names, values))
+            special = _may_be_special(frame_ids, data, lengths)
+            # IDs ausentes del DBC: fila 'Desconocido' sin pasar por decode()
+            known_ids = [i for i in np.unique(frame_ids).tolist() if decoder.is_known(i)]
+            unknown = ~np.isin(frame_ids, known_ids) & ~special
+            for row in np.flatnonzero(unknown).tolist():
+                names[row] = 'Desconocido'
+                pretty[row] = (frames[row] if frames is not None else data[row, :lengths[row]].tobytes()).hex().upper()
+            per_frame = (~(covered | unknown) | special).tolist()
+            frame_id_list = frame_ids.tolist()
+
+        next_session = 0
+        for i in range(n):
+            while next_session < len(sessions) and sessions[next_session][0] <= i:
+                extractor.reset_session()
+                yield {'Message Name': 'SESIÓN:', 'Decoded Data': sessions[next_session][1]}
+                next_session += 1
+
+            if per_frame[i]:
+                data_bytes = frames[i] if frames is not None else data[i, :lengths[i]].tobytes()
+                yield from _decode_can_frame(timestamps[i], id_strs[i], frame_id_list[i], data_bytes,
+                                             decoder, extractor, with_values)
+            elif with_values and row_values[i] is not None:
+                yield {'Timestamp': timestamps[i], 'CAN ID': id_strs[i],
+                       'Message Name': names[i], 'Decoded Data': pretty[i], 'Values': row_values[i]}
             else:
-                writer.writerow(entry)
+                yield {'Timestamp': timestamps[i], 'CAN ID': id_strs[i],
+                       'Message Name': names[i], 'Decoded Data': pretty[i]}
+
+        for _, header in sessions[next_session:]:
+            extractor.reset_session()
+            yield {'Message Name': 'SESIÓN:', 'Decoded Data': header}
+
+def write_csv_entries(csvfile, entries, write_header=True):
+    """Etapa de escritura: vuelca las filas en el CSV conforme llegan."""
+    writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDNAMES, extrasaction='ignore', delimiter='|')
+
+    # Escribir un encabezado simple
+    if write_header:
+        csvfile.write(CSV_HEADER)
+
+    for entry in entries:
+        # Manejo especial para la línea de sesión
+        if entry.get('Message Name') == 'SESIÓN:':
+            csvfile.write(f" | | {entry['Message Name']} | {entry['Decoded Data']}\n")
+        else:
+            writer.writerow(entry)
+
+def _iter_binary_entries(reader, decoder, extractor, start_record=0, start_session=0, with_values=False):
+    """Filas del CSV de un log binario, por lotes o trama a trama según LOG_BATCH_SIZE."""
+    if config.LOG_BATCH_SIZE > 0:
+        batches = _iter_binary_batches(reader, config.LOG_BATCH_SIZE, start_record, start_session)
+        return iter_decoded_batches(batches, decoder, extractor, with_values)
+    return iter_decoded_records(reader.iter_records(start_record, start_session), decoder, extractor, with_values)
+
+def _feed_sinks(entries, sinks):
+    """Pasa cada fila decodificada a las salidas adicionales antes de escribirla en el CSV."""
+    for entry in entries:
+        for sink in sinks:
+            sink.add_entry(entry)
+        yield entry
+
+def _open_sinks(log_file_path, decoder):
+    """
+    Salidas que se alimentan de la misma pasada de decodificación que el CSV
+    (exportación columnar y fusión). Cada una ofrece add_entry(fila),
+    close() -> rutas generadas y abort().
+    """
+    sinks = []
+    if config.COLUMNAR_EXPORT_FORMAT:
+        if columnar_export.is_available():
+            sinks.append(_ColumnarSink(log_file_path, decoder))
+        else:
+            logging.error("pyarrow no está instalado: se omite la exportación columnar.")
+    if config.FUSION_EXPORT:
+        # Import diferido: fusion.py importa este módulo
+        from src.core.fusion import open_fusion
+        fusion = open_fusion(log_file_path, decoder)
+        if fusion is not None:
+            sinks.append(fusion)
+    return sinks
+
+def process_log_file(log_file_path, decoder, extractor, workers=1):
+    """
+    Procesa un único archivo de log y lo convierte a CSV usando el DBCDecoder precompilado.
+    Las filas se escriben en streaming, así que la memoria no depende del tamaño del log.
+    Con `workers` > 1 y un archivo grande, el log se divide en trozos que se
+    decodifican en paralelo (ver _write_csv_chunked). Los logs binarios (.bin)
+    se leen directamente con BinaryCANLogReader. Devuelve las rutas generadas.
+    """
+    log_filename = os.path.basename(log_file_path)
+    csv_filename = os.path.splitext(log_filename)[0] + '.csv'
+    output_csv_path = os.path.join(config.CSV_EXPORTS_DIR, csv_filename)
+    # Se escribe en un temporal para no dejar un CSV a medias si el proceso falla
+    tmp_csv_path = output_csv_path + '.tmp'
+    # Las salidas adicionales se alimentan de esta misma pasada, que entonces no se
+    # divide en trozos paralelos (cada trozo se decodifica en otro proceso)
+    sinks = _open_sinks(log_file_path, decoder)
+    outputs = [output_csv_path]
+
+    try:
+        if is_binary_log(log_file_path):
+            # El log binario se lee sin parsear texto, directamente desde el mmap
+            with BinaryCANLogReader(log_file_path) as reader, open(tmp_csv_path, 'w', newline='') as csvfile:
+                entries = _iter_binary_entries(reader, decoder, extractor, with_values=bool(sinks))
+                write_csv_entries(csvfile, _feed_sinks(entries, sinks))
+        elif not sinks and workers > 1 and os.path.getsize(log_file_path) >= config.LOG_CHUNK_MIN_BYTES:
+            _write_csv_chunked(log_file_path, tmp_csv_path, extractor, workers)
+        else:
+            with open(log_file_path, 'r') as f, open(tmp_csv_path, 'w', newline='') as csvfile:
+                entries = iter_decoded_entries(f, decoder, extractor, with_values=bool(sinks))
+                write_csv_entries(csvfile, _feed_sinks(entries, sinks))
+        os.replace(tmp_csv_path, output_csv_path)
+        for sink in sinks:
+            outputs.extend(sink.close())
+        sinks = []
+    finally:
+        for sink in sinks:
+            sink.abort()
+        if os.path.exists(tmp_csv_path):
+            os.remove(tmp_csv_path)
 
     logging.info(f"Archivo CSV generado en: {output_csv_path}")
+    return outputs
+
+class _ColumnarSink:
+    """
+    Exportación Parquet/Feather con una columna tipada por señal del DBC (ver
+    columnar_export.ColumnarWriter), junto al CSV en CSV_EXPORTS_DIR, a partir
+    de las mismas filas decodificadas que el CSV. Las tramas que no se pueden
+    decodificar no tienen señales y se omiten.
+    """
+    def __init__(self, log_file_path, decoder, fmt=None):
+        self.fmt = fmt or config.COLUMNAR_EXPORT_FORMAT
+        base_name = os.path.splitext(os.path.basename(log_file_path))[0]
+        self.output_path = os.path.join(config.CSV_EXPORTS_DIR, base_name + columnar_export.COLUMNAR_EXTENSIONS[self.fmt])
+        self._tmp_path = self.output_path + '.tmp'
+        self._writer = columnar_export.ColumnarWriter(decoder.db, self._tmp_path, fmt=self.fmt)
+
+    def add_entry(self, entry):
+        self._writer.add_entry(entry)
+
+    def close(self):
+        self._writer.close()
+        os.replace(self._tmp_path, self.output_path)
+        logging.info(f"Exportación {self.fmt} generada en: {self.output_path} ({self._writer.rows_written} filas)")
+        return [self.output_path]
+
+    def abort(self):
+        self._writer.abort()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+def export_columnar(log_file_path, decoder, extractor, fmt=None):
+    """
+    Exporta a Parquet/Feather un log ya procesado, con su propia pasada de
+    decodificación (el procesado normal la genera en la misma pasada que el
+    CSV, ver process_log_file). Devuelve la ruta generada o None.
+    """
+    if not columnar_export.is_available():
+        logging.error("pyarrow no está instalado: se omite la exportación columnar.")
+        return None
+    sink = _ColumnarSink(log_file_path, decoder, fmt)
+    try:
+        for entry in iter_log_file_entries(log_file_path, decoder, extractor, with_values=True):
+            sink.add_entry(entry)
+    except BaseException:
+        sink.abort()
+        raise
+    return sink.close()[0]
+
+
+# --- Procesamiento en paralelo ---
+# Cada proceso del pool carga el DBC una sola vez en su inicializador.
+_worker_decoder = None
+
+def _init_worker(dbc_file):
+    """Inicializador de los procesos del pool: construye el decodificador DBC."""
+    global _worker_decoder
+    _worker_decoder = DBCDecoder.from_file(dbc_file)
+
+def _process_file_in_worker(log_file):
+    """
+    Procesa un archivo dentro de un proceso del pool con un extractor propio.
+    Devuelve la descripción del log (tomada antes de procesarlo) y las salidas.
+    """
+    description = _describe_log(log_file)
+    outputs = process_log_file(log_file, _worker_decoder, OBDDataExtractor())
+    return description, outputs
+
+# --- Decodificación de un único archivo por trozos ---
+# Líneas que pueden alterar el estado del OBDDataExtractor: cabeceras de sesión
+# (no empiezan por '(') y tramas 0x7E8 ISO-TP, es decir, cuyo primer byte es 1x
+# (First Frame) o 2x (Consecutive Frame): VIN y respuestas multi-PID. Es un
+# superconjunto: cada candidata se clasifica después con la misma lógica que el
+# procesado normal.
+_EXTRACTOR_STATE_LINE_RE = re.compile(
+    rb'^[ \t]*[^(\s][^\n]*$|^[^\n]*?\s0*7[eE]8\s+\S+\s+[12]\s*[0-9A-Fa-f][^\n]*$',
+    re.MULTILINE
+)
+
+def _scan_extractor_state_lines(mm):
+    """Devuelve [(offset, línea)] de las líneas candidatas a modificar el estado del extractor."""
+    return [(m.start(), m.group().decode()) for m in _EXTRACTOR_STATE_LINE_RE.finditer(mm)]
+
+def _compute_chunk_boundaries(mm, size, n_chunks, session_offsets):
+    """
+    Calcula los puntos de corte. Cada corte ideal (tamaño/n) se desplaza a la
+    cabecera de sesión más cercana si hay una a menos del 10% del tamaño de trozo;
+    si no, se realinea al comienzo de la línea siguiente.
+    """
+    chunk_size = size // n_chunks
+    window = chunk_size // 10
+    boundaries = []
+    for i in range(1, n_chunks):
+        ideal = i * chunk_size
+        nearby = [o for o in session_offsets if abs(o - ideal) <= window]
+        if nearby:
+            boundary = min(nearby, key=lambda o: abs(o - ideal))
+        else:
+            newline = mm.find(b'\n', ideal)
+            boundary = newline + 1 if newline != -1 else size
+        if 0 < boundary < size and (not boundaries or boundary > boundaries[-1]):
+            boundaries.append(boundary)
+    return boundaries
+
+def _extractor_states_at(state_lines, boundaries, extractor):
+    """
+    Reproduce sobre `extractor` solo las líneas que afectan a su estado y guarda
+    una copia del estado (get_state()) en cada punto de corte. Al terminar, el
+    extractor queda en el estado final del archivo, igual que en el modo secuencial.
+    """
+    states = []
+    pending = list(boundaries)
+    for offset, line in state_lines:
+        while pending and pending[0] <= offset:
+            states.append(extractor.get_state())
+            pending.pop(0)
+        for kind, payload in _iter_log_records((line,)):
+            if kind == 'session':
+                extractor.reset_session()
+                continue
+            _, can_id_str, data_hex = payload
+            try:
+                extractor.extract(int(can_id_str, 16), bytes.fromhex(data_hex))
+            except ValueError:
+                continue
+    for _ in pending:
+        states.append(extractor.get_state())
+    return states
+
+def _iter_byte_range(f, end):
+    """Itera las líneas de un archivo binario desde la posición actual hasta `end`."""
+    position = f.tell()
+    for raw_line in f:
+        if position >= end:
+            break
+        position += len(raw_line)
+        yield raw_line.decode()
+
+def _process_chunk_in_worker(log_file, start, end, extractor_state, part_path):
+    """Decodifica el rango [start, end) del log partiendo del estado del extractor indicado."""
+    extractor = OBDDataExtractor()
+    extractor.set_state(extractor_state)
+    with open(log_file, 'rb') as f, open(part_path, 'w', newline='') as out:
+        f.seek(start)
+        entries = iter_decoded_entries(_iter_byte_range(f, end), _worker_decoder, extractor)
+        write_csv_entries(out, entries, write_header=False)
+    return part_path
 
+def _write_csv_chunked(log_file_path, output_path, extractor, workers):
+    """
+    Divide un log grande en trozos (en cabeceras de sesión o en offsets
+    realineados a comienzo de línea), los decodifica en paralelo y concatena
+    los resultados en orden. El estado multi-trama (VIN y respuestas multi-PID) se calcula en cada
+    corte con una pasada previa sobre las pocas líneas que lo modifican, de modo
+    que la salida es idéntica a la del procesado secuencial.
+    """
+    size = os.path.getsize(log_file_path)
+    with open(log_file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        state_lines = _scan_extractor_state_lines(mm)
+        session_offsets = [
+            offset for offset, line in state_lines
+            if any(kind == 'session' for kind, _ in _iter_log_records((line,)))
+        ]
+        boundaries = _compute_chunk_boundaries(mm, size, workers, session_offsets)
+
+    # El primer trozo arranca con el estado que tuviera el extractor recibido
+    initial_states = [extractor.get_state()]
+    initial_states += _extractor_states_at(state_lines, boundaries, extractor)
+    starts = [0] + boundaries
+    ends = boundaries + [size]
+    part_paths = [f"{output_path}.part{i}" for i in range(len(starts))]
+    logging.info(f"Decodificando {os.path.basename(log_file_path)} en {len(starts)} trozos.")
+
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(starts)),
+                                 initializer=_init_worker, initargs=(config.DBC_FILE,)) as pool:
+            futures = [
+                pool.submit(_process_chunk_in_worker, log_file_path, start, end, state, part)
+                for start, end, state, part in zip(starts, ends, initial_states, part_paths)
+            ]
+            for future in futures:
+                future.result()
+
+        with open(output_path, 'w', newline='') as out:
+            out.write(CSV_HEADER)
+            for part in part_paths:
+                with open(part, 'r', newline='') as part_file:
+                    shutil.copyfileobj(part_file, out)
+    finally:
+        for part in part_paths:
+            if os.path.exists(part):
+                os.remove(part)
+
+def _process_files_parallel(files_to_process, workers, manifest, dbc_version, decoder):
+    """
+    Reparte los archivos entre un pool de procesos acotado. El registro de
+    procesados lo actualiza solo el proceso principal, en orden de finalización,
+    así que el fallo de un archivo no afecta al progreso de los demás.
+    Si un proceso muere (p.ej. por falta de memoria), los archivos afectados
+    se reintentan una vez en un pool nuevo.
+    """
+    pending = sorted(files_to_process)
+    for attempt in range(2):
+        if not pending:
+            break
+        broken = []
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending)),
+                                 initializer=_init_worker, initargs=(config.DBC_FILE,)) as pool:
+            futures = {pool.submit(_process_file_in_worker, f): f for f in pending}
+            for future in as_completed(futures):
+                log_file = futures[future]
+                try:
+                    description, outputs = future.result()
+                    _record_processed(manifest, log_file, description, dbc_version, decoder, outputs)
+                    logging.info(f"Completado: {os.path.basename(log_file)}")
+                except BrokenProcessPool:
+                    broken.append(log_file)
+                except Exception as e:
+                    logging.error(f"Fallo al procesar el archivo {log_file}: {e}", exc_info=True)
+        if broken and attempt == 0:
+            logging.warning(f"El pool de procesos se interrumpió. Reintentando {len(broken)} archivos.")
+        elif broken:
+            logging.error(f"No se pudieron procesar {len(broken)} archivos: {', '.join(broken)}")
+        pending = broken
+
+# --- Procesado incremental del log del día ---
+# Por cada log en curso se guarda en INCREMENTAL_STATE_FILE hasta dónde se ha
+# decodificado (bytes del log de texto, o registros y sesiones del log binario),
+# el estado del OBDDataExtractor y el tamaño del CSV tras la última pasada.
+
+def _load_incremental_state():
+    if os.path.exists(config.INCREMENTAL_STATE_FILE):
+        try:
+            with open(config.INCREMENTAL_STATE_FILE, 'r') as f:
+                return json.load(f)
+        except (ValueError, OSError) as e:
+            logging.warning(f"Estado incremental ilegible, se reprocesarán los logs del día: {e}")
+    return {}
+
+def _save_incremental_state(state):
+    """Guarda el estado de forma atómica (temporal + os.replace)."""
+    tmp_path = config.INCREMENTAL_STATE_FILE + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, config.INCREMENTAL_STATE_FILE)
+
+def _forget_incremental_state(filename):
+    """Descarta el estado incremental de un log que ya se ha procesado completo."""
+    state = _load_incremental_state()
+    if state.pop(os.path.basename(filename), None) is not None:
+        _save_incremental_state(state)
 
-def process_pending_logs():
+def process_log_incremental(log_file_path, decoder, state):
+    """
+    Decodifica solo lo añadido al log desde la última llamada y lo anexa a su CSV.
+    `state` es el diccionario de estados incrementales (se actualiza in situ).
+    En los logs de texto se ignora la última línea si aún no está completa.
+    Devuelve True si había datos nuevos.
+    """
+    log_filename = os.path.basename(log_file_path)
+    output_csv_path = os.path.join(config.CSV_EXPORTS_DIR, os.path.splitext(log_filename)[0] + '.csv')
+    file_state = state.get(log_filename)
+
+    # Empezar de cero si no hay estado, si el CSV no coincide con lo registrado,
+    # si el log ha encogido (archivo sustituido) o si el estado es de un formato anterior
+    if file_state is not None:
+        csv_size = os.path.getsize(output_csv_path) if os.path.exists(output_csv_path) else -1
+        if 'extractor' not in file_state or csv_size < file_state['csv_size'] or \
+                os.path.getsize(log_file_path) < file_state['log_size']:
+            logging.warning(f"El CSV o el log de {log_filename} no coinciden con el estado incremental, se regenera.")
+            file_state = None
+        elif csv_size > file_state['csv_size']:
+            # Filas de una pasada interrumpida antes de guardar el estado
+            with open(output_csv_path, 'r+') as csvfile:
+                csvfile.truncate(file_state['csv_size'])
+    if file_state is None:
+        file_state = {'offset': 0, 'sessions': 0, 'log_size': 0, 'csv_size': 0,
+                      'extractor': OBDDataExtractor().get_state()}
+
+    offset, sessions = file_state['offset'], file_state['sessions']
+    reader = None
+    if is_binary_log(log_file_path):
+        reader = BinaryCANLogReader(log_file_path)
+        new_offset, new_sessions = reader.record_count, len(reader.sessions)
+    else:
+        # Solo hasta el último salto de línea: la línea final puede estar a medias
+        new_offset, new_sessions = offset, 0
+        if os.path.getsize(log_file_path) > offset:
+            with open(log_file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                new_offset = max(offset, mm.rfind(b'\n', offset) + 1)
+    if (new_offset, new_sessions) == (offset, sessions):
+        if reader:
+            reader.close()
+        return False
+
+    extractor = OBDDataExtractor()
+    extractor.set_state(file_state['extractor'])
+    is_new_csv = offset == 0 and sessions == 0
+
+    try:
+        with open(output_csv_path, 'w' if is_new_csv else 'a', newline='') as csvfile:
+            if reader:
+                entries = _iter_binary_entries(reader, decoder, extractor, offset, sessions)
+                write_csv_entries(csvfile, entries, write_header=is_new_csv)
+            else:
+                with open(log_file_path, 'rb') as f:
+                    f.seek(offset)
+                    entries = iter_decoded_entries(_iter_byte_range(f, new_offset), decoder, extractor)
+                    write_csv_entries(csvfile, entries, write_header=is_new_csv)
+            csvfile.flush()
+            os.fsync(csvfile.fileno())
+    finally:
+        if reader:
+            reader.close()
+
+    state[log_filename] = {
+        'offset': new_offset,
+        'sessions': new_sessions,
+        'log_size': os.path.getsize(log_file_path),
+        'csv_size': os.path.getsize(output_csv_path),
+        'extractor': extractor.get_state(),
+    }
+    return True
+
+def process_current_logs(decoder=None):
+    """
+    Modo incremental para los logs del día (que process_pending_logs omite):
+    anexa a sus CSV lo que se haya registrado desde la última llamada.
+    """
+    if decoder is None:
+        try:
+            decoder = DBCDecoder.from_file(config.DBC_FILE)
+        except Exception as e:
+            logging.critical(f"No se pudo cargar el archivo DBC en {config.DBC_FILE}: {e}")
+            return
+
+    current_date_str = datetime.now().strftime("%Y%m%d")
+    current_logs = [
+        f for f in (glob.glob(os.path.join(config.CAN_LOG_DIR, '*.log')) +
+                    glob.glob(os.path.join(config.CAN_LOG_DIR, f'*{BINARY_LOG_EXTENSION}')))
+        if current_date_str in os.path.basename(f)
+    ]
+    if not current_logs:
+        return
+
+    state = _load_incremental_state()
+    for log_file in sorted(current_logs):
+        try:
+            if process_log_incremental(log_file, decoder, state):
+                logging.info(f"CSV actualizado de forma incremental: {os.path.basename(log_file)}")
+        except Exception as e:
+            logging.error(f"Fallo en el procesado incremental de {log_file}: {e}", exc_info=True)
+    _save_incremental_state(state)
+
+def process_pending_logs(workers=None):
     """
     Busca archivos .log que no hayan sido procesados, los traduce usando el DBC
-    y los convierte a formato CSV.
+    y los convierte a formato CSV. Con `workers` > 1 (por defecto
+    config.LOG_PROCESSOR_WORKERS) los archivos se reparten entre varios procesos.
+    El registro de procesados (PROCESSED_MANIFEST) permite saltar los archivos
+    sin cambios y reprocesar solo los afectados por un cambio del DBC.
     """
     logging.info("Iniciando procesamiento de logs pendientes...")
+    if workers is None:
+        workers = config.LOG_PROCESSOR_WORKERS
     
     try:
-        db = cantools.database.load_file(config.DBC_FILE)
+        decoder = DBCDecoder.from_file(config.DBC_FILE)
         logging.info("Archivo DBC cargado correctamente.")
     except Exception as e:
         logging.critical(f"No se pudo cargar el archivo DBC en {config.DBC_FILE}: {e}")
         return
 
-    processed_files = _get_processed_files()
+    manifest = ProcessedManifest(config.PROCESSED_MANIFEST)
+    try:
+        manifest.import_legacy(config.PROCESSED_FILES_LOG, _file_hash(config.DBC_FILE))
+        _process_logs_with_manifest(manifest, decoder, workers)
+    finally:
+        manifest.close()
+
+def _process_logs_with_manifest(manifest, decoder, workers):
+    """Selecciona los logs pendientes según el registro y los procesa."""
+    dbc_version = _file_hash(config.DBC_FILE)
     current_date_str = datetime.now().strftime("%Y%m%d")
-    all_log_files = glob.glob(os.path.join(config.CAN_LOG_DIR, '*.log'))
+    all_log_files = (glob.glob(os.path.join(config.CAN_LOG_DIR, '*.log')) +
+                     glob.glob(os.path.join(config.CAN_LOG_DIR, f'*{BINARY_LOG_EXTENSION}')))
 
     files_to_process = [
         f for f in all_log_files
-        if os.path.basename(f) not in processed_files and current_date_str not in os.path.basename(f)
+        if current_date_str not in os.path.basename(f) and _needs_processing(manifest, f, dbc_version, decoder)
     ]
     
     if not files_to_process:
@@ -220,13 +1071,21 @@ def process_pending_logs():
         return
 
     logging.info(f"Se encontraron {len(files_to_process)} archivos para procesar.")
+
+    if workers > 1 and len(files_to_process) > 1:
+        logging.info(f"Procesando en paralelo con {workers} procesos.")
+        _process_files_parallel(files_to_process, workers, manifest, dbc_version, decoder)
+        logging.info("Procesamiento de logs finalizado.")
+        return
+
     extractor = OBDDataExtractor()
 
     for log_file in sorted(files_to_process):
         logging.info(f"Procesando: {os.path.basename(log_file)}")
         try:
-            process_log_file(log_file, db, extractor)
-            _mark_file_as_processed(log_file)
+            description = _describe_log(log_file)
+            outputs = process_log_file(log_file, decoder, extractor, workers=workers)
+            _record_processed(manifest, log_file, description, dbc_version, decoder, outputs)
             logging.info(f"Completado: {os.path.basename(log_file)}")
         except Exception as e:
             logging.error(f"Fallo al procesar el archivo {log_file}: {e}", exc_info=True)
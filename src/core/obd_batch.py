@@ -0,0 +1,69 @@
+# ./src/core/obd_batch.py
+# Solicitudes del servicio 01 con varios PIDs (SAE J1979): una trama 7DF puede
+# pedir hasta 6 PIDs y la ECU responde con todos en un único mensaje, en una sola
+# trama si cabe o en varias (ISO-TP: First Frame + Consecutive Frames, tras
+# recibir una trama de control de flujo). Como la respuesta no indica la longitud
+# de cada PID, para separarla hace falta la tabla de longitudes del estándar.
+
+LIVE_DATA_SERVICE = 0x01
+LIVE_DATA_RESPONSE = 0x41
+MAX_PIDS_PER_REQUEST = 6
+# Control de flujo ISO-TP: continuar, sin límite de bloque ni separación mínima
+FLOW_CONTROL_DATA = "3000000000000000"
+
+# Bytes de datos de cada PID del servicio 01 (SAE J1979). Solo se agrupan y
+# separan los PIDs de esta tabla.
+PID_DATA_LENGTHS = {
+    0x00: 4, 0x01: 4, 0x02: 2, 0x03: 2, 0x04: 1, 0x05: 1, 0x06: 1, 0x07: 1,
+    0x08: 1, 0x09: 1, 0x0A: 1, 0x0B: 1, 0x0C: 2, 0x0D: 1, 0x0E: 1, 0x0F: 1,
+    0x10: 2, 0x11: 1, 0x12: 1, 0x13: 1, 0x14: 2, 0x15: 2, 0x16: 2, 0x17: 2,
+    0x18: 2, 0x19: 2, 0x1A: 2, 0x1B: 2, 0x1C: 1, 0x1D: 1, 0x1E: 1, 0x1F: 2,
+    0x20: 4, 0x21: 2, 0x22: 2, 0x23: 2, 0x24: 4, 0x25: 4, 0x26: 4, 0x27: 4,
+    0x28: 4, 0x29: 4, 0x2A: 4, 0x2B: 4, 0x2C: 1, 0x2D: 1, 0x2E: 1, 0x2F: 1,
+    0x30: 1, 0x31: 2, 0x32: 2, 0x33: 1, 0x34: 4, 0x35: 4, 0x36: 4, 0x37: 4,
+    0x38: 4, 0x39: 4, 0x3A: 4, 0x3B: 4, 0x3C: 2, 0x3D: 2, 0x3E: 2, 0x3F: 2,
+    0x40: 4, 0x41: 4, 0x42: 2, 0x43: 2, 0x44: 2, 0x45: 1, 0x46: 1, 0x47: 1,
+    0x48: 1, 0x49: 1, 0x4A: 1, 0x4B: 1, 0x4C: 1, 0x4D: 2, 0x4E: 2, 0x4F: 4,
+    0x50: 4, 0x51: 1, 0x52: 1, 0x53: 2, 0x54: 2, 0x55: 2, 0x56: 2, 0x57: 2,
+    0x58: 2, 0x59: 2, 0x5A: 1, 0x5B: 1, 0x5C: 1, 0x5D: 2, 0x5E: 2, 0x5F: 1,
+    0x60: 4, 0x61: 1, 0x62: 1, 0x63: 2, 0x64: 5, 0x65: 2, 0x66: 5, 0x67: 3,
+}
+
+def batch_request_data(pids):
+    """Datos de la trama 7DF que solicita a la vez `pids` (hasta 6): '03010C0D00000000'."""
+    if not 0 < len(pids) <= MAX_PIDS_PER_REQUEST:
+        raise ValueError(f"Una solicitud admite de 1 a {MAX_PIDS_PER_REQUEST} PIDs, no {len(pids)}")
+    data = bytes([len(pids) + 1, LIVE_DATA_SERVICE, *pids])
+    return data.ljust(8, b'\x00').hex().upper()
+
+def request_frames(pids):
+    """
+    Tramas que se envían por cada solicitud de `pids`: la solicitud y, si la
+    respuesta no cabe en una trama única (7 bytes), el control de flujo ISO-TP.
+    """
+    response_length = 1 + sum(1 + PID_DATA_LENGTHS[pid] for pid in pids)
+    return 1 if response_length <= 7 else 2
+
+def split_pid_response(payload):
+    """
+    Separa una respuesta del servicio 01 ya reensamblada (41 PID datos PID datos...)
+    en tramas 7E8 de un solo PID, iguales a las que la ECU envía para una solicitud
+    normal: [longitud, 41, PID, datos...] rellenas a 8 bytes. Si la respuesta no
+    encaja exactamente con la tabla de longitudes (PID desconocido o incompleto)
+    no se separa y devuelve [].
+    """
+    frames = []
+    position = 1
+    while position < len(payload):
+        pid = payload[position]
+        size = PID_DATA_LENGTHS.get(pid)
+        if size is None or position + 1 + size > len(payload):
+            return []
+        frame = bytes([size + 2, LIVE_DATA_RESPONSE, pid]) + bytes(payload[position + 1:position + 1 + size])
+        frames.append(frame.ljust(8, b'\x00'))
+        position += 1 + size
+    return frames
+
+def is_batched_first_frame(can_id, data):
+    """Primera trama (ISO-TP) de una respuesta multi-PID de una ECU (7E8-7EF)."""
+    return 0x7E8 <= can_id <= 0x7EF and len(data) >= 3 and data[0] >> 4 == 1 and data[2] == LIVE_DATA_RESPONSE
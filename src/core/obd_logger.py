@@ -1,5 +1,4 @@
 # ./src/core/obd_logger.py
-import time
 import os
 import subprocess
 import csv
@@ -8,6 +7,13 @@ import logging
 from datetime import datetime
 
 import config # Importamos la configuración centralizada
+from src.core.can_bus import CANBusEngine
+from src.core.binary_can_log import BinaryCANLogWriter, BINARY_LOG_EXTENSION
+from src.core.request_scheduler import RequestScheduler
+from src.core.dbc_decoder import DBCDecoder
+from src.core.live_decoder import LiveDecoder
+from src.core.adaptive_rate import AdaptiveRateController, parse_pid_request, support_request_data, SUPPORT_PIDS
+from src.core.obd_batch import batch_request_data, request_frames, is_batched_first_frame, PID_DATA_LENGTHS, FLOW_CONTROL_DATA, MAX_PIDS_PER_REQUEST
 
 class OBDLogger:
     """
@@ -20,7 +26,12 @@ class OBDLogger:
         
         self._running = False
         self._thread = None
-        self._candump_process = None
+        self._can_bus = None
+        self._stop_event = threading.Event() # Despierta al planificador al detener
+        self._scheduler = None
+        self._decoder = None
+        self._live_decoder = None
+        self._rate_controller = None
         
         # Variables para controlar solicitudes únicas
         self.vin_requested = False
@@ -39,12 +50,21 @@ class OBDLogger:
             return "UNKNOWN_ID"
 
     def _load_requests_csv(self, file_path):
-        """Carga las solicitudes desde el archivo CSV de configuración."""
+        """
+        Carga las solicitudes desde el archivo CSV de configuración. Las filas
+        repetidas (mismo ID y datos) se descartan: cada solicitud se programa
+        con el nombre '<ID>_<Datos>', que debe ser único.
+        """
         requests = []
+        seen = set()
         try:
             with open(file_path, mode='r', newline='') as csvfile:
                 reader = csv.DictReader(csvfile)
                 for row in reader:
+                    if (row["ID"], row["Datos"]) in seen:
+                        logging.warning(f"Solicitud {row['ID']} {row['Datos']} repetida en {file_path}; se ignora la fila {reader.line_num}.")
+                        continue
+                    seen.add((row["ID"], row["Datos"]))
                     requests.append({
                         "ID": row["ID"],
                         "Datos": row["Datos"],
@@ -67,6 +87,7 @@ class OBDLogger:
         
         logging.info("Iniciando logger OBD...")
         self._running = True
+        self._stop_event.clear()
         self._thread = threading.Thread(target=self._logging_loop, daemon=True)
         self._thread.start()
 
@@ -78,6 +99,7 @@ class OBDLogger:
 
         logging.info("Deteniendo logger OBD...")
         self._running = False
+        self._stop_event.set()
         if self._thread:
             self._thread.join(timeout=5) # Espera a que el hilo termine
             if self._thread.is_alive():
@@ -87,6 +109,14 @@ class OBDLogger:
     def is_running(self):
         return self._running
 
+    def get_request_stats(self):
+        """Estadísticas de puntualidad por solicitud de la sesión actual (o la última)."""
+        return self._scheduler.stats() if self._scheduler else {}
+
+    def get_rate_stats(self):
+        """Periodo, latencia y soporte por PID del control adaptativo (vacío si está desactivado)."""
+        return self._rate_controller.stats() if self._rate_controller else {}
+
     def _initialize_can(self):
         """Inicializa la interfaz CAN del sistema."""
         try:
@@ -103,95 +133,190 @@ class OBDLogger:
             return False
 
     def _send_can_request(self, msg_id, data):
-        """Envía una única trama CAN."""
-        command = f"cansend {config.CAN_INTERFACE} {msg_id}#{data}"
-        try:
-            # Usar shell=True es un riesgo de seguridad, pero el comando original lo usaba.
-            # Una alternativa más segura sería dividir el comando en una lista de argumentos.
-            subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Error al enviar trama CAN '{command}': {e.stderr.strip()}")
+        """Envía una única trama CAN a través del socket del bus (sin lanzar procesos)."""
+        self._can_bus.send(msg_id, data)
 
     def _logging_loop(self):
         """El bucle principal que se ejecuta en el hilo."""
-        if not self._initialize_can():
+        # La interfaz física solo se configura con SocketCAN; el bus virtual no la necesita
+        uses_socketcan = config.CAN_BUS_BACKEND == "socketcan"
+        if uses_socketcan and not self._initialize_can():
             self._running = False
             return
 
-        log_file_path = os.path.join(config.CAN_LOG_DIR, f"canlog_{datetime.now().strftime('%Y%m%d')}.log")
+        binary_log = config.CAN_LOG_FORMAT == "binary"
+        extension = BINARY_LOG_EXTENSION if binary_log else ".log"
+        log_file_path = os.path.join(config.CAN_LOG_DIR, f"canlog_{datetime.now().strftime('%Y%m%d')}{extension}")
         
         try:
-            with open(log_file_path, "a") as log_file:
+            with (BinaryCANLogWriter(log_file_path) if binary_log else open(log_file_path, "a")) as log_file:
                 # Escribir encabezado de sesión
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                log_file.write(f"{timestamp} {self.device_id}\n")
-                log_file.flush()
+                session_header = f"{timestamp} {self.device_id}"
+                if binary_log:
+                    log_file.start_session(session_header)
+                else:
+                    log_file.write(f"{session_header}\n")
+                    log_file.flush()
                 
                 logging.info(f"Registrando tráfico CAN en {log_file_path}")
                 
-                # Iniciar candump para capturar todo el tráfico
-                self._candump_process = subprocess.Popen(
-                    ["candump", config.CAN_INTERFACE],
-                    stdout=log_file, # Redirige la salida estándar directamente al archivo de log
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-                
-                start_time = time.time()
-                next_execution_times = {
-                    f"{req['ID']}_{req['Datos']}": start_time + (req["Disparo"] / 1000.0)
-                    for req in self.requests
-                }
+                # Capturar todo el tráfico (incluidas nuestras solicitudes) con el socket CAN
+                self._can_bus = CANBusEngine()
+                self._start_live_decoder(log_file_path, session_header)
+                self._can_bus.start_capture(log_file)
                 
-                while self._running:
-                    current_time = time.time()
-                    elapsed_time = current_time - start_time
-
-                    # --- Enviar solicitudes especiales cronometradas ---
-                    if elapsed_time >= 30 and not self.vin_requested:
-                        self._send_can_request("7DF", "0209020000000000") # VIN
-                        time.sleep(0.05)
-                        self._send_can_request("7E0", "3000050000000000") # Flow Control
-                        self.vin_requested = True
-
-                    if elapsed_time >= 35 and not self.cvn_requested:
-                        self._send_can_request("7DF", "0209060000000000") # CVN
-                        self.cvn_requested = True
-                        
-                    if elapsed_time >= 40 and not self.dtc_requested:
-                        self._send_can_request("7DF", "0103") # DTC Almacenados
-                        time.sleep(1)
-                        self._send_can_request("7DF", "0107") # DTC Pendientes
-                        self.dtc_requested = True
-
-                    # --- Procesar solicitudes del CSV ---
-                    for req in self.requests:
-                        req_id = f"{req['ID']}_{req['Datos']}"
-                        if current_time >= next_execution_times.get(req_id, float('inf')):
-                            self._send_can_request(req["ID"], req["Datos"])
-                            
-                            if not req["Disparo_Unico"]:
-                                next_execution_times[req_id] = current_time + (req["Frecuencia"] / 1000.0)
-                            else:
-                                next_execution_times[req_id] = float('inf') # Ejecutar solo una vez
-                    
-                    time.sleep(0.01) # Pequeña pausa para no saturar la CPU
-        
+                try:
+                    self._request_loop()
+                finally:
+                    # Detener la captura antes de cerrar el archivo de log
+                    self._can_bus.stop()
+                    self._can_bus = None
+                    logging.info("Captura CAN detenida.")
+                    if self._live_decoder:
+                        self._live_decoder.stop()
+                        self._live_decoder = None
+
         except Exception as e:
             logging.error(f"Error en el bucle de registro OBD: {e}")
         
         finally:
             # Limpieza al salir del bucle
-            if self._candump_process:
-                self._candump_process.terminate()
+            if uses_socketcan:
                 try:
-                    self._candump_process.wait(timeout=2)
-                except subprocess.TimeoutExpired:
-                    self._candump_process.kill()
-                logging.info("Proceso candump detenido.")
+                    subprocess.run(["sudo", "ip", "link", "set", config.CAN_INTERFACE, "down"], check=True)
+                    logging.info(f"Interfaz {config.CAN_INTERFACE} desactivada.")
+                except (subprocess.CalledProcessError, FileNotFoundError) as e:
+                    logging.error(f"Error al desactivar la interfaz CAN: {e}")
 
+    def _start_live_decoder(self, log_file_path, session_header):
+        """
+        Arranca la decodificación en vivo de las tramas capturadas en un hilo
+        propio (ver LiveDecoder): publica la telemetría y, con OBD_LIVE_DECODE,
+        escribe además las filas decodificadas en <log>_live.csv de CSV_EXPORTS_DIR.
+        El DBC se carga una vez por instancia; si no se puede, solo se registra en bruto.
+        """
+        if self._decoder is None:
             try:
-                subprocess.run(["sudo", "ip", "link", "set", config.CAN_INTERFACE, "down"], check=True)
-                logging.info(f"Interfaz {config.CAN_INTERFACE} desactivada.")
-            except (subprocess.CalledProcessError, FileNotFoundError) as e:
-                 logging.error(f"Error al desactivar la interfaz CAN: {e}")
\ No newline at end of file
+                self._decoder = DBCDecoder.from_file(config.DBC_FILE)
+            except Exception as e:
+                logging.warning(f"No se pudo cargar el DBC para la decodificación en vivo: {e}")
+                return
+        csv_path = None
+        if config.OBD_LIVE_DECODE:
+            base_name = os.path.splitext(os.path.basename(log_file_path))[0]
+            csv_path = os.path.join(config.CSV_EXPORTS_DIR, f"{base_name}_live.csv")
+        self._live_decoder = LiveDecoder(self._decoder, csv_path)
+        self._live_decoder.start(session_header)
+        self._can_bus.add_listener(self._live_decoder.submit)
+
+    def _send_tracked_request(self, req, pid):
+        """Envía una solicitud de PID avisando al control adaptativo para medir su respuesta."""
+        self._rate_controller.on_request(pid)
+        self._send_can_request(req["ID"], req["Datos"])
+
+    def _send_flow_control(self, timestamp, can_id, data):
+        """
+        Listener del bus CAN: responde a la primera trama de una respuesta con
+        varios PIDs con el control de flujo ISO-TP (a la dirección física de la
+        ECU, 7E0-7E7) para que envíe las tramas consecutivas.
+        """
+        if is_batched_first_frame(can_id, data):
+            self._send_can_request(f"{can_id - 8:03X}", FLOW_CONTROL_DATA)
+
+    def _schedule_batched_requests(self, scheduler, start_time, requests):
+        """
+        Programa las solicitudes periódicas de un solo PID del servicio 01 agrupadas
+        por frecuencia en solicitudes de hasta OBD_BATCH_MAX_PIDS PIDs, cada una con
+        el primer disparo de sus PIDs. Devuelve las solicitudes que no se agrupan.
+        """
+        max_pids = max(1, min(config.OBD_BATCH_MAX_PIDS, MAX_PIDS_PER_REQUEST))
+        groups = {}
+        remaining = []
+        for req in requests:
+            pid = parse_pid_request(req["ID"], req["Datos"])
+            if req["Disparo_Unico"] or pid not in PID_DATA_LENGTHS:
+                remaining.append(req)
+            else:
+                groups.setdefault(req["Frecuencia"], []).append(req)
+
+        for frequency, group in groups.items():
+            group.sort(key=lambda req: req["Disparo"])
+            for i in range(0, len(group), max_pids):
+                chunk = group[i:i + max_pids]
+                pids = [parse_pid_request(req["ID"], req["Datos"]) for req in chunk]
+                data = batch_request_data(pids)
+                scheduler.schedule(
+                    f"7DF_{data}",
+                    lambda data=data: self._send_can_request("7DF", data),
+                    start_time + chunk[0]["Disparo"] / 1000.0,
+                    frequency / 1000.0,
+                    frames=request_frames(pids)
+                )
+            logging.info(f"{len(group)} PIDs cada {frequency} ms agrupados en {-(-len(group) // max_pids)} solicitudes.")
+        return remaining
+
+    def _request_vin(self):
+        self._send_can_request("7DF", "0209020000000000") # VIN
+        self.vin_requested = True
+
+    def _request_cvn(self):
+        self._send_can_request("7DF", "0209060000000000") # CVN
+        self.cvn_requested = True
+
+    def _request_stored_dtcs(self):
+        self._send_can_request("7DF", "0103") # DTC Almacenados
+        self.dtc_requested = True
+
+    def _request_loop(self):
+        """
+        Envía las solicitudes OBD (especiales y del CSV) mientras el logger esté activo.
+        Un planificador con heap sobre tiempo monotónico duerme exactamente hasta la
+        siguiente solicitud y mantiene los periodos en fase.
+        """
+        scheduler = RequestScheduler()
+        self._scheduler = scheduler
+        start_time = scheduler.now()
+
+        # --- Solicitudes especiales cronometradas ---
+        if not self.vin_requested:
+            scheduler.schedule("VIN", self._request_vin, start_time + 30)
+            scheduler.schedule("VIN_FlowControl", lambda: self._send_can_request("7E0", "3000050000000000"), start_time + 30.05)
+        if not self.cvn_requested:
+            scheduler.schedule("CVN", self._request_cvn, start_time + 35)
+        if not self.dtc_requested:
+            scheduler.schedule("DTC_Almacenados", self._request_stored_dtcs, start_time + 40)
+            scheduler.schedule("DTC_Pendientes", lambda: self._send_can_request("7DF", "0107"), start_time + 41)
+
+        # --- Control adaptativo: mapas de PIDs soportados y revisión periódica ---
+        controller = None
+        if config.ADAPTIVE_REQUEST_RATE:
+            controller = AdaptiveRateController(scheduler)
+            self._rate_controller = controller
+            self._can_bus.add_listener(controller.on_frame)
+            for i, pid in enumerate(SUPPORT_PIDS):
+                scheduler.schedule(f"PID_Support_{pid:02X}",
+                                   lambda pid=pid: self._send_can_request("7DF", support_request_data(pid)),
+                                   start_time + 0.5 + i * 0.05)
+            scheduler.schedule("AdaptiveRate", controller.adjust,
+                               start_time + config.ADAPTIVE_ADJUST_INTERVAL, config.ADAPTIVE_ADJUST_INTERVAL, frames=0)
+
+        # --- Solicitudes del CSV (opcionalmente agrupadas en solicitudes multi-PID) ---
+        requests = self.requests
+        if config.OBD_BATCH_REQUESTS:
+            self._can_bus.add_listener(self._send_flow_control)
+            requests = self._schedule_batched_requests(scheduler, start_time, requests)
+        for req in requests:
+            name = f"{req['ID']}_{req['Datos']}"
+            period = None if req["Disparo_Unico"] else req["Frecuencia"] / 1000.0
+            action = lambda req=req: self._send_can_request(req["ID"], req["Datos"])
+            pid = parse_pid_request(req["ID"], req["Datos"])
+            if controller and period and pid is not None:
+                controller.register(pid, name, period)
+                action = lambda req=req, pid=pid: self._send_tracked_request(req, pid)
+            scheduler.schedule(name, action, start_time + req["Disparo"] / 1000.0, period)
+
+        while self._running:
+            scheduler.run_due()
+            # Dormir hasta la próxima solicitud; stop() interrumpe la espera
+            self._stop_event.wait(scheduler.time_until_next())
@@ -0,0 +1,89 @@
+# ./src/core/processed_manifest.py
+import os
+import json
+import time
+import sqlite3
+import logging
+
+# Huella provisional de las entradas importadas de processed_files.txt, hasta
+# que en su primer uso se completan con el hash, los IDs y la huella real
+LEGACY_FINGERPRINT = "legacy"
+
+class ProcessedManifest:
+    """
+    Registro indexado (SQLite) de los logs ya procesados. Por cada archivo guarda
+    tamaño, mtime, hash del contenido, la versión del DBC con que se decodificó,
+    una huella de los mensajes del DBC que afectan a sus IDs, los IDs presentes
+    y las rutas de salida. Sustituye a la lista de texto processed_files.txt.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS processed_files (
+                name TEXT PRIMARY KEY,
+                path TEXT,
+                size INTEGER,
+                mtime REAL,
+                content_hash TEXT,
+                dbc_version TEXT,
+                dbc_fingerprint TEXT,
+                frame_ids TEXT,
+                outputs TEXT,
+                processed_at REAL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, name):
+        """Devuelve la entrada de un archivo (por nombre base) o None."""
+        return self._conn.execute(
+            "SELECT * FROM processed_files WHERE name = ?", (os.path.basename(name),)
+        ).fetchone()
+
+    def record(self, path, size, mtime, content_hash, dbc_version, dbc_fingerprint, frame_ids, outputs):
+        """Registra (o actualiza) un archivo procesado. Se confirma en disco en la misma llamada."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO processed_files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (os.path.basename(path), path, size, mtime, content_hash, dbc_version, dbc_fingerprint,
+             json.dumps(sorted(frame_ids)), json.dumps(outputs), time.time())
+        )
+        self._conn.commit()
+
+    def update(self, name, **fields):
+        """Actualiza campos sueltos de una entrada (p.ej. mtime o versión del DBC)."""
+        assignments = ", ".join(f"{field} = ?" for field in fields)
+        self._conn.execute(
+            f"UPDATE processed_files SET {assignments} WHERE name = ?",
+            (*fields.values(), os.path.basename(name))
+        )
+        self._conn.commit()
+
+    def import_legacy(self, legacy_path, dbc_version=None):
+        """
+        Importa los nombres de processed_files.txt como entradas sin metadatos,
+        procesadas con el DBC actual (`dbc_version`) y con LEGACY_FINGERPRINT
+        como huella provisional, y renombra el archivo para no volver a leerlo en cada ejecución.
+        """
+        if not os.path.exists(legacy_path):
+            return
+        with open(legacy_path, 'r') as f:
+            names = [line.strip() for line in f if line.strip()]
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO processed_files (name, dbc_version, dbc_fingerprint, processed_at) VALUES (?, ?, ?, ?)",
+            [(name, dbc_version, LEGACY_FINGERPRINT, time.time()) for name in names]
+        )
+        self._conn.commit()
+        os.replace(legacy_path, legacy_path + '.migrated')
+        logging.info(f"Importados {len(names)} archivos procesados desde {legacy_path}")
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,127 @@
+# ./src/core/request_scheduler.py
+import time
+import heapq
+import logging
+import itertools
+
+class _ScheduledJob:
+    """Una tarea programada y sus estadísticas de puntualidad."""
+    __slots__ = ("name", "action", "due", "period", "frames", "count", "total_lateness", "max_lateness", "missed")
+
+    def __init__(self, name, action, due, period, frames):
+        self.name = name
+        self.action = action
+        self.due = due
+        self.period = period
+        self.frames = frames     # Tramas que envía al bus en cada ejecución
+        self.count = 0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+        self.missed = 0
+
+
+class RequestScheduler:
+    """
+    Planificador de solicitudes basado en una cola de prioridad (heap) sobre
+    tiempo monotónico. Cada ejecución periódica se reprograma a partir de su
+    instante teórico (no del real), de modo que los periodos no derivan. Si se
+    acumula un retraso mayor que un periodo, se saltan los huecos perdidos
+    manteniendo la fase y se contabilizan como perdidos.
+    """
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._heap = []
+        self._counter = itertools.count() # Desempate estable entre tareas con el mismo instante
+        self._jobs = {}
+
+    def now(self):
+        return self._clock()
+
+    def schedule(self, name, action, due, period=None, frames=1):
+        """
+        Programa `action()` en el instante monotónico `due`. Con `period` (segundos)
+        se repite indefinidamente; sin él se ejecuta una sola vez. El nombre
+        identifica la tarea (set_period, stats): si ya existe, no se programa y
+        devuelve False. `frames` es el número de tramas que la tarea envía al bus
+        en cada ejecución (0 para tareas internas), usado por request_rate().
+        """
+        if name in self._jobs:
+            logging.error(f"Ya hay una solicitud programada con el nombre '{name}'; se ignora la nueva.")
+            return False
+        if period is not None and period <= 0:
+            logging.warning(f"Periodo no válido para '{name}', se ejecutará una sola vez.")
+            period = None
+        job = _ScheduledJob(name, action, due, period, frames)
+        self._jobs[name] = job
+        heapq.heappush(self._heap, (due, next(self._counter), job))
+        return True
+
+    def set_period(self, name, period):
+        """
+        Cambia el periodo de una tarea periódica. Se aplica a partir de su próxima
+        ejecución (ya programada), manteniendo la fase desde ese instante.
+        """
+        job = self._jobs.get(name)
+        if job is None or job.period is None or period <= 0:
+            return False
+        job.period = period
+        return True
+
+    def request_rate(self, window):
+        """
+        Tramas por segundo que enviarán las tareas programadas: las periódicas
+        según su periodo actual y las de un solo disparo pendientes en los
+        próximos `window` segundos repartidas en esa ventana.
+        """
+        horizon = self._clock() + window
+        rate = 0.0
+        for job in self._jobs.values():
+            if job.period is not None:
+                rate += job.frames / job.period
+            elif job.count == 0 and job.due <= horizon:
+                rate += job.frames / window
+        return rate
+
+    def time_until_next(self):
+        """Segundos hasta la próxima tarea (0 si ya toca) o None si no queda ninguna."""
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - self._clock())
+
+    def run_due(self):
+        """Ejecuta en orden todas las tareas vencidas y reprograma las periódicas."""
+        while self._heap and self._heap[0][0] <= self._clock():
+            due, _, job = heapq.heappop(self._heap)
+            now = self._clock()
+            lateness = now - due
+            job.count += 1
+            job.total_lateness += lateness
+            job.max_lateness = max(job.max_lateness, lateness)
+
+            try:
+                job.action()
+            except Exception as e:
+                logging.error(f"Error al ejecutar la solicitud programada '{job.name}': {e}")
+
+            if job.period is not None:
+                next_due = due + job.period
+                now = self._clock()
+                if next_due <= now:
+                    # Saltar los huecos perdidos sin perder la fase
+                    skipped = int((now - next_due) // job.period) + 1
+                    job.missed += skipped
+                    next_due += skipped * job.period
+                job.due = next_due
+                heapq.heappush(self._heap, (next_due, next(self._counter), job))
+
+    def stats(self):
+        """Estadísticas de retraso por solicitud (en milisegundos)."""
+        return {
+            name: {
+                "count": job.count,
+                "mean_lateness_ms": (job.total_lateness / job.count * 1000.0) if job.count else 0.0,
+                "max_lateness_ms": job.max_lateness * 1000.0,
+                "missed": job.missed,
+            }
+            for name, job in self._jobs.items()
+        }
@@ -0,0 +1,130 @@
+# ./src/core/signal_history.py
+import time
+import threading
+
+import numpy as np
+
+import config
+
+class SignalRing:
+    """
+    Búfer circular de capacidad fija para una señal: timestamps y valores en dos
+    arrays de NumPy preasignados, sin reservar memoria al añadir muestras. Las
+    consultas por ventana localizan el inicio con búsqueda binaria sobre los
+    timestamps (ordenados) y solo recorren las muestras de la ventana.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._times = np.zeros(capacity, dtype=np.float64)
+        self._values = np.zeros(capacity, dtype=np.float64)
+        self._next = 0   # Posición de la próxima escritura
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp, value):
+        if self._count and timestamp < self._times[self._next - 1]:
+            return # Muestra fuera de orden (reloj hacia atrás): se descarta
+        self._times[self._next] = timestamp
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def last(self):
+        """(timestamp, valor) de la última muestra o None si está vacío."""
+        if not self._count:
+            return None
+        index = self._next - 1
+        return float(self._times[index]), float(self._values[index])
+
+    def window(self, seconds, now=None):
+        """Arrays (timestamps, valores) de las muestras de los últimos `seconds` segundos."""
+        if not self._count:
+            return self._times[:0], self._values[:0]
+        start_ts = (now if now is not None else time.time()) - seconds
+        # Las muestras ocupan como mucho dos tramos contiguos: [antiguo] + [reciente]
+        if self._count < self.capacity:
+            segments = [(0, self._next)]
+        else:
+            segments = [(self._next, self.capacity), (0, self._next)]
+        times, values = [], []
+        for begin, end in segments:
+            offset = begin + int(np.searchsorted(self._times[begin:end], start_ts, side='left'))
+            if offset < end:
+                times.append(self._times[offset:end])
+                values.append(self._values[offset:end])
+        if not times:
+            return self._times[:0], self._values[:0]
+        if len(times) == 1:
+            return times[0].copy(), values[0].copy()
+        return np.concatenate(times), np.concatenate(values)
+
+
+class SignalHistory:
+    """
+    Historial reciente en memoria de cada señal decodificada (OBD) y canal de
+    IMU/GPS, con un SignalRing de SIGNAL_HISTORY_CAPACITY muestras por señal.
+    Se alimenta desde el bus de telemetría y responde consultas del tipo
+    "temperatura del refrigerante hace 5 minutos" sin leer archivos.
+    """
+    def __init__(self, capacity=None):
+        self.capacity = capacity or config.SIGNAL_HISTORY_CAPACITY
+        self._rings = {}
+        self._lock = threading.Lock()
+
+    def record(self, values, timestamp):
+        """Añade las muestras numéricas de {señal: valor}; el resto (textos) se ignora."""
+        with self._lock:
+            for name, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                ring = self._rings.get(name)
+                if ring is None:
+                    ring = self._rings[name] = SignalRing(self.capacity)
+                ring.append(timestamp, value)
+
+    def names(self):
+        with self._lock:
+            return sorted(self._rings)
+
+    def last(self, name):
+        """(timestamp, valor) de la última muestra de la señal o None."""
+        with self._lock:
+            ring = self._rings.get(name)
+            return ring.last() if ring else None
+
+    def window(self, name, seconds, now=None):
+        """Arrays (timestamps, valores) de la señal en los últimos `seconds` segundos."""
+        with self._lock:
+            ring = self._rings.get(name)
+            if ring is None:
+                return np.zeros(0), np.zeros(0)
+            return ring.window(seconds, now)
+
+    def stats(self, name, seconds, now=None):
+        """
+        Resumen de la ventana: último valor (aunque sea anterior a la ventana),
+        número de muestras y mínimo, máximo y media (None si no hay muestras).
+        """
+        with self._lock:
+            ring = self._rings.get(name)
+            if ring is None:
+                return None
+            last = ring.last()
+            _, values = ring.window(seconds, now)
+        summary = {"last": last[1], "last_time": last[0], "count": int(values.size),
+                   "min": None, "max": None, "mean": None}
+        if values.size:
+            summary.update(min=float(values.min()), max=float(values.max()), mean=float(values.mean()))
+        return summary
+
+    def snapshot(self, seconds, names=None, now=None):
+        """stats() de varias señales (todas por defecto): {señal: resumen}."""
+        now = now if now is not None else time.time()
+        result = {}
+        for name in names or self.names():
+            summary = self.stats(name, seconds, now)
+            if summary is not None:
+                result[name] = summary
+        return result
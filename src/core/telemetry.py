@@ -0,0 +1,115 @@
+# ./src/core/telemetry.py
+import time
+import logging
+import threading
+
+import config
+from src.core.signal_history import SignalHistory
+
+class TelemetrySubscription:
+    """
+    Suscripción de un cliente al bus. En lugar de una cola de mensajes guarda
+    el último valor de cada señal pendiente de entregar: si el cliente va lento,
+    los valores intermedios se sustituyen (conflación) y la memoria queda
+    acotada por el número de señales, no por el ritmo de publicación.
+    """
+    def __init__(self, bus, signals=None):
+        self._bus = bus
+        self.signals = set(signals) if signals else None
+        self._pending = {}
+        self._condition = threading.Condition()
+        self.closed = False
+
+    def _offer(self, timestamp, values):
+        with self._condition:
+            for name, value in values.items():
+                if self.signals is None or name in self.signals:
+                    self._pending[name] = (timestamp, value)
+            if self._pending:
+                self._condition.notify()
+
+    def get(self, timeout=None):
+        """
+        Espera hasta `timeout` segundos a que haya datos y devuelve los valores
+        pendientes como {señal: (timestamp, valor)} ({} si vence el plazo).
+        """
+        with self._condition:
+            if not self._pending and not self.closed:
+                self._condition.wait(timeout)
+            pending, self._pending = self._pending, {}
+            return pending
+
+    def close(self):
+        self._bus.unsubscribe(self)
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TelemetryBus:
+    """
+    Bus publicación/suscripción en proceso para la telemetría en vivo. Los
+    loggers publican diccionarios {señal: valor}; cada suscriptor (p.ej. una
+    conexión SSE del servidor web) recibe el último valor de cada señal y cada
+    sumidero (p.ej. el historial de señales) recibe todas las publicaciones.
+    publish() no bloquea por clientes lentos.
+    """
+    def __init__(self, max_subscribers=None):
+        self.max_subscribers = max_subscribers or config.TELEMETRY_MAX_SUBSCRIBERS
+        self._lock = threading.Lock()
+        self._subscribers = () # Tupla inmutable: publish() la recorre sin tomar el lock
+        self._sinks = ()
+        self._latest = {}
+
+    def has_listeners(self):
+        """Indica si alguien recibe las publicaciones (si no, los loggers se ahorran decodificar)."""
+        return bool(self._subscribers or self._sinks)
+
+    def add_sink(self, callback):
+        """Registra callback(valores, timestamp), llamado en cada publish() sin conflación."""
+        with self._lock:
+            self._sinks = self._sinks + (callback,)
+
+    def subscribe(self, signals=None):
+        """Crea una suscripción (opcionalmente solo a `signals`). None si se alcanzó el máximo."""
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscription = TelemetrySubscription(self, signals)
+            self._subscribers = self._subscribers + (subscription,)
+        # El nuevo cliente recibe de inmediato el último valor conocido de cada señal
+        for name, (timestamp, value) in list(self._latest.items()):
+            subscription._offer(timestamp, {name: value})
+        logging.info(f"Nuevo suscriptor de telemetría ({len(self._subscribers)} activos).")
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not subscription)
+
+    def publish(self, values, timestamp=None):
+        """Publica un diccionario {señal: valor} con su timestamp (epoch; por defecto, ahora)."""
+        timestamp = timestamp if timestamp is not None else time.time()
+        for name, value in values.items():
+            self._latest[name] = (timestamp, value)
+        for sink in self._sinks:
+            sink(values, timestamp)
+        for subscription in self._subscribers:
+            subscription._offer(timestamp, values)
+
+    def latest(self):
+        """Último valor publicado de cada señal: {señal: (timestamp, valor)}."""
+        return dict(self._latest)
+
+
+# Bus compartido por los loggers, el servidor web y la GUI del proceso, y el
+# historial reciente de señales que se alimenta de él
+telemetry_bus = TelemetryBus()
+signal_history = SignalHistory()
+telemetry_bus.add_sink(signal_history.record)
@@ -0,0 +1,56 @@
+# ./src/services/live_log_processor.py
+import logging
+import threading
+
+import config
+from src.core.dbc_decoder import DBCDecoder
+from src.core.log_processor import process_current_logs
+
+class LiveLogProcessor:
+    """
+    Servicio que mantiene actualizados los CSV de los logs del día: cada
+    INCREMENTAL_PROCESS_INTERVAL segundos decodifica solo lo nuevo de cada log
+    y lo anexa a su CSV, para que el servidor web y la GUI vean datos recientes.
+    """
+    def __init__(self, interval=None):
+        self.interval = interval or config.INCREMENTAL_PROCESS_INTERVAL
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        if self._running:
+            logging.warning("El procesado incremental ya está en ejecución.")
+            return
+        self._running = True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        logging.info("Procesado incremental de logs iniciado.")
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            if self._thread.is_alive():
+                logging.error("El hilo de procesado incremental no se detuvo correctamente.")
+        logging.info("Procesado incremental de logs detenido.")
+
+    def is_running(self):
+        return self._running
+
+    def _loop(self):
+        try:
+            decoder = DBCDecoder.from_file(config.DBC_FILE)
+        except Exception as e:
+            logging.critical(f"No se pudo cargar el archivo DBC en {config.DBC_FILE}: {e}")
+            self._running = False
+            return
+
+        while True:
+            process_current_logs(decoder)
+            if self._stop_event.wait(self.interval):
+                break
@@ -1,17 +1,46 @@
 # ./src/services/web_server.py
 import os
+import re
 import cgi
+import glob
 import html
+import json
+import time
+import zlib
 import shutil
+import tarfile
+import zipfile
 import socket
+import tempfile
 import math
 import logging
 import threading
-from http.server import SimpleHTTPRequestHandler, HTTPServer
-from urllib.parse import urlparse, parse_qs, unquote
-from socketserver import TCPServer
+from datetime import date, datetime
+from email.utils import formatdate
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote, urlencode, quote
 
 import config
+from src.core.telemetry import telemetry_bus, signal_history
+
+# --- Carga Condicional de zstandard ---
+# Sin el módulo, las descargas comprimidas usan solo gzip.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Subcarpeta oculta de CSV_EXPORTS_DIR con las versiones comprimidas ya generadas
+COMPRESSED_CACHE_DIR = ".compressed"
+COMPRESSED_EXTENSIONS = {"zstd": ".zst", "gzip": ".gz"}
+# Formatos que ya van comprimidos y no ganan nada al recomprimirse
+INCOMPRESSIBLE_SUFFIXES = (".gz", ".zst", ".zip", ".parquet", ".feather")
+STREAM_CHUNK_SIZE = 64 * 1024
+CACHE_KEY_RE = re.compile(r'(\d+\.\d+)\.(?:gz|zst)')
+CACHE_ENTRY_RE = re.compile(r'(.+)\.(\d+\.\d+)\.(?:gz|zst)')
+# Archivos a medio escribir (CSV y exportación columnar en curso, tablas de
+# fusión, trozos de la decodificación en paralelo): ni se listan ni se sirven
+PARTIAL_FILE_RE = re.compile(r'.*\.(?:tmp|part\d+)')
 
 # Plantilla para el handler. Leemos el template una sola vez al iniciar.
 try:
@@ -22,12 +51,225 @@ except FileNotFoundError:
     logging.critical(f"No se encontró el archivo de plantilla del servidor web en {TEMPLATE_PATH}. El servidor no funcionará.")
     HTML_TEMPLATE = "<html><body><h1>Error: Template not found</h1></body></html>"
 
+class _ChunkedWriter:
+    """
+    Objeto tipo archivo que envía lo escrito como cuerpo HTTP/1.1 con
+    Transfer-Encoding: chunked. Agrupa las escrituras pequeñas (cabeceras de
+    zip/tar) en trozos de hasta `buffer_size` bytes. No admite seek, así que
+    zipfile escribe cada entrada con descriptor de datos.
+    """
+    def __init__(self, wfile, buffer_size=STREAM_CHUNK_SIZE):
+        self._wfile = wfile
+        self._buffer = bytearray()
+        self._buffer_size = buffer_size
+
+    def write(self, data):
+        self._buffer += data
+        if len(self._buffer) >= self._buffer_size:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if self._buffer:
+            self._wfile.write(b"%X\r\n%s\r\n" % (len(self._buffer), self._buffer))
+            self._buffer.clear()
+
+    def close(self):
+        """Envía lo pendiente y el trozo final vacío que marca el fin del cuerpo."""
+        self.flush()
+        self._wfile.write(b"0\r\n\r\n")
+
+
+def is_visible_file(name):
+    """Indica si un archivo se muestra y se puede descargar (ni oculto ni a medio escribir)."""
+    return not name.startswith('.') and not PARTIAL_FILE_RE.fullmatch(name)
+
+
+_FILE_DATE_RE = re.compile(r'(?<!\d)(\d{8})(?!\d)')
+
+def _file_date(name, mtime):
+    """Fecha de un archivo: la AAAAMMDD de su nombre (canlog_20240101.csv) o, si no tiene, la de su mtime."""
+    match = _FILE_DATE_RE.search(name)
+    if match:
+        try:
+            return datetime.strptime(match.group(1), '%Y%m%d').date()
+        except ValueError:
+            pass
+    return datetime.fromtimestamp(mtime).date()
+
+
+def sweep_compressed_cache(directory):
+    """
+    Borra de la caché de comprimidos las versiones cuyo original ya no existe o
+    ha cambiado (mtime o tamaño distintos de la clave), aunque no se vuelvan a
+    descargar: p.ej. un CSV regenerado con os.replace o borrado fuera de la web.
+    """
+    cache_dir = os.path.join(directory, COMPRESSED_CACHE_DIR)
+    try:
+        names = os.listdir(cache_dir)
+    except FileNotFoundError:
+        return
+    for name in names:
+        match = CACHE_ENTRY_RE.fullmatch(name)
+        if not match:
+            continue # Temporales de una compresión en curso
+        try:
+            st = os.stat(os.path.join(directory, match.group(1)))
+            if f"{st.st_mtime_ns}.{st.st_size}" == match.group(2):
+                continue
+        except FileNotFoundError:
+            pass
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except OSError:
+            pass
+
+
+class DirectoryIndex:
+    """
+    Índice en memoria de un directorio (nombre, tamaño y mtime de cada archivo)
+    construido con os.scandir. Solo se vuelve a recorrer el directorio cuando
+    cambia su mtime (se crea, borra o renombra un archivo), así que cada página
+    cuesta un stat del directorio en lugar de un listado completo. Las vistas
+    ordenadas se guardan hasta la siguiente reconstrucción. Añadir datos a un
+    archivo no cambia el mtime del directorio: las entradas que se muestran se
+    vuelven a leer con restat().
+    """
+    SORT_KEYS = {
+        "name": lambda entry: entry[0].lower(),
+        "date": lambda entry: entry[2],
+        "size": lambda entry: entry[1],
+    }
+    # Si el directorio cambió hace menos de esto, se vuelve a recorrer siempre:
+    # en sistemas de archivos con mtime de baja resolución (FAT en la SD) dos
+    # cambios seguidos pueden dejar el mismo mtime.
+    MTIME_RESOLUTION = 2.0
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._dir_mtime_ns = None
+        self._entries = []
+        self._sorted = {}
+
+    def _refresh(self):
+        dir_mtime_ns = os.stat(self.directory).st_mtime_ns
+        recent = time.time() - dir_mtime_ns / 1e9 < self.MTIME_RESOLUTION
+        if dir_mtime_ns == self._dir_mtime_ns and not recent:
+            return
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not is_visible_file(entry.name):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue # Borrado mientras se recorría
+                entries.append((entry.name, st.st_size, st.st_mtime))
+        self._entries = entries
+        self._sorted = {}
+        self._dir_mtime_ns = dir_mtime_ns
+        sweep_compressed_cache(self.directory)
+
+    def entries(self, sort="name", reverse=False):
+        """Lista de (nombre, tamaño, mtime) ordenada por `sort` ('name', 'date' o 'size')."""
+        if sort not in self.SORT_KEYS:
+            sort = "name"
+        with self._lock:
+            self._refresh()
+            view = self._sorted.get((sort, reverse))
+            if view is None:
+                view = self._sorted[(sort, reverse)] = sorted(self._entries, key=self.SORT_KEYS[sort], reverse=reverse)
+            return view
+
+    def restat(self, entries):
+        """
+        Vuelve a leer tamaño y mtime de `entries` (p.ej. el CSV del día, al que el
+        procesado incremental añade filas) y guarda los cambios en el índice.
+        Las entradas de archivos ya borrados se omiten.
+        """
+        fresh = []
+        changed = {}
+        for entry in entries:
+            try:
+                st = os.stat(os.path.join(self.directory, entry[0]))
+            except OSError:
+                continue
+            current = (entry[0], st.st_size, st.st_mtime)
+            if current != entry:
+                changed[entry[0]] = current
+            fresh.append(current)
+        if changed:
+            with self._lock:
+                self._entries = [changed.get(entry[0], entry) for entry in self._entries]
+                self._sorted = {}
+            sweep_compressed_cache(self.directory)
+        return fresh
+
+    def query(self, sort="name", reverse=False, name=None, date_from=None, date_to=None):
+        """
+        Entradas ordenadas que contienen `name` y cuya fecha (la del nombre, como en
+        /archive; ver _file_date) cae entre las fechas (datetime.date) dadas.
+        """
+        entries = self.entries(sort, reverse)
+        if name:
+            needle = name.lower()
+            entries = [entry for entry in entries if needle in entry[0].lower()]
+        if date_from or date_to:
+            entries = self.restat(entries) # Sin fecha en el nombre se usa el mtime actual
+            start, end = date_from or date.min, date_to or date.max
+            entries = [entry for entry in entries if start <= _file_date(entry[0], entry[2]) <= end]
+        return entries
+
+
+_directory_indexes = {}
+_directory_indexes_lock = threading.Lock()
+
+def get_directory_index(directory):
+    """Índice compartido entre los hilos del servidor para `directory`."""
+    with _directory_indexes_lock:
+        index = _directory_indexes.get(directory)
+        if index is None:
+            index = _directory_indexes[directory] = DirectoryIndex(directory)
+        return index
+
+def _iter_dated_files(directory, arc_prefix, date_from, date_to):
+    """(ruta, nombre en el archivo) de los archivos de `directory` (recursivo) con fecha en el rango."""
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for name in sorted(files):
+            if not is_visible_file(name):
+                continue
+            path = os.path.join(root, name)
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            if date_from <= _file_date(name, mtime) <= date_to:
+                yield path, os.path.join(arc_prefix, os.path.relpath(path, directory))
+
+def _format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
 class _CustomHandler(SimpleHTTPRequestHandler):
     """
     Handler personalizado que sirve archivos, gestiona subidas/descargas
-    y muestra una interfaz web con paginación.
+    y muestra una interfaz web con paginación. Habla HTTP/1.1 con keep-alive:
+    todas las respuestas llevan Content-Length para poder reutilizar la conexión.
     """
     FILES_PER_PAGE = 15
+    MAX_FILES_PER_PAGE = 1000
+    protocol_version = "HTTP/1.1"
+    timeout = 30 # Segundos que se mantiene abierta una conexión inactiva
+    disable_nagle_algorithm = True # Cabeceras y cuerpo van en envíos separados; sin esto, keep-alive espera al ACK retardado
+    RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
 
     def __init__(self, *args, **kwargs):
         # El directorio se pasa al handler para asegurar que siempre sirve desde la ubicación correcta.
@@ -36,13 +278,26 @@ class _CustomHandler(SimpleHTTPRequestHandler):
     def do_GET(self):
         if self.path == '/' or self.path.startswith('/list'):
             self.list_directory()
+        elif self.path.startswith('/api/files'):
+            self.list_directory_json()
+        elif self.path.startswith('/api/signals'):
+            self.query_signals()
+        elif self.path.startswith('/archive'):
+            self.download_archive()
+        elif self.path.startswith('/live'):
+            self.stream_telemetry()
         elif self.path.startswith('/download/'):
             # Decodifica el nombre del archivo para manejar espacios y caracteres especiales
             file_to_download = unquote(self.path[len('/download/'):])
             self.download_file(file_to_download)
         else:
-            # Para cualquier otro archivo, usa el comportamiento por defecto (servir el archivo si existe)
-            super().do_GET()
+            # Para cualquier otro archivo, usa el comportamiento por defecto (servir el archivo si existe),
+            # salvo la caché de comprimidos y los archivos ocultos o a medio escribir
+            parts = [part for part in unquote(urlparse(self.path).path).split('/') if part]
+            if all(is_visible_file(part) for part in parts):
+                super().do_GET()
+            else:
+                self.send_error(404, "Archivo no encontrado")
 
     def do_POST(self):
         if self.path.startswith('/delete/'):
@@ -53,46 +308,155 @@ class _CustomHandler(SimpleHTTPRequestHandler):
         else:
             self.send_error(405, "Método no permitido")
 
+    def listing_params(self):
+        """
+        Parámetros de listado de la URL: page, sort (name, date, size), order
+        (asc, desc), q (texto en el nombre) y from/to (fechas AAAA-MM-DD, ver _file_date).
+        """
+        query = parse_qs(urlparse(self.path).query)
+        def param(name, default=''):
+            return query.get(name, [default])[0].strip()
+        def parse_date(value):
+            return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+        params = {
+            'sort': param('sort', 'name') if param('sort', 'name') in DirectoryIndex.SORT_KEYS else 'name',
+            'order': 'desc' if param('order') == 'desc' else 'asc',
+            'q': param('q'),
+            'from': param('from'),
+            'to': param('to'),
+        }
+        page = max(int(param('page', '1')), 1)
+        date_from, date_to = parse_date(params['from']), parse_date(params['to'])
+        return params, page, date_from, date_to
+
+    def query_index(self):
+        params, page, date_from, date_to = self.listing_params()
+        entries = get_directory_index(self.directory).query(
+            params['sort'], params['order'] == 'desc', params['q'], date_from, date_to
+        )
+        return params, page, entries
+
     def list_directory(self):
         """Genera y sirve la página HTML con la lista de archivos."""
         try:
-            all_files = sorted(os.listdir(self.directory), key=str.lower)
-            
-            query = parse_qs(urlparse(self.path).query)
-            page = int(query.get('page', ['1'])[0])
-            
+            params, page, entries = self.query_index()
+
             start_index = (page - 1) * self.FILES_PER_PAGE
             end_index = start_index + self.FILES_PER_PAGE
-            files_on_page = all_files[start_index:end_index]
+            files_on_page = get_directory_index(self.directory).restat(entries[start_index:end_index])
 
             file_list_html = self.generate_file_list_html(files_on_page)
-            pagination_html = self.generate_pagination_html(len(all_files), page)
-            
+            pagination_html = self.generate_pagination_html(len(entries), page, params)
+
             # Reemplazar placeholders en la plantilla
-            content = HTML_TEMPLATE.replace('{{FILE_LIST_PLACEHOLDER}}', file_list_html)
+            content = HTML_TEMPLATE.replace('{{FILTER_PLACEHOLDER}}', self.generate_filter_html(params))
+            content = content.replace('{{FILE_LIST_PLACEHOLDER}}', file_list_html)
             content = content.replace('{{PAGINATION_PLACEHOLDER}}', pagination_html)
-            
+
+            body = content.encode('utf-8')
             self.send_response(200)
             self.send_header("Content-type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
             self.end_headers()
-            self.wfile.write(content.encode('utf-8'))
-            
+            self.wfile.write(body)
+
+        except ValueError:
+            self.send_error(400, "Parámetros de listado no válidos")
         except FileNotFoundError:
             self.send_error(404, "Directorio no encontrado")
         except Exception as e:
             logging.error(f"Error al listar el directorio: {e}")
             self.send_error(500, "Error interno del servidor")
 
-    def generate_file_list_html(self, files):
+    def list_directory_json(self):
+        """
+        Listado en JSON para clientes automáticos (p.ej. el recolector de flota):
+        mismos filtros que /list más `per_page` (por defecto FILES_PER_PAGE, máximo
+        MAX_FILES_PER_PAGE).
+        """
+        try:
+            params, page, entries = self.query_index()
+            query = parse_qs(urlparse(self.path).query)
+            per_page = min(max(int(query.get('per_page', [self.FILES_PER_PAGE])[0]), 1), self.MAX_FILES_PER_PAGE)
+            start_index = (page - 1) * per_page
+            page_entries = get_directory_index(self.directory).restat(entries[start_index:start_index + per_page])
+            payload = {
+                'total': len(entries),
+                'page': page,
+                'per_page': per_page,
+                'files': [
+                    {'name': name, 'size': size, 'mtime': mtime}
+                    for name, size, mtime in page_entries
+                ],
+            }
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except ValueError:
+            self.send_error(400, "Parámetros de listado no válidos")
+        except FileNotFoundError:
+            self.send_error(404, "Directorio no encontrado")
+        except Exception as e:
+            logging.error(f"Error al listar el directorio: {e}")
+            self.send_error(500, "Error interno del servidor")
+
+    def query_signals(self):
+        """
+        Consulta del historial reciente en memoria: /api/signals?window=60&names=a,b
+        devuelve por señal el último valor y mínimo, máximo y media de los últimos
+        `window` segundos (todas las señales si no se indica `names`).
+        """
+        query = parse_qs(urlparse(self.path).query)
+        try:
+            window = float(query.get('window', ['60'])[0])
+        except ValueError:
+            self.send_error(400, "Parámetro window no válido")
+            return
+        names = [name for value in query.get('names', []) for name in value.split(',') if name]
+        body = json.dumps({'window': window, 'signals': signal_history.snapshot(window, names or None)}).encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def generate_filter_html(self, params):
+        def selected(name, value):
+            return ' selected' if params[name] == value else ''
+        return f"""
+            <form class="filter-form" action="/list" method="get">
+                <input type="text" name="q" placeholder="Nombre" value="{html.escape(params['q'])}">
+                <input type="date" name="from" value="{html.escape(params['from'])}">
+                <input type="date" name="to" value="{html.escape(params['to'])}">
+                <select name="sort">
+                    <option value="name"{selected('sort', 'name')}>Nombre</option>
+                    <option value="date"{selected('sort', 'date')}>Fecha</option>
+                    <option value="size"{selected('sort', 'size')}>Tamaño</option>
+                </select>
+                <select name="order">
+                    <option value="asc"{selected('order', 'asc')}>Ascendente</option>
+                    <option value="desc"{selected('order', 'desc')}>Descendente</option>
+                </select>
+                <input type="submit" value="Filtrar" class="button upload">
+            </form>
+        """
+
+    def generate_file_list_html(self, entries):
         items = []
-        for name in files:
+        for name, size, mtime in entries:
             encoded_name = html.escape(name)
+            url_name = html.escape(quote(name))
+            modified = datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M')
             items.append(f"""
                 <li class="file-list-item">
-                    <span>{encoded_name}</span>
+                    <span>{encoded_name}<br><small class="file-meta">{_format_size(size)} · {modified}</small></span>
                     <div class="button-container">
-                        <a href="/download/{encoded_name}" class="button download">Descargar</a>
-                        <form action="/delete/{encoded_name}" method="post" onsubmit="return confirm('¿Seguro que quieres borrar este archivo?');">
+                        <a href="/download/{url_name}" class="button download">Descargar</a>
+                        <form action="/delete/{url_name}" method="post" onsubmit="return confirm('¿Seguro que quieres borrar este archivo?');">
                             <button type="submit" class="button delete">Borrar</button>
                         </form>
                     </div>
@@ -100,48 +464,336 @@ class _CustomHandler(SimpleHTTPRequestHandler):
             """)
         return '<ul class="file-list">' + ''.join(items) + '</ul>' if items else "<p>No hay archivos en este directorio.</p>"
 
-    def generate_pagination_html(self, total_files, current_page):
+    def generate_pagination_html(self, total_files, current_page, params):
         total_pages = math.ceil(total_files / self.FILES_PER_PAGE)
         if total_pages <= 1:
             return ""
-        
+
+        # Los enlaces conservan el orden y los filtros de la página actual
+        filters = urlencode({name: value for name, value in params.items() if value})
+        def page_url(page):
+            return html.escape(f"/list?{filters}&page={page}")
+
         pagination = '<div class="pagination">'
         if current_page > 1:
-            pagination += f'<a href="/list?page={current_page - 1}" class="previous">&laquo; Anterior</a>'
-        
+            pagination += f'<a href="{page_url(current_page - 1)}" class="previous">&laquo; Anterior</a>'
+
         pagination += f'<span>Página {current_page} de {total_pages}</span>'
 
         if current_page < total_pages:
-            pagination += f'<a href="/list?page={current_page + 1}" class="next">Siguiente &raquo;</a>'
+            pagination += f'<a href="{page_url(current_page + 1)}" class="next">Siguiente &raquo;</a>'
         pagination += '</div>'
         return pagination
 
+    def parse_range(self, file_size):
+        """
+        Interpreta la cabecera Range (un único rango de bytes). Devuelve (inicio, fin)
+        inclusivos, None si no hay rango o no se entiende (se sirve el archivo
+        completo) o False si el rango queda fuera del archivo.
+        """
+        match = self.RANGE_RE.match(self.headers.get('Range', '').strip())
+        if not match or match.groups() == ('', ''):
+            return None
+        start, end = match.groups()
+        if not start:
+            # "bytes=-N": los últimos N bytes
+            length = int(end)
+            if length == 0:
+                return False
+            return max(file_size - length, 0), file_size - 1
+        start = int(start)
+        end = min(int(end), file_size - 1) if end else file_size - 1
+        if start >= file_size or start > end:
+            return False
+        return start, end
+
     def download_file(self, filename):
+        """
+        Sirve un archivo con sendfile (sin copiarlo por espacio de usuario) y admite
+        peticiones Range, para reanudar descargas cortadas o bajar trozos.
+        """
         file_path = os.path.join(self.directory, filename)
-        if os.path.isfile(file_path):
-            try:
-                with open(file_path, 'rb') as f:
-                    self.send_response(200)
-                    self.send_header('Content-Type', 'application/octet-stream')
-                    self.send_header('Content-Disposition', f'attachment; filename="{os.path.basename(file_path)}"')
-                    fs = os.fstat(f.fileno())
-                    self.send_header("Content-Length", str(fs.st_size))
-                    self.end_headers()
-                    shutil.copyfileobj(f, self.wfile)
-            except Exception as e:
-                logging.error(f"Error al descargar {filename}: {e}")
-                self.send_error(500, "No se pudo leer el archivo")
-        else:
+        if (os.path.basename(filename) != filename or not is_visible_file(filename)
+                or not os.path.isfile(file_path)):
             self.send_error(404, "Archivo no encontrado")
+            return
+        try:
+            f = open(file_path, 'rb')
+        except OSError as e:
+            logging.error(f"Error al descargar {filename}: {e}")
+            self.send_error(500, "No se pudo leer el archivo")
+            return
+
+        with f:
+            fs = os.fstat(f.fileno())
+            encoding = self.choose_encoding(filename, fs.st_size)
+            if encoding:
+                self.send_compressed(f, fs, filename, encoding)
+                return
+
+            byte_range = self.parse_range(fs.st_size)
+            if byte_range is False:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{fs.st_size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            start, end = byte_range or (0, fs.st_size - 1)
+            self.send_response(206 if byte_range else 200)
+            self.send_download_headers(filename, fs)
+            if byte_range:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{fs.st_size}")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+            self.send_file_body(f, filename, start, end - start + 1)
+
+    def send_download_headers(self, filename, fs):
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Disposition', f'attachment; filename="{filename}"')
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Last-Modified", formatdate(fs.st_mtime, usegmt=True))
+        self.send_header("Vary", "Accept-Encoding")
+
+    def send_file_body(self, f, filename, offset, count):
+        try:
+            if count > 0:
+                self.connection.sendfile(f, offset=offset, count=count)
+        except (ConnectionError, socket.timeout) as e:
+            # El cliente cortó la descarga: no se puede enviar ya una respuesta de error
+            logging.info(f"Descarga de {filename} interrumpida por el cliente: {e}")
+            self.close_connection = True
+
+    def choose_encoding(self, filename, file_size):
+        """
+        Elige la codificación de la descarga según Accept-Encoding (valores q):
+        a igual preferencia, zstd (si está instalado) antes que gzip. Las peticiones Range se sirven sin comprimir
+        para que el rango se refiera siempre a los bytes del archivo original.
+        """
+        if ('Range' in self.headers or file_size < config.WEB_COMPRESSION_MIN_SIZE
+                or filename.lower().endswith(INCOMPRESSIBLE_SUFFIXES)):
+            return None
+        accepted = {}
+        for item in self.headers.get('Accept-Encoding', '').split(','):
+            name, _, params = item.strip().partition(';')
+            quality = 1.0
+            params = params.strip()
+            if params.startswith('q='):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    continue
+            accepted[name.strip().lower()] = quality
+        candidates = ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+        # Mayor q primero; a igualdad, el orden de preferencia de `candidates`
+        best = max(candidates, key=lambda name: accepted.get(name, accepted.get('*', 0)))
+        return best if accepted.get(best, accepted.get('*', 0)) > 0 else None
+
+    def compressed_cache_path(self, filename, fs, encoding):
+        """Ruta de la versión comprimida en caché; el nombre incluye mtime y tamaño del original."""
+        key = f"{filename}.{fs.st_mtime_ns}.{fs.st_size}{COMPRESSED_EXTENSIONS[encoding]}"
+        return os.path.join(self.directory, COMPRESSED_CACHE_DIR, key)
+
+    def drop_compressed_cache(self, filename, keep=None):
+        """Borra las versiones comprimidas de un archivo salvo las de la clave `keep` (mtime.tamaño)."""
+        pattern = os.path.join(self.directory, COMPRESSED_CACHE_DIR, glob.escape(filename) + ".*")
+        for path in glob.glob(pattern):
+            match = CACHE_KEY_RE.fullmatch(os.path.basename(path)[len(filename) + 1:])
+            if match and match.group(1) != keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def send_compressed(self, f, fs, filename, encoding):
+        """
+        Sirve el archivo comprimido. Si ya hay una versión en caché para este mtime,
+        se envía con sendfile; si no, se comprime en streaming (chunked) y a la vez
+        se guarda en caché, de modo que las siguientes descargas no recomprimen.
+        """
+        cache_path = self.compressed_cache_path(filename, fs, encoding)
+        try:
+            cached = open(cache_path, 'rb')
+        except FileNotFoundError:
+            cached = None
+
+        if cached is not None:
+            with cached:
+                size = os.fstat(cached.fileno()).st_size
+                self.send_response(200)
+                self.send_download_headers(filename, fs)
+                self.send_header("Content-Encoding", encoding)
+                self.send_header("Content-Length", str(size))
+                self.end_headers()
+                self.send_file_body(cached, filename, 0, size)
+            return
+
+        self.drop_compressed_cache(filename, keep=f"{fs.st_mtime_ns}.{fs.st_size}")
+        cache_dir = os.path.dirname(cache_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=".tmp_")
+        if encoding == "zstd":
+            compressor = zstandard.ZstdCompressor(level=config.WEB_ZSTD_LEVEL).compressobj()
+        else:
+            compressor = zlib.compressobj(config.WEB_GZIP_LEVEL, zlib.DEFLATED, 31) # 31: cabecera gzip
+
+        self.send_response(200)
+        self.send_download_headers(filename, fs)
+        self.send_header("Content-Encoding", encoding)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            writer = _ChunkedWriter(self.wfile)
+            with os.fdopen(fd, 'wb') as cache_file:
+                while True:
+                    block = f.read(STREAM_CHUNK_SIZE)
+                    data = compressor.compress(block) if block else compressor.flush()
+                    if data:
+                        cache_file.write(data)
+                        writer.write(data)
+                    if not block:
+                        break
+            writer.close()
+            os.replace(tmp_path, cache_path)
+        except (ConnectionError, socket.timeout) as e:
+            logging.info(f"Descarga de {filename} interrumpida por el cliente: {e}")
+            self.close_connection = True
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def archive_members(self, query):
+        """
+        Archivos del archivo comprimido: los `files` elegidos de CSV_EXPORTS_DIR o,
+        con `from`/`to` (AAAA-MM-DD), los de ese rango de fechas. `raw=can,imu`
+        añade los logs en bruto de CAN_LOG_DIR y/o IMU_GPS_LOG_DIR del rango.
+        """
+        selection = [os.path.basename(name) for name in query.get('files', []) if name]
+        if selection:
+            return [(os.path.join(self.directory, name), os.path.join('csv_exports', name))
+                    for name in selection
+                    if is_visible_file(name) and os.path.isfile(os.path.join(self.directory, name))]
+
+        date_from = datetime.strptime(query['from'][0], '%Y-%m-%d').date()
+        date_to = datetime.strptime(query.get('to', query['from'])[0], '%Y-%m-%d').date()
+        entries = get_directory_index(self.directory).query(date_from=date_from, date_to=date_to)
+        members = [(os.path.join(self.directory, name), os.path.join('csv_exports', name))
+                   for name, _, _ in entries]
+        raw = {item.strip() for value in query.get('raw', []) for item in value.split(',')}
+        if 'can' in raw:
+            members += _iter_dated_files(config.CAN_LOG_DIR, 'can_logs', date_from, date_to)
+        if 'imu' in raw:
+            members += _iter_dated_files(config.IMU_GPS_LOG_DIR, 'imu_gps_logs', date_from, date_to)
+        return members
+
+    def download_archive(self):
+        """
+        Descarga en un solo ZIP (format=zip, por defecto) o tar.gz (format=tar) de
+        varios archivos. Se genera en streaming mientras se envía: sin archivos
+        temporales y con memoria acotada al tamaño de un trozo, sea cual sea el
+        número o tamaño de los archivos.
+        """
+        query = parse_qs(urlparse(self.path).query)
+        fmt = query.get('format', ['zip'])[0]
+        try:
+            if fmt not in ('zip', 'tar'):
+                raise ValueError(fmt)
+            members = self.archive_members(query)
+        except (KeyError, ValueError):
+            self.send_error(400, "Indica files=... o un rango from=AAAA-MM-DD&to=AAAA-MM-DD (format=zip|tar)")
+            return
+        if not members:
+            self.send_error(404, "No hay archivos para ese rango o selección")
+            return
+
+        label = "seleccion" if 'files' in query else f"{query['from'][0]}_{query.get('to', query['from'])[0]}"
+        extension = "zip" if fmt == 'zip' else "tar.gz"
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/zip' if fmt == 'zip' else 'application/gzip')
+        self.send_header('Content-Disposition', f'attachment; filename="hums_{label}.{extension}"')
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        writer = _ChunkedWriter(self.wfile)
+        try:
+            if fmt == 'zip':
+                with zipfile.ZipFile(writer, 'w', allowZip64=True) as archive:
+                    for path, arcname in members:
+                        self.add_zip_member(archive, path, arcname)
+            else:
+                with tarfile.open(fileobj=writer, mode='w|gz', bufsize=STREAM_CHUNK_SIZE) as archive:
+                    for path, arcname in members:
+                        try:
+                            archive.add(path, arcname=arcname, recursive=False)
+                        except FileNotFoundError:
+                            continue # Borrado mientras se generaba el archivo
+            writer.close()
+            logging.info(f"Archivo {fmt} enviado con {len(members)} archivos.")
+        except (ConnectionError, socket.timeout) as e:
+            logging.info(f"Descarga del archivo {fmt} interrumpida por el cliente: {e}")
+            self.close_connection = True
+        except Exception as e:
+            # Las cabeceras ya se enviaron: solo se puede cortar la conexión
+            logging.error(f"Error al generar el archivo {fmt}: {e}")
+            self.close_connection = True
+
+    def add_zip_member(self, archive, path, arcname):
+        try:
+            info = zipfile.ZipInfo.from_file(path, arcname)
+            src = open(path, 'rb')
+        except FileNotFoundError:
+            return # Borrado mientras se generaba el archivo
+        info.compress_type = zipfile.ZIP_STORED if path.lower().endswith(INCOMPRESSIBLE_SUFFIXES) else zipfile.ZIP_DEFLATED
+        with src, archive.open(info, 'w') as dst:
+            shutil.copyfileobj(src, dst, STREAM_CHUNK_SIZE)
+
+    def stream_telemetry(self):
+        """
+        Canal Server-Sent Events con la telemetría en vivo (OBD e IMU/GPS). Cada
+        envío lleva el último valor de las señales que han cambiado, como mucho
+        TELEMETRY_SSE_RATE_HZ veces por segundo: un cliente lento recibe menos
+        actualizaciones pero nunca acumula datos. `signals=a,b` limita las señales.
+        """
+        query = parse_qs(urlparse(self.path).query)
+        signals = [name for value in query.get('signals', []) for name in value.split(',') if name]
+        subscription = telemetry_bus.subscribe(signals or None)
+        if subscription is None:
+            self.send_error(503, "Demasiados clientes de telemetría en vivo")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close") # Cuerpo sin longitud: termina al cerrar
+        self.end_headers()
+        self.close_connection = True
+
+        interval = 1.0 / config.TELEMETRY_SSE_RATE_HZ
+        with subscription:
+            try:
+                while not subscription.closed:
+                    pending = subscription.get(config.TELEMETRY_SSE_KEEPALIVE)
+                    if pending:
+                        payload = {name: {"t": timestamp, "v": value} for name, (timestamp, value) in pending.items()}
+                        self.wfile.write(b"data: %s\n\n" % json.dumps(payload).encode('utf-8'))
+                        # Lo que llegue durante la pausa se agrupa en el siguiente envío
+                        time.sleep(interval)
+                    else:
+                        self.wfile.write(b": keepalive\n\n")
+            except (ConnectionError, socket.timeout):
+                pass
+        logging.info("Cliente de telemetría en vivo desconectado.")
 
     def delete_file(self, filename):
         file_path = os.path.join(self.directory, filename)
         if os.path.isfile(file_path):
             try:
                 os.remove(file_path)
+                self.drop_compressed_cache(filename)
                 logging.info(f"Archivo eliminado: {file_path}")
                 self.send_response(303) # 303 See Other, para redirigir tras un POST
                 self.send_header('Location', '/list')
+                self.send_header('Content-Length', '0')
                 self.end_headers()
             except Exception as e:
                 logging.error(f"Error al eliminar {filename}: {e}")
@@ -166,6 +818,7 @@ class _CustomHandler(SimpleHTTPRequestHandler):
                     logging.info(f"Archivo subido: {file_path}")
                     self.send_response(303)
                     self.send_header('Location', '/list')
+                    self.send_header('Content-Length', '0')
                     self.end_headers()
                 except Exception as e:
                     logging.error(f"Error al guardar archivo subido {filename}: {e}")
@@ -176,9 +829,19 @@ class _CustomHandler(SimpleHTTPRequestHandler):
             self.send_error(400, "No se subió ningún archivo")
 
 
+class _ThreadedServer(ThreadingHTTPServer):
+    """
+    Servidor HTTP con un hilo por conexión: una descarga grande ya no bloquea
+    el listado ni las descargas de otros clientes.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+
 class WebServer:
     """
     Clase contenedora para el servidor HTTP que se ejecuta en un hilo.
+    Cada conexión se atiende en su propio hilo (ver _ThreadedServer).
     """
     def __init__(self):
         self.port = config.WEB_SERVER_PORT
@@ -192,7 +855,7 @@ class WebServer:
             return
 
         try:
-            self._server = TCPServer(("", self.port), _CustomHandler)
+            self._server = _ThreadedServer(("", self.port), _CustomHandler)
             self._running = True
             self._thread = threading.Thread(target=self._run, daemon=True)
             self._thread.start()
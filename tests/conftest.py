@@ -0,0 +1,103 @@
+# ./tests/conftest.py
+import os
+import sys
+import glob
+import random
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import config
+
+DBC_FILE = glob.glob(os.path.join(ROOT_DIR, "assets", "dbc", "*.dbc"))[0]
+
+
+def _frame_line(ts, can_id, data):
+    """Línea en formato candump -ta (ver CANBusEngine.format_frame)."""
+    data = bytes(data)
+    return f" ({ts:.6f})  can0  {can_id:03X}   [{len(data)}]  {' '.join(f'{b:02X}' for b in data)}\n"
+
+def _pad(data):
+    return bytes(data).ljust(8, b'\xAA')
+
+def _isotp_frames(payload):
+    """First Frame + Consecutive Frames de un mensaje ISO-TP de más de 7 bytes."""
+    frames = [bytes([0x10 | (len(payload) >> 8), len(payload) & 0xFF]) + payload[:6]]
+    rest, seq = payload[6:], 1
+    while rest:
+        frames.append(_pad(bytes([0x20 | seq]) + rest[:7]))
+        rest, seq = rest[7:], (seq + 1) & 0x0F
+    return frames
+
+def build_can_log(path, n_cycles=400, sessions=2, seed=1, multi_pid=True):
+    """
+    Log de texto sintético con el tráfico que genera OBDLogger: solicitudes 7DF,
+    respuestas de un PID, respuestas multi-PID (trama única e ISO-TP con su control
+    de flujo), VIN multi-trama, CVN, DTC y un ID fuera del DBC. Con `multi_pid`
+    falso, las respuestas multi-PID se sustituyen por respuestas de un solo PID.
+    """
+    rng = random.Random(seed)
+    ts = 1700000000.0
+    lines = []
+    for session in range(sessions):
+        lines.append(f"20240101_{session:02d}0000 TEST_DEVICE\n")
+        for cycle in range(n_cycles):
+            ts += 0.01
+            kind = cycle % 8
+            if kind == 0:
+                lines.append(_frame_line(ts, 0x7DF, _pad([2, 0x01, 0x0C])))
+                lines.append(_frame_line(ts + 0.001, 0x7E8, _pad([4, 0x41, 0x0C, rng.randrange(256), rng.randrange(256)])))
+            elif kind == 1:
+                lines.append(_frame_line(ts, 0x7E8, _pad([3, 0x41, 0x0D, rng.randrange(256)])))
+                lines.append(_frame_line(ts + 0.001, 0x123, bytes(rng.randrange(256) for _ in range(8))))
+            elif kind in (2, 3, 4, 5) and not multi_pid:
+                pid = (0x05, 0x11, 0x0B, 0x0D)[kind - 2]
+                lines.append(_frame_line(ts, 0x7DF, _pad([2, 0x01, pid])))
+                lines.append(_frame_line(ts + 0.001, 0x7E8, _pad([3, 0x41, pid, rng.randrange(256)])))
+            elif kind == 2:
+                lines.append(_frame_line(ts, 0x7DF, bytes([3, 0x01, 0x0D, 0x05, 0, 0, 0, 0])))
+                lines.append(_frame_line(ts + 0.001, 0x7E8, _pad([5, 0x41, 0x0D, rng.randrange(256), 0x05, rng.randrange(256)])))
+            elif kind in (3, 4, 5):
+                payload = bytes([0x41, 0x0C, rng.randrange(256), rng.randrange(256), 0x0D, rng.randrange(256),
+                                 0x05, rng.randrange(256), 0x11, rng.randrange(256), 0x0B, rng.randrange(256),
+                                 0x5D, rng.randrange(256), rng.randrange(256)])
+                frames = _isotp_frames(payload)
+                lines.append(_frame_line(ts, 0x7DF, bytes([7, 0x01, 0x0C, 0x0D, 0x05, 0x11, 0x0B, 0x5D])))
+                lines.append(_frame_line(ts + 0.001, 0x7E8, frames[0]))
+                lines.append(_frame_line(ts + 0.0015, 0x7E0, bytes([0x30, 0, 0, 0, 0, 0, 0, 0])))
+                for i, frame in enumerate(frames[1:]):
+                    lines.append(_frame_line(ts + 0.002 + i * 0.0005, 0x7E8, frame))
+            elif kind == 6 and cycle % 40 == 6:
+                vin = b"1HGCM82633A004352"
+                for i, frame in enumerate(_isotp_frames(bytes([0x49, 0x02, 0x01]) + vin)):
+                    lines.append(_frame_line(ts + i * 0.001, 0x7E8, frame))
+            elif kind == 6:
+                lines.append(_frame_line(ts, 0x7E8, bytes([6, 0x43, 2, 0x01, 0x33, 0x41, 0x23, 0xAA])))
+            else:
+                lines.append(_frame_line(ts, 0x7E8, bytes([7, 0x49, 0x06, 0x01, 0xDE, 0xAD, 0xBE, 0xEF])))
+    with open(path, 'w') as f:
+        f.writelines(lines)
+    return path
+
+
+@pytest.fixture
+def processing_env(tmp_path, monkeypatch):
+    """Directorios temporales y el DBC del repositorio para el procesado de logs."""
+    for name in ("can_logs", "csv_exports"):
+        (tmp_path / name).mkdir()
+    monkeypatch.setattr(config, "DBC_FILE", DBC_FILE)
+    monkeypatch.setattr(config, "CAN_LOG_DIR", str(tmp_path / "can_logs"))
+    monkeypatch.setattr(config, "CSV_EXPORTS_DIR", str(tmp_path / "csv_exports"))
+    monkeypatch.setattr(config, "INCREMENTAL_STATE_FILE", str(tmp_path / "incremental_state.json"))
+    monkeypatch.setattr(config, "COLUMNAR_EXPORT_FORMAT", None)
+    monkeypatch.setattr(config, "FUSION_EXPORT", False)
+    monkeypatch.setattr(config, "IMU_GPS_LOG_DIR", str(tmp_path / "imu_gps_logs"))
+    return tmp_path
+
+
+@pytest.fixture(scope="session")
+def decoder():
+    from src.core.dbc_decoder import DBCDecoder
+    return DBCDecoder.from_file(DBC_FILE)
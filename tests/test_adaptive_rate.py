@@ -0,0 +1,107 @@
+# ./tests/test_adaptive_rate.py
+import pytest
+
+import config
+from src.core.adaptive_rate import AdaptiveRateController
+from src.core.obd_batch import request_frames
+from src.core.request_scheduler import RequestScheduler
+
+
+@pytest.fixture
+def clock():
+    return [0.0]
+
+
+@pytest.fixture
+def scheduler(clock):
+    return RequestScheduler(clock=lambda: clock[0])
+
+
+@pytest.fixture
+def controller(scheduler, clock, monkeypatch):
+    monkeypatch.setattr(config, "ADAPTIVE_MIN_PERIOD_MS", 100)
+    monkeypatch.setattr(config, "ADAPTIVE_MAX_PERIOD_MS", 60000)
+    monkeypatch.setattr(config, "ADAPTIVE_RESPONSE_TIMEOUT_MS", 250)
+    monkeypatch.setattr(config, "ADAPTIVE_LOSS_THRESHOLD", 0.5)
+    monkeypatch.setattr(config, "ADAPTIVE_MAX_REQUEST_RATE", 25)
+    monkeypatch.setattr(config, "ADAPTIVE_ADJUST_INTERVAL", 5.0)
+    return AdaptiveRateController(scheduler, clock=lambda: clock[0])
+
+
+def _register(scheduler, controller, pid, period):
+    name = f"7DF_0201{pid:02X}0000000000"
+    scheduler.schedule(name, lambda: None, 0.0, period)
+    controller.register(pid, name, period)
+    return name
+
+
+def _exchange(controller, clock, pid, value, rtt=0.01):
+    """Una solicitud de `pid` y su respuesta `rtt` segundos después."""
+    controller.on_request(pid)
+    clock[0] += rtt
+    controller.on_frame(clock[0], 0x7E8, bytes([3, 0x41, pid, value, 0, 0, 0, 0]))
+    clock[0] += 0.1
+
+
+def _period(controller, pid):
+    return controller.stats()[f"{pid:02X}"]["period_ms"] / 1000.0
+
+
+def test_timeouts_back_off_the_period_and_recover(scheduler, controller, clock):
+    _register(scheduler, controller, 0x0D, 1.0)
+    for _ in range(4):
+        controller.on_request(0x0D) # Sin respuesta
+        clock[0] += 1.0
+    controller.adjust()
+    assert _period(controller, 0x0D) == 2.0
+    assert scheduler._jobs["7DF_02010D0000000000"].period == 2.0
+
+    # Respuestas fuera de tiempo también cuentan como pérdidas
+    for _ in range(4):
+        _exchange(controller, clock, 0x0D, 1, rtt=0.5)
+    controller.adjust()
+    assert _period(controller, 0x0D) == 4.0
+
+    # Sin pérdidas vuelve hacia el periodo de solicitudes.csv
+    for _ in range(4):
+        _exchange(controller, clock, 0x0D, 0)
+    controller.adjust()
+    assert _period(controller, 0x0D) == 2.0
+
+
+def test_unsupported_pids_are_moved_to_the_maximum_period(scheduler, controller, clock):
+    _register(scheduler, controller, 0x0C, 1.0)
+    _register(scheduler, controller, 0x0D, 1.0)
+    # Mapa del PID 00: solo 0x0C soportado (bit 32 - 0x0C)
+    support = (1 << (0x20 - 0x0C)).to_bytes(4, 'big')
+    controller.on_frame(clock[0], 0x7E8, bytes([6, 0x41, 0x00]) + support + b'\x00')
+    assert controller.is_supported(0x0C) and controller.is_supported(0x0D) is False
+    assert controller.is_supported(0x25) is False # El mapa 00 no anuncia el rango 20
+    controller.adjust()
+    assert _period(controller, 0x0D) == 60.0
+    assert _period(controller, 0x0C) == 1.0
+    assert controller.stats()["0D"]["supported"] is False
+
+
+def test_fast_changing_pids_respect_the_whole_bus_budget(scheduler, controller, clock):
+    _register(scheduler, controller, 0x0C, 0.2)
+    # Tareas que no controla el ajuste adaptativo pero ocupan el bus
+    scheduler.schedule("7DF_0209020000000000", lambda: None, 1.0) # VIN (un solo disparo)
+    scheduler.schedule("7E0_3000050000000000", lambda: None, 1.05)
+    scheduler.schedule("7DF_07010C0D05110B5D", lambda: None, 0.0, 0.1,
+                       frames=request_frames([0x0C, 0x0D, 0x05, 0x11, 0x0B, 0x5D]))
+    scheduler.schedule("AdaptiveRate", lambda: None, 5.0, 5.0, frames=0)
+    assert scheduler.request_rate(5.0) == pytest.approx(5 + 2 / 5.0 + 20)
+
+    for value in range(4):
+        _exchange(controller, clock, 0x0C, value)
+    controller.adjust()
+    # A 0.1 s se pasaría de 25 tramas/s: el periodo no cambia
+    assert _period(controller, 0x0C) == 0.2
+
+    # Con la solicitud agrupada más lenta sí cabe
+    scheduler.set_period("7DF_07010C0D05110B5D", 1.0)
+    for value in range(4):
+        _exchange(controller, clock, 0x0C, value)
+    controller.adjust()
+    assert _period(controller, 0x0C) == 0.1
@@ -0,0 +1,128 @@
+# ./tests/test_baseline_parity.py
+# El CSV de cada camino de decodificación (streaming trama a trama, lotes NumPy,
+# trozos en paralelo, log binario y pasadas incrementales) debe ser idéntico
+# byte a byte al del procesado original con cantools, en logs sin respuestas
+# multi-PID (que el procesado original no separaba por PID).
+import io
+import csv
+
+import cantools
+import pytest
+
+import config
+from src.core.binary_can_log import BinaryCANLogWriter
+from src.core.log_processor import OBDDataExtractor, process_log_file, process_log_incremental
+from conftest import DBC_FILE, build_can_log
+
+
+def _baseline_csv(log_path):
+    """Procesado original: decodificación línea a línea con cantools y CSV en memoria."""
+    db = cantools.database.load_file(DBC_FILE)
+    extractor = OBDDataExtractor()
+    entries = []
+    with open(log_path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if " " in line and not line.startswith("("):
+                extractor.reset_session()
+                entries.append({'Message Name': 'SESIÓN:', 'Decoded Data': line})
+                continue
+            parts = line.split()
+            if len(parts) < 4 or not parts[0].startswith('('):
+                continue
+            timestamp, can_id_str, data_hex = parts[0].strip('()'), parts[2], ''.join(parts[4:])
+            try:
+                can_id_int = int(can_id_str, 16)
+                data_bytes = bytes.fromhex(data_hex)
+                special = extractor.extract(can_id_int, data_bytes)
+                if special:
+                    entry = {'Timestamp': timestamp, 'CAN ID': can_id_str}
+                    if special['type'] in ('VIN', 'CVN'):
+                        entry.update({'Message Name': special['type'], 'Decoded Data': special['data']})
+                    elif special['type'] == 'DTC':
+                        dtc_type = "Almacenados" if special['mode'] == 0x43 else "Pendientes"
+                        entry.update({'Message Name': f'DTC {dtc_type}', 'Decoded Data': special['data']})
+                    entries.append(entry)
+                    continue
+                message = db.get_message_by_frame_id(can_id_int)
+                decoded = message.decode(data_bytes)
+                entries.append({'Timestamp': timestamp, 'CAN ID': can_id_str, 'Message Name': message.name,
+                                'Decoded Data': ", ".join(f"{key}: {value}" for key, value in decoded.items())})
+            except (KeyError, cantools.database.errors.DecodeError):
+                entries.append({'Timestamp': timestamp, 'CAN ID': can_id_str,
+                                'Message Name': 'Desconocido', 'Decoded Data': data_hex.upper()})
+            except ValueError:
+                continue
+
+    out = io.StringIO(newline='')
+    writer = csv.DictWriter(out, fieldnames=['Timestamp', 'CAN ID', 'Message Name', 'Decoded Data'],
+                            extrasaction='ignore', delimiter='|')
+    out.write("Timestamp | CAN ID | Message Name | Decoded Data\n")
+    for entry in entries:
+        if entry.get('Message Name') == 'SESIÓN:':
+            out.write(f" | | {entry['Message Name']} | {entry['Decoded Data']}\n")
+        else:
+            writer.writerow(entry)
+    return out.getvalue()
+
+
+def _read(path):
+    with open(path, 'r', newline='') as f:
+        return f.read()
+
+
+@pytest.fixture
+def baseline_log(processing_env):
+    log_path = build_can_log(processing_env / "can_logs" / "canlog_20240101.log",
+                             n_cycles=500, sessions=3, multi_pid=False)
+    return log_path, _baseline_csv(log_path)
+
+
+@pytest.mark.parametrize("batch_size, workers", [
+    (0, 1),     # Streaming trama a trama (user-002)
+    (1, 1),     # Lotes NumPy (user-009), incluidos los límites de lote más desfavorables
+    (7, 1),
+    (4096, 1),
+    (0, 3),     # Trozos decodificados en paralelo (user-004)
+    (4096, 4),
+])
+def test_text_log_matches_baseline(baseline_log, decoder, monkeypatch, batch_size, workers):
+    log_path, expected = baseline_log
+    monkeypatch.setattr(config, "LOG_BATCH_SIZE", batch_size)
+    monkeypatch.setattr(config, "LOG_CHUNK_MIN_BYTES", 0)
+    outputs = process_log_file(str(log_path), decoder, OBDDataExtractor(), workers=workers)
+    assert _read(outputs[0]) == expected
+
+
+@pytest.mark.parametrize("batch_size", [0, 4096])
+def test_binary_log_matches_baseline(baseline_log, processing_env, decoder, monkeypatch, batch_size):
+    log_path, expected = baseline_log
+    binary_path = processing_env / "can_logs" / "canlog_20240101.bin"
+    with open(log_path, 'r') as f, BinaryCANLogWriter(str(binary_path)) as writer:
+        for line in f:
+            parts = line.split()
+            if not line.startswith(" ("):
+                writer.start_session(line.strip())
+                continue
+            writer.write_frame(float(parts[0].strip('()')), int(parts[2], 16), bytes.fromhex(''.join(parts[4:])))
+    monkeypatch.setattr(config, "LOG_BATCH_SIZE", batch_size)
+    outputs = process_log_file(str(binary_path), decoder, OBDDataExtractor())
+    assert _read(outputs[0]) == expected
+
+
+@pytest.mark.parametrize("batch_size", [0, 4096])
+def test_incremental_passes_match_baseline(baseline_log, processing_env, decoder, monkeypatch, batch_size):
+    log_path, expected = baseline_log
+    monkeypatch.setattr(config, "LOG_BATCH_SIZE", batch_size)
+    lines = _read(log_path).splitlines(keepends=True)
+    # Pasadas del procesado incremental (user-010) que cortan en líneas arbitrarias
+    grown = processing_env / "can_logs" / "canlog_20240102.log"
+    state = {}
+    with open(grown, 'w') as f:
+        for start in range(0, len(lines), 53):
+            f.writelines(lines[start:start + 53])
+            f.flush()
+            process_log_incremental(str(grown), decoder, state)
+    assert _read(processing_env / "csv_exports" / "canlog_20240102.csv") == expected
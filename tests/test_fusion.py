@@ -0,0 +1,92 @@
+# ./tests/test_fusion.py
+import os
+import csv
+import time
+
+import config
+from src.core.fusion import IMU_GPS_COLUMNS, _GridResampler, _signal_gaps, fuse_log
+from src.core.log_processor import process_log_file, OBDDataExtractor
+from conftest import build_can_log
+
+
+class _Rows:
+    def __init__(self):
+        self.rows = []
+
+    def writerow(self, row):
+        self.rows.append(row)
+
+
+def test_each_signal_uses_its_own_gap():
+    resampler = _GridResampler(1, 'linear', 2.0, {"rpm": 7.5})
+    resampler.register(["accel_x_m_s2"])
+    writer = _Rows()
+    resampler.open(writer, 0.0)
+    for ts in (0.0, 5.0):
+        resampler.add(ts, {"accel_x_m_s2": ts, "rpm": ts * 100})
+    resampler.close(5.0)
+    by_time = {row[0]: row[1:] for row in writer.rows}
+    # La RPM (solicitada cada 5 s) se interpola; la IMU, con 2 s de hueco máximo, queda vacía
+    assert by_time["3.000"] == ['', 300.0]
+    assert by_time["5.000"] == [5.0, 500.0]
+
+
+def test_signal_gaps_follow_request_periods(tmp_path, monkeypatch, decoder):
+    requests_csv = tmp_path / "solicitudes.csv"
+    requests_csv.write_text("ID,Datos,Frecuencia,Disparo,Disparo Único\n"
+                            "7DF,02010C0000000000,5000,0,0\n"
+                            "7DF,0201460000000000,20000,0,0\n"
+                            "7DF,0902000000000000,0,0,1\n")
+    monkeypatch.setattr(config, "OBD_REQUESTS_CSV", str(requests_csv))
+    monkeypatch.setattr(config, "ADAPTIVE_REQUEST_RATE", False)
+    gaps, default_gap = _signal_gaps(decoder, 2.0)
+    assert gaps["S01PID0C_EngineRPM"] == 7.5
+    assert gaps["S01PID46_AmbientAirTemp"] == 30.0
+    assert default_gap == 30.0
+    assert gaps["S01PID0D_VehicleSpeed"] == default_gap
+
+
+def _write_imu_csv(imu_dir, start_ts, seconds, rate_hz=20):
+    """CSV diario de IMU/GPS del 2024-01-01 con muestras desde `start_ts` (hora local)."""
+    path = imu_dir / "2024" / "01" / "20240101_IMU_GPS_DATA.csv"
+    path.parent.mkdir(parents=True)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["===== Sesión 1 - 2024-01-01 00:00:00 ====="])
+        writer.writerow(["timestamp"] + IMU_GPS_COLUMNS)
+        for i in range(int(seconds * rate_hz)):
+            ts = start_ts + i / rate_hz
+            stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts)) + f".{int(ts * 1000) % 1000:03d}"
+            writer.writerow([stamp] + [f"{i * 0.01:.2f}"] * len(IMU_GPS_COLUMNS))
+
+
+def _fusion_tables(outputs):
+    return [path for path in outputs if path.endswith("_fusion.csv")]
+
+
+def test_processing_writes_fusion_tables_in_the_decode_pass(processing_env, decoder, monkeypatch):
+    monkeypatch.setattr(config, "FUSION_EXPORT", True)
+    _write_imu_csv(processing_env / "imu_gps_logs", 1700000000.0, 20)
+    log_path = build_can_log(processing_env / "can_logs" / "canlog_20240101.log", n_cycles=400, sessions=2)
+
+    tables = {}
+    for batch_size in (0, 4096):
+        monkeypatch.setattr(config, "LOG_BATCH_SIZE", batch_size)
+        outputs = _fusion_tables(process_log_file(str(log_path), decoder, OBDDataExtractor()))
+        assert len(outputs) == 2
+        tables[batch_size] = [open(path).read() for path in outputs]
+    # Las filas de la decodificación trama a trama y por lotes dan la misma fusión
+    assert tables[0] == tables[4096]
+    header, first_row = tables[0][0].splitlines()[:2]
+    assert "accel_x_m_s2" in header and "S01PID0C_EngineRPM" in header
+    assert first_row.split(',')[1] != ''
+    # La fusión por separado da el mismo resultado
+    assert [open(path).read() for path in fuse_log(str(log_path), decoder)] == tables[0]
+
+
+def test_no_fusion_without_imu_gps_data(processing_env, decoder, monkeypatch):
+    monkeypatch.setattr(config, "FUSION_EXPORT", True)
+    log_path = build_can_log(processing_env / "can_logs" / "canlog_20240101.log", n_cycles=80, sessions=1)
+    outputs = process_log_file(str(log_path), decoder, OBDDataExtractor())
+    assert _fusion_tables(outputs) == []
+    assert not any(name.endswith("_fusion.csv") for name in os.listdir(processing_env / "csv_exports"))
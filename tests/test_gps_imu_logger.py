@@ -0,0 +1,67 @@
+# ./tests/test_gps_imu_logger.py
+from src.core import gps_imu_logger
+from src.core.gps_imu_logger import GPSIMULogger, build_frame
+from src.core.telemetry import TelemetryBus
+
+
+class _Rows:
+    def __init__(self):
+        self.rows = []
+
+    def writerow(self, row):
+        self.rows.append(row)
+
+
+def _logger(monkeypatch, rate_hz=100):
+    monkeypatch.setattr(gps_imu_logger.config, "IMU_GPS_SAMPLE_RATE_HZ", rate_hz)
+    logger = GPSIMULogger()
+    logger.csv_log = _Rows()
+    return logger
+
+
+def _frame(sequence):
+    return build_frame(sequence, (0.1, 0.2, 9.8), (0.0, 0.0, 0.1), 43.0, -8.0)
+
+
+def test_text_samples_keep_their_read_time(monkeypatch):
+    logger = _logger(monkeypatch)
+    now = 1700000000.5
+    # Lecturas sucesivas, una de ellas con retraso: cada línea lleva la hora de su lectura
+    for offset, count in ((0.0, 1), (0.004, 1), (0.250, 2), (0.251, 1)):
+        logger._handle_text_chunk(b"1,2,3,4,5,6,43.1,-8.1\n" * count, now + offset)
+    stamps = [row[0][-3:] for row in logger.csv_log.rows]
+    assert stamps == ["500", "504", "750", "750", "751"]
+    distinct = list(dict.fromkeys(stamps))
+    assert distinct == sorted(distinct) and len(distinct) == 4
+
+
+def test_binary_timestamps_follow_sequence_numbers(monkeypatch):
+    logger = _logger(monkeypatch)
+    now = 1700000000.5
+    # La trama 3 se perdió: la 2 queda a tres periodos de la última
+    logger._handle_binary_chunk(_frame(1) + _frame(2) + _frame(5), now)
+    assert [row[0][-3:] for row in logger.csv_log.rows] == ["460", "470", "500"]
+
+
+def test_binary_timestamps_never_go_backwards(monkeypatch):
+    logger = _logger(monkeypatch)
+    now = 1700000000.5
+    logger._handle_binary_chunk(_frame(1) + _frame(2), now)
+    # El siguiente bloque llega antes de lo que indica el periodo: continúa tras el anterior
+    logger._handle_binary_chunk(_frame(3) + _frame(4) + _frame(5), now + 0.005)
+    stamps = [row[0] for row in logger.csv_log.rows]
+    assert stamps == sorted(stamps) and len(set(stamps)) == len(stamps)
+
+
+def test_every_sample_reaches_signal_history(monkeypatch):
+    bus = TelemetryBus()
+    published = []
+    bus.add_sink(lambda values, timestamp: published.append((timestamp, values["accel_x_m_s2"])))
+    monkeypatch.setattr(gps_imu_logger, "telemetry_bus", bus)
+    logger = _logger(monkeypatch)
+    now = 1700000000.5
+    logger._handle_binary_chunk(_frame(1) + _frame(2) + _frame(3), now)
+    logger._handle_text_chunk(b"1,2,3,4,5,6,43.1,-8.1\n2,2,3,4,5,6,43.1,-8.1\n", now + 0.05)
+    assert len(published) == 5
+    assert [timestamp for timestamp, _ in published] == sorted(timestamp for timestamp, _ in published)
+    assert [value for _, value in published][-2:] == [1.0, 2.0]
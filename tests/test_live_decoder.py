@@ -0,0 +1,44 @@
+# ./tests/test_live_decoder.py
+from src.core import live_decoder
+from src.core.live_decoder import LiveDecoder
+from src.core.telemetry import TelemetryBus
+
+
+def _published(decoder, monkeypatch, frames):
+    bus = TelemetryBus()
+    published = []
+    bus.add_sink(lambda values, timestamp: published.append(values))
+    monkeypatch.setattr(live_decoder, "telemetry_bus", bus)
+    live = LiveDecoder(decoder)
+    for i, data in enumerate(frames):
+        live._decode(1700000000.0 + i * 0.001, 0x7E8, bytes(data))
+    return published
+
+
+def test_publishes_completed_multi_pid_reply(decoder, monkeypatch):
+    published = _published(decoder, monkeypatch, [
+        [0x10, 0x0A, 0x41, 0x0C, 0x1A, 0xF8, 0x0D, 0x32],
+        [0x21, 0x05, 0x5A, 0x11, 0x80, 0xAA, 0xAA, 0xAA],
+    ])
+    assert len(published) == 1
+    values = published[0]
+    assert sorted(values) == ["S01PID05_EngineCoolantTemp", "S01PID0C_EngineRPM",
+                              "S01PID0D_VehicleSpeed", "S01PID11_ThrottlePosition"]
+    assert values["S01PID0C_EngineRPM"] == 1726.0
+    assert values["S01PID0D_VehicleSpeed"] == 50
+
+
+def test_ignores_vin_and_orphaned_consecutive_frames(decoder, monkeypatch):
+    published = _published(decoder, monkeypatch, [
+        # VIN multi-trama
+        [0x10, 0x14, 0x49, 0x02, 0x01, 0x31, 0x48, 0x47],
+        [0x21, 0x43, 0x4D, 0x38, 0x32, 0x36, 0x33, 0x33],
+        [0x22, 0x41, 0x30, 0x30, 0x34, 0x33, 0x35, 0x32],
+        # Tramas consecutivas sin First Frame y fuera de secuencia
+        [0x21, 0x41, 0x0D, 0x32, 0x05, 0x5A, 0xAA, 0xAA],
+        [0x10, 0x0A, 0x41, 0x0C, 0x1A, 0xF8, 0x0D, 0x32],
+        [0x23, 0x41, 0x0D, 0x32, 0x11, 0x80, 0xAA, 0xAA],
+        # Respuesta normal de un PID
+        [0x03, 0x41, 0x0D, 0x32, 0xAA, 0xAA, 0xAA, 0xAA],
+    ])
+    assert published == [{"S01PID0D_VehicleSpeed": 50}]
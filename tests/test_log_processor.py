@@ -0,0 +1,85 @@
+# ./tests/test_log_processor.py
+import os
+import json
+import mmap
+
+import pytest
+
+import config
+from src.core import log_processor
+from src.core.log_processor import OBDDataExtractor, process_log_file, process_log_incremental
+
+from conftest import build_can_log
+
+
+def _read(path):
+    with open(path, 'r') as f:
+        return f.read()
+
+def _process(log_path, decoder, batch_size, monkeypatch, workers=1):
+    monkeypatch.setattr(config, "LOG_BATCH_SIZE", batch_size)
+    outputs = process_log_file(str(log_path), decoder, OBDDataExtractor(), workers=workers)
+    return _read(outputs[0])
+
+
+def test_multi_pid_replies_are_split_per_pid(processing_env, decoder, monkeypatch):
+    log_path = build_can_log(processing_env / "can_logs" / "canlog_20240101.log", n_cycles=8, sessions=1)
+    rows = _process(log_path, decoder, 0, monkeypatch).splitlines()
+    # Respuesta ISO-TP de 6 PIDs: una fila por PID con el timestamp de la última trama
+    for pid in ("0C_EngineRPM", "0D_VehicleSpeed", "05_EngineCoolantTemp",
+                "11_ThrottlePosition", "0B_IntakeManiAbsPress", "5D_FuelInjectionTiming"):
+        assert any(f"S01PID: S01PID{pid}," in row for row in rows)
+    # Las tramas ISO-TP intermedias no generan filas
+    assert not any(row.startswith(("1700000000.041000|", "1700000000.042000|")) for row in rows)
+    assert sum(row.startswith("1700000000.042500|7E8|OBD2|") for row in rows) == 6
+
+
+@pytest.mark.parametrize("workers", [2, 3, 4, 5, 8, 13])
+def test_chunked_output_matches_sequential_mid_reply(processing_env, decoder, monkeypatch, workers):
+    log_path = build_can_log(processing_env / "can_logs" / "canlog_20240101.log", n_cycles=600, sessions=1)
+    expected = _process(log_path, decoder, 0, monkeypatch)
+
+    monkeypatch.setattr(config, "LOG_CHUNK_MIN_BYTES", 0)
+    assert _process(log_path, decoder, 0, monkeypatch, workers=workers) == expected
+    assert _process(log_path, decoder, 4096, monkeypatch, workers=workers) == expected
+
+
+def test_chunk_boundaries_fall_inside_multi_pid_replies(processing_env):
+    """Comprueba que el test anterior corta de verdad alguna respuesta ISO-TP a medias."""
+    log_path = build_can_log(processing_env / "can_logs" / "canlog_20240101.log", n_cycles=600, sessions=1)
+    in_progress = 0
+    with open(log_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        state_lines = log_processor._scan_extractor_state_lines(mm)
+        for workers in (2, 3, 4, 5, 8, 13):
+            boundaries = log_processor._compute_chunk_boundaries(mm, len(mm), workers, [])
+            states = log_processor._extractor_states_at(state_lines, boundaries, OBDDataExtractor())
+            in_progress += sum(1 for state in states if state[2])
+    assert in_progress > 0
+
+
+def test_incremental_passes_match_full_decode(processing_env, decoder, monkeypatch):
+    log_path = build_can_log(processing_env / "can_logs" / "canlog_20240101.log", n_cycles=300, sessions=2)
+    expected = _process(log_path, decoder, 0, monkeypatch)
+    content = _read(log_path)
+    lines = content.splitlines(keepends=True)
+
+    # El log crece en pasadas que cortan en cualquier línea, incluidas las
+    # intermedias de las respuestas multi-trama (y una línea a medio escribir)
+    grown = processing_env / "can_logs" / "canlog_20240102.log"
+    state = {}
+    written = 0
+    with open(grown, 'w') as f:
+        for cut in list(range(7, len(lines), 37)) + [len(lines)]:
+            chunk = ''.join(lines[written:cut])
+            written = cut
+            partial = len(chunk) // 2 if cut < len(lines) else len(chunk)
+            f.write(chunk[:partial])
+            f.flush()
+            process_log_incremental(str(grown), decoder, state)
+            # El estado se guarda en JSON entre pasadas
+            state = json.loads(json.dumps(state))
+            f.write(chunk[partial:])
+            f.flush()
+            process_log_incremental(str(grown), decoder, state)
+
+    assert _read(processing_env / "csv_exports" / "canlog_20240102.csv") == expected
@@ -0,0 +1,58 @@
+from src.core.log_processor import _needs_processing
+from src.core.processed_manifest import ProcessedManifest, LEGACY_FINGERPRINT
+from conftest import build_can_log
+
+
+def _import_legacy_log(tmp_path, dbc_version=None):
+    legacy = tmp_path / "processed_files.txt"
+    legacy.write_text("canlog_20240101.log\n")
+    log_file = str(build_can_log(tmp_path / "canlog_20240101.log", n_cycles=40, sessions=1))
+    manifest = ProcessedManifest(str(tmp_path / "manifest.sqlite3"))
+    manifest.import_legacy(str(legacy), dbc_version)
+    return manifest, log_file
+
+
+def test_legacy_entries_are_completed_on_first_use(tmp_path, decoder):
+    manifest, log_file = _import_legacy_log(tmp_path, "dbc-v1")
+    with manifest:
+        assert manifest.get(log_file)['dbc_fingerprint'] == LEGACY_FINGERPRINT
+        assert not _needs_processing(manifest, log_file, "dbc-v1", decoder)
+        entry = manifest.get(log_file)
+        assert entry['content_hash'] is not None
+        assert entry['dbc_fingerprint'] != LEGACY_FINGERPRINT
+        # A partir de aquí un cambio del contenido se detecta como en cualquier entrada
+        with open(log_file, 'a') as f:
+            f.write(" (1700000099.000000)  can0  7E8   [8]  03 41 0D 10 AA AA AA AA\n")
+        assert _needs_processing(manifest, log_file, "dbc-v1", decoder)
+
+
+def test_legacy_entry_is_skipped_when_the_dbc_change_does_not_affect_its_messages(tmp_path, decoder):
+    manifest, log_file = _import_legacy_log(tmp_path, "dbc-v1")
+    with manifest:
+        assert not _needs_processing(manifest, log_file, "dbc-v1", decoder)
+        assert not _needs_processing(manifest, log_file, "dbc-v2", decoder)
+        assert manifest.get(log_file)['dbc_version'] == "dbc-v2"
+
+
+def test_legacy_entry_is_reprocessed_when_the_dbc_change_affects_its_messages(tmp_path, decoder, monkeypatch):
+    manifest, log_file = _import_legacy_log(tmp_path, "dbc-v1")
+    with manifest:
+        assert not _needs_processing(manifest, log_file, "dbc-v1", decoder)
+        original = decoder.message_fingerprint
+        monkeypatch.setattr(decoder, "message_fingerprint",
+                            lambda frame_id: "cambiado" if frame_id == 0x7E8 else original(frame_id))
+        assert _needs_processing(manifest, log_file, "dbc-v2", decoder)
+
+
+def test_legacy_entries_without_dbc_version_adopt_the_current_one(tmp_path, decoder):
+    manifest, log_file = _import_legacy_log(tmp_path) # Importadas por versiones anteriores
+    with manifest:
+        assert not _needs_processing(manifest, log_file, "dbc-v1", decoder)
+        assert manifest.get(log_file)['dbc_version'] == "dbc-v1"
+        assert not _needs_processing(manifest, log_file, "dbc-v2", decoder)
+
+
+def test_legacy_entries_are_reprocessed_if_the_dbc_changed_before_first_use(tmp_path, decoder):
+    manifest, log_file = _import_legacy_log(tmp_path, "dbc-v1")
+    with manifest:
+        assert _needs_processing(manifest, log_file, "dbc-v2", decoder)
@@ -0,0 +1,26 @@
+# ./tests/test_request_scheduler.py
+from src.core.obd_logger import OBDLogger
+from src.core.request_scheduler import RequestScheduler
+
+
+def test_duplicate_job_names_are_rejected():
+    now = [0.0]
+    scheduler = RequestScheduler(clock=lambda: now[0])
+    calls = []
+    assert scheduler.schedule("7DF_02010C", lambda: calls.append("a"), 0.0, 1.0)
+    assert not scheduler.schedule("7DF_02010C", lambda: calls.append("b"), 0.0, 5.0)
+    for now[0] in (0.0, 1.0, 2.0):
+        scheduler.run_due()
+    assert calls == ["a", "a", "a"]
+    assert scheduler.stats()["7DF_02010C"]["count"] == 3
+
+
+def test_repeated_csv_requests_are_loaded_once(tmp_path):
+    requests_csv = tmp_path / "solicitudes.csv"
+    requests_csv.write_text("ID,Datos,Frecuencia,Disparo,Disparo Único\n"
+                            "7DF,02010C0000000000,5000,0,0\n"
+                            "7DF,02010D0000000000,1000,0,0\n"
+                            "7DF,02010C0000000000,1000,500,0\n")
+    requests = OBDLogger._load_requests_csv(None, str(requests_csv))
+    assert [(req["Datos"], req["Frecuencia"]) for req in requests] == [
+        ("02010C0000000000", 5000), ("02010D0000000000", 1000)]
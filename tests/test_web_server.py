@@ -0,0 +1,70 @@
+# ./tests/test_web_server.py
+import os
+import time
+
+from src.services.web_server import DirectoryIndex, _CustomHandler
+
+
+def test_restat_picks_up_appends_without_directory_change(tmp_path):
+    path = tmp_path / "canlog_20240101.csv"
+    path.write_bytes(b"x" * 120000)
+    old = time.time() - 60
+    os.utime(path, (old, old))
+    os.utime(tmp_path, (old, old))
+
+    index = DirectoryIndex(str(tmp_path))
+    assert index.entries() == [("canlog_20240101.csv", 120000, old)]
+
+    with open(path, 'ab') as f:
+        f.write(b"y" * 15)
+    os.utime(tmp_path, (old, old)) # El append no cambia el mtime del directorio
+    fresh = index.restat(index.entries())
+    assert fresh[0][1] == 120015
+    assert fresh[0][2] > old
+    # El índice guarda el cambio para ordenar y filtrar
+    assert index.entries(sort="size") == fresh
+
+
+def test_partial_files_are_not_listed(tmp_path):
+    for name in ("canlog_20240101.csv", "canlog_20240102.csv.tmp", "canlog_20240102.parquet.tmp",
+                 "canlog_20240103.csv.part0", ".hidden"):
+        (tmp_path / name).write_text("x")
+    index = DirectoryIndex(str(tmp_path))
+    assert [entry[0] for entry in index.entries()] == ["canlog_20240101.csv"]
+
+
+def test_stale_compressed_cache_is_swept_on_refresh(tmp_path):
+    path = tmp_path / "canlog_20240101.csv"
+    path.write_text("x")
+    st = path.stat()
+    cache = tmp_path / ".compressed"
+    cache.mkdir()
+    current = cache / f"canlog_20240101.csv.{st.st_mtime_ns}.{st.st_size}.gz"
+    outdated = cache / f"canlog_20240101.csv.{st.st_mtime_ns - 1}.{st.st_size}.gz"
+    orphan = cache / "canlog_20231231.csv.1.1.gz"
+    in_progress = cache / ".tmp_abc"
+    for entry in (current, outdated, orphan, in_progress):
+        entry.write_bytes(b"z")
+
+    DirectoryIndex(str(tmp_path)).entries()
+    assert sorted(p.name for p in cache.iterdir()) == sorted([current.name, in_progress.name])
+
+
+def test_api_files_and_archive_filter_by_the_same_date(tmp_path):
+    # La fecha del nombre manda sobre el mtime; sin fecha en el nombre, el mtime
+    dates = {"canlog_20240101.csv": "2024-03-05", "canlog_20240305.csv": "2024-01-01", "notas.txt": "2024-01-01"}
+    for name, modified in dates.items():
+        path = tmp_path / name
+        path.write_text("x")
+        stamp = time.mktime(time.strptime(modified + " 12:00", "%Y-%m-%d %H:%M"))
+        os.utime(path, (stamp, stamp))
+
+    handler = _CustomHandler.__new__(_CustomHandler)
+    handler.directory = str(tmp_path)
+    handler.path = "/api/files?from=2024-01-01&to=2024-01-01"
+    _, _, entries = handler.query_index()
+    listed = [name for name, _, _ in entries]
+    assert listed == ["canlog_20240101.csv", "notas.txt"]
+
+    members = handler.archive_members({'from': ['2024-01-01'], 'to': ['2024-01-01']})
+    assert [os.path.basename(path) for path, _ in members] == listed